@@ -0,0 +1,64 @@
+""" Synthetic samples in the format of tests/hercules_protocol/sample_data:
+    a dict with the event 'tuple', its 'bytes' and its 'scheme'
+"""
+from typing import Any, Dict
+from ctypes import c_char_p, c_uint8, c_int16, c_int32, c_int64, c_bool, c_double
+from uuid import UUID
+from hercules_protocol import serialize, make_scheme, Vector
+
+VERSION = 1
+TIMESTAMP = 15276799200000000
+UUID_ = UUID('11203800-63fd-11e8-83e2-3a587d902000')
+
+
+def _sample(payload: dict) -> Dict[str, Any]:
+    tuple_ = (VERSION, TIMESTAMP, UUID_, payload)
+    return {
+        'bytes': serialize(*tuple_),
+        'tuple': tuple_,
+        'scheme': make_scheme(payload)[1],
+    }
+
+
+def wide_event(tag_count: int = 200) -> Dict[str, Any]:
+    """ An event of tag_count tags of all the scalar types
+    """
+    makers = (
+        lambda i: c_uint8(i % 256),
+        lambda i: c_int16(i),
+        lambda i: c_int32(i * 1000),
+        lambda i: c_int64(i * 10 ** 12),
+        lambda i: c_bool(i % 2),
+        lambda i: c_double(i / 7),
+        lambda i: c_char_p(f'value-{i}'.encode()),
+        lambda i: UUID(int=i),
+    )
+    return _sample({f'tag_{i}': makers[i % len(makers)](i) for i in range(tag_count)})
+
+
+def nested_event(depth: int = 50, width: int = 4) -> Dict[str, Any]:
+    """ An event of containers nested depth times, each one has width tags besides the next one
+    """
+    container: Dict[str, Any] = {f'leaf_{i}': c_int32(i) for i in range(width)}
+    for level in range(depth):
+        container = {'level': c_int16(level), 'child': container}
+        container.update({f'leaf_{i}': c_char_p(f'{level}-{i}'.encode()) for i in range(width)})
+    return _sample(container)
+
+
+def large_vector_event(length: int = 100000) -> Dict[str, Any]:
+    """ An event of vectors of length numbers
+    """
+    longs = Vector([], c_int64)
+    longs.extend(c_int64(i) for i in range(length))
+    doubles = Vector([], c_double)
+    doubles.extend(c_double(i / 3) for i in range(length))
+    bytes_ = Vector([], c_uint8)
+    bytes_.extend(c_uint8(i % 256) for i in range(length))
+    return _sample({'longs': longs, 'doubles': doubles, 'bytes': bytes_})
+
+
+def long_string_event(length: int = 1024 * 1024, count: int = 4) -> Dict[str, Any]:
+    """ An event of count strings of length bytes
+    """
+    return _sample({f'string_{i}': c_char_p(bytes([97 + i]) * length) for i in range(count)})
@@ -0,0 +1,163 @@
+""" The benchmarks of serialize, deserialize, the scheme variants, simplify and make_scheme
+
+    python -m benchmarks.run [--output results.json] [--compare baseline.json]
+
+    The results are printed (or written to the output file) as JSON: for every sample
+    and operation the events and bytes per second of the best repeat and the memory
+    allocated by one call (traced by tracemalloc).
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from hercules_protocol import (
+    serialize, deserialize, simplify, make_scheme, compile_scheme, AdaptiveCodec, decode_columns
+)
+from tests.hercules_protocol import sample_data
+from . import generators
+
+SAMPLES: Dict[str, Callable[[], Dict[str, Any]]] = {
+    'from_github': lambda: sample_data.from_github,
+    'container': lambda: sample_data.container,
+    'vectors': lambda: sample_data.vectors,
+    'from_balconlib': lambda: sample_data.from_balconlib,
+    'wide_event': generators.wide_event,
+    'nested_event': generators.nested_event,
+    'large_vector_event': generators.large_vector_event,
+    'long_string_event': generators.long_string_event,
+}
+
+
+def get_operations(sample: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    tuple_, bytes_, scheme = sample['tuple'], sample['bytes'], sample['scheme']
+    codec = compile_scheme(scheme)
+    adaptive = AdaptiveCodec(threshold=1)
+    adaptive.serialize(*tuple_)
+    adaptive.deserialize(bytes_)
+    return {
+        'serialize': lambda: serialize(*tuple_),
+        'serialize_scheme': lambda: serialize(*tuple_, scheme=scheme),
+        'serialize_codec': lambda: codec.serialize(*tuple_),
+        'serialize_adaptive': lambda: adaptive.serialize(*tuple_),
+        'deserialize': lambda: deserialize(bytes_),
+        'deserialize_scheme': lambda: deserialize(bytes_, scheme),
+        'deserialize_codec': lambda: codec.deserialize(bytes_),
+        'deserialize_adaptive': lambda: adaptive.deserialize(bytes_),
+        'decode_columns': lambda: decode_columns(bytes_),
+        'simplify': lambda: simplify(tuple_),
+        'make_scheme': lambda: make_scheme(tuple_[3]),
+    }
+
+
+def measure_time(function: Callable[[], Any], min_time: float, repeat: int) -> Dict[str, float]:
+    """ The best time of a call, the calls are repeated until they take min_time (with gc disabled as timeit does)
+    """
+    def time_calls(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        return time.perf_counter() - start
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        elapsed = time_calls(number)
+        while elapsed < min_time:
+            number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+            elapsed = time_calls(number)
+        times = [elapsed] + [time_calls(number) for _ in range(repeat - 1)]
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {'seconds_per_event': min(times) / number, 'calls': number * repeat}
+
+
+def measure_memory(function: Callable[[], Any]) -> Dict[str, int]:
+    """ The peak and the retained memory of a call
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {'alloc_peak_bytes': peak, 'alloc_retained_bytes': retained}
+
+
+def run(samples: List[str], operations: Optional[List[str]], min_time: float, repeat: int) -> Dict[str, Any]:
+    results = []
+    for sample_name in samples:
+        sample = SAMPLES[sample_name]()
+        size = len(sample['bytes'])
+        for operation, function in get_operations(sample).items():
+            if operations and operation not in operations:
+                continue
+            timing = measure_time(function, min_time, repeat)
+            events_per_sec = 1 / timing['seconds_per_event']
+            results.append({
+                'sample': sample_name,
+                'operation': operation,
+                'event_bytes': size,
+                'events_per_sec': events_per_sec,
+                'bytes_per_sec': events_per_sec * size,
+                'calls': timing['calls'],
+                **measure_memory(function),
+            })
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'min_time': min_time,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> str:
+    """ The table of the events per second of the current run relative to the baseline
+    """
+    old = {(r['sample'], r['operation']): r['events_per_sec'] for r in baseline['results']}
+    lines = [f'{"sample":<20} {"operation":<20} {"baseline":>12} {"current":>12} {"ratio":>7}']
+    for result in current['results']:
+        key = (result['sample'], result['operation'])
+        if key in old:
+            lines.append(
+                f'{key[0]:<20} {key[1]:<20} {old[key]:>12.1f} {result["events_per_sec"]:>12.1f} '
+                f'{result["events_per_sec"] / old[key]:>6.2f}x'
+            )
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='the JSON file of the results, stdout by default')
+    parser.add_argument('--compare', help='the JSON file of a previous run to compare with')
+    parser.add_argument('--sample', action='append', choices=list(SAMPLES), help='the samples to run, all by default')
+    parser.add_argument('--operation', action='append', help='the operations to run, all by default')
+    parser.add_argument('--min-time', type=float, default=0.2, help='the minimal time of a repeat in seconds')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of repeats')
+    args = parser.parse_args(argv)
+
+    report = run(args.sample or list(SAMPLES), args.operation, args.min_time, args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as file:
+            print(compare(json.load(file), report), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
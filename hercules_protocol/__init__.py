@@ -1,9 +1,58 @@
-from .serialization import serialize, deserialize, Vector
+from .serialization import (
+    serialize, deserialize, serialized_size, Vector, ArrayVector, key_cache_info, key_cache_clear
+)
 from .extra_functions import simplify, make_scheme
+from .codec import compile_scheme, Codec
+from .codegen import generate_codec
+from .adaptive import AdaptiveCodec
+from .interning import StringInterner
+from .batch import serialize_many, split_batches
+from .stream import iter_events
+from .predicates import tag, Tag, Predicate
+from .aio import aread_events, AsyncEventWriter
+from .sender import GateSender
+from .compression import BlockWriter, BlockReader
+from .columns import decode_columns, encode_columns, EventColumns, Column
+from .lazy import deserialize_lazy, LazyEvent
+from .index import index_event, read_tag
+from .inference import infer_schemes, scan_schemes, SchemeInference
+from .parallel import deserialize_parallel
 __all__ = [
     'serialize',
     'deserialize',
+    'serialized_size',
     'Vector',
+    'ArrayVector',
+    'key_cache_info',
+    'key_cache_clear',
     'simplify',
-    'make_scheme'
+    'make_scheme',
+    'compile_scheme',
+    'Codec',
+    'generate_codec',
+    'AdaptiveCodec',
+    'StringInterner',
+    'serialize_many',
+    'split_batches',
+    'iter_events',
+    'tag',
+    'Tag',
+    'Predicate',
+    'aread_events',
+    'AsyncEventWriter',
+    'GateSender',
+    'BlockWriter',
+    'BlockReader',
+    'decode_columns',
+    'encode_columns',
+    'EventColumns',
+    'Column',
+    'deserialize_lazy',
+    'LazyEvent',
+    'index_event',
+    'read_tag',
+    'infer_schemes',
+    'scan_schemes',
+    'SchemeInference',
+    'deserialize_parallel'
 ]
@@ -0,0 +1,182 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from collections import OrderedDict
+from uuid import UUID
+from hercules_protocol.scheme import Key
+from .datatypes import PTypes
+from .serialization import serialize_into, deserialize_from
+from .codec import Codec
+from .shapes import Shape, _event_shape_from, _payload_shape, _to_scheme
+
+Event = Tuple[int, int, UUID, Dict[str, PTypes]]
+
+
+class _Codecs:
+    """ The LRU cache of the codecs of the shapes seen at least threshold times
+    """
+
+    def __init__(self, maxsize: int, threshold: int) -> None:
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.evictions = 0
+        self.codecs: Dict[Hashable, Codec] = OrderedDict()
+        # the shapes seen less than threshold times, the oldest ones are forgotten
+        self.seen: Dict[Hashable, int] = OrderedDict()
+        # the hits and the mismatches of the codecs, whose fingerprints do not fix the nested shapes
+        self.results: Dict[Hashable, List[int]] = {}
+        # the fingerprints of the codecs, which have mismatched more often than matched
+        self.bypassed: Dict[Hashable, None] = OrderedDict()
+
+    def get(self, fingerprint: Hashable) -> Optional[Codec]:
+        codec = self.codecs.get(fingerprint)
+        if codec is not None:
+            self.codecs.move_to_end(fingerprint)  # type: ignore
+        return codec
+
+    def hit(self, fingerprint: Hashable) -> None:
+        self.results[fingerprint][0] += 1
+
+    def mismatch(self, fingerprint: Hashable) -> None:
+        """ Count the event, which the codec of its fingerprint has refused,
+            bypass the codec when it has mismatched threshold times and more often than matched
+        """
+        results = self.results[fingerprint]
+        results[1] += 1
+        if results[1] >= self.threshold and results[1] > results[0]:
+            del self.codecs[fingerprint]
+            del self.results[fingerprint]
+            self.bypassed[fingerprint] = None
+            if len(self.bypassed) > self.maxsize * 16:
+                self.bypassed.popitem(last=False)  # type: ignore
+
+    def see(self, fingerprint: Hashable, shape: Callable[[], Optional[Shape]]) -> None:
+        """ Count the fingerprint of an event translated by the generic path, compile its shape when it is frequent
+        """
+        if fingerprint in self.bypassed:
+            return
+        seen = self.seen.pop(fingerprint, 0) + 1
+        if seen < self.threshold:
+            self.seen[fingerprint] = seen
+            if len(self.seen) > self.maxsize * 16:
+                self.seen.popitem(last=False)  # type: ignore
+            return
+
+        shape_ = shape()
+        if shape_ is None:
+            return
+        if len(self.codecs) >= self.maxsize:
+            evicted, _ = self.codecs.popitem(last=False)  # type: ignore
+            self.results.pop(evicted, None)
+            self.evictions += 1
+        self.codecs[fingerprint] = Codec({Key(key): _to_scheme(value) for key, value in shape_[1]})  # type: ignore
+        self.results[fingerprint] = [0, 0]
+
+    def clear(self) -> None:
+        self.codecs.clear()
+        self.seen.clear()
+        self.results.clear()
+        self.bypassed.clear()
+        self.evictions = 0
+
+
+class AdaptiveCodec:
+    """ The encoder and the decoder of events of any shapes, which compiles the frequent shapes
+
+        The codec of a shape (the keys and the Hercules types of the tags of an event)
+        is compiled once the shape has been seen threshold times and is kept
+        in the LRU cache of maxsize codecs (one for encoding, one for decoding).
+        The events of the other shapes are translated by serialize and deserialize.
+
+        The shape of the bytes is found by a scan without decoding the values.
+        The payload is looked up by its keys and the types of its values, and
+        the compiled codec, which verifies the nested values, falls back
+        to serialize if they have another shape. The codec, which mismatches
+        more often than it matches (the nested shapes vary), is dropped and
+        the payloads of its keys and types are translated by serialize.
+    """
+
+    def __init__(self, maxsize: int = 64, threshold: int = 2) -> None:
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError('The maxsize has to be a positive number')
+        if not isinstance(threshold, int) or threshold < 1:
+            raise ValueError('The threshold has to be a positive number')
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._encoders = _Codecs(maxsize, threshold)
+        self._decoders = _Codecs(maxsize, threshold)
+
+    def serialize_into(
+        self, out: bytearray, version: int, timestamp: int, uuid_: UUID, payload: Dict[str, PTypes]
+    ) -> None:
+        """ Translate a data structure into bytes appended to the buffer
+        """
+        if type(payload) is not dict:
+            serialize_into(out, version, timestamp, uuid_, payload)
+            return
+
+        fingerprint = (tuple(payload), tuple(map(type, payload.values())))
+        codec = self._encoders.get(fingerprint)
+        if codec is not None:
+            try:
+                codec.serialize_into(out, version, timestamp, uuid_, payload)
+                self.hits += 1
+                self._encoders.hit(fingerprint)
+                return
+            except (ValueError, TypeError):
+                self._encoders.mismatch(fingerprint)
+
+        self.misses += 1
+        serialize_into(out, version, timestamp, uuid_, payload)
+        if codec is None:
+            self._encoders.see(fingerprint, lambda: _payload_shape(payload))
+
+    def serialize(self, version: int, timestamp: int, uuid_: UUID, payload: Dict[str, PTypes]) -> bytes:
+        """ Translate a data structure into bytes
+        """
+        out = bytearray()
+        self.serialize_into(out, version, timestamp, uuid_, payload)
+        return bytes(out)
+
+    def deserialize_from(self, data: bytes, start: int = 0) -> Tuple[int, Event]:
+        """ Translate bytes from the start offset into a data structure,
+            return the offset of the end of the event and the data structure
+        """
+        shape = _event_shape_from(data, start)[1]
+        codec = self._decoders.get(shape)
+        if codec is not None:
+            self.hits += 1
+            return codec.deserialize_from(data, start)
+
+        self.misses += 1
+        result = deserialize_from(data, start)
+        self._decoders.see(shape, lambda: shape)
+        return result
+
+    def deserialize(self, data: bytes) -> Event:
+        """ Translate bytes into a data structure
+        """
+        return self.deserialize_from(data)[1]
+
+    def info(self) -> Dict[str, Any]:
+        """ Return the statistics of the caches of the codecs
+        """
+        calls = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / calls if calls else 0.0,
+            'evictions': self._encoders.evictions + self._decoders.evictions,
+            'size': len(self._encoders.codecs) + len(self._decoders.codecs),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self) -> None:
+        """ Remove the codecs and the seen shapes and reset the statistics
+        """
+        self._encoders.clear()
+        self._decoders.clear()
+        self.hits = self.misses = 0
+
+    def __repr__(self):
+        return f'{type(self).__name__}(maxsize={self.maxsize}, threshold={self.threshold})'
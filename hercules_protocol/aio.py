@@ -0,0 +1,108 @@
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+from uuid import UUID
+import asyncio
+from .datatypes import PTypes
+from .serialization import serialize_into
+from .codec import Codec
+from .adaptive import AdaptiveCodec
+from .interning import StringInterner
+from .stream import CHUNK_SIZE, _Framing, _get_deserialize_from
+
+Event = Tuple[int, int, UUID, Dict[str, PTypes]]
+
+MAX_EVENT_SIZE = 64 * 1024 * 1024
+OFFLOAD_SIZE = 1024 * 1024
+
+
+async def aread_events(
+    reader: asyncio.StreamReader,
+    scheme: Optional[Union[dict, Codec, AdaptiveCodec]] = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_event_size: int = MAX_EVENT_SIZE,
+    offload_size: Optional[int] = OFFLOAD_SIZE,
+    view_threshold: Optional[int] = None,
+    native: bool = False,
+    arrays: bool = False,
+    numpy: bool = False,
+    interner: Optional[StringInterner] = None
+) -> AsyncIterator[Event]:
+    """ Translate concatenated events of an asyncio stream into data structures one by one
+
+        The stream is read by chunks of chunk_size bytes, an incomplete event is scanned
+        again only when its known length has been read or the buffer has doubled.
+        An event longer than max_event_size bytes raises ValueError. The events of at least
+        offload_size bytes are decoded in the default executor, the loop runs between the chunks.
+        The other arguments are the ones of iter_events.
+    """
+    deserialize_from_ = _get_deserialize_from(scheme, view_threshold, native, arrays, numpy, interner)
+    loop = asyncio.get_running_loop()
+    framing = _Framing(max_event_size)
+    while True:
+        chunk = await reader.read(chunk_size)
+        for buffer, start, stop in framing.feed(chunk):
+            if offload_size is not None and stop - start >= offload_size:
+                event = (await loop.run_in_executor(None, deserialize_from_, buffer, start))[1]
+            else:
+                event = deserialize_from_(buffer, start)[1]
+            yield event
+        if not chunk:
+            return
+        await asyncio.sleep(0)
+
+
+class AsyncEventWriter:
+    """ The writer of events to an asyncio stream
+
+        The events are translated into a buffer, which is written to the stream and drained
+        when it reaches buffer_size bytes, on drain() and on close().
+    """
+
+    def __init__(
+        self,
+        writer: asyncio.StreamWriter,
+        scheme: Optional[Union[dict, Codec, AdaptiveCodec]] = None,
+        buffer_size: int = CHUNK_SIZE
+    ) -> None:
+        if not isinstance(buffer_size, int) or buffer_size < 1:
+            raise ValueError('The buffer_size has to be a positive number')
+        self.writer = writer
+        self.scheme = scheme
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+
+    async def write(self, version: int, timestamp: int, uuid_: UUID, payload: Dict[str, PTypes]) -> None:
+        """ Translate an event into bytes, write the buffer when it is full
+        """
+        if isinstance(self.scheme, (Codec, AdaptiveCodec)):
+            self.scheme.serialize_into(self._buffer, version, timestamp, uuid_, payload)
+        else:
+            serialize_into(self._buffer, version, timestamp, uuid_, payload, self.scheme)
+        if len(self._buffer) >= self.buffer_size:
+            await self.drain()
+
+    async def drain(self) -> None:
+        """ Write the buffer and wait until the stream can take more data
+        """
+        if self._buffer:
+            # the transport may keep a view of the written data, so it gets the buffer itself
+            data, self._buffer = self._buffer, bytearray()
+            self.writer.write(data)
+        await self.writer.drain()
+
+    async def close(self) -> None:
+        """ Write the buffer and close the stream
+        """
+        try:
+            await self.drain()
+        finally:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+    async def __aenter__(self) -> 'AsyncEventWriter':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def __repr__(self):
+        return f'{type(self).__name__}(buffer_size={self.buffer_size})'
@@ -0,0 +1,110 @@
+from typing import Iterable, Iterator, Optional, Tuple, Dict, Union
+from uuid import UUID
+from array import array
+from struct import Struct
+from .datatypes import PTypes
+from .serialization import serialize_into, serialized_size
+from .codec import Codec
+from .adaptive import AdaptiveCodec
+
+Event = Tuple[int, int, UUID, Dict[str, PTypes]]
+
+# Hercules Gate batch: the event count (Integer) followed by the concatenated events
+BATCH_COUNT = Struct('>i')
+
+
+def serialize_many(
+    events: Iterable[Event],
+    scheme: Optional[Union[dict, Codec, AdaptiveCodec]] = None,
+    count_prefix: bool = False,
+    out: Optional[bytearray] = None
+) -> Tuple[bytearray, array]:
+    """ Translate events into one buffer of the concatenated events
+
+        Returns the buffer and the offsets of the events in it, the last offset
+        is the end of the last event, so the i-th event is out[offsets[i]:offsets[i + 1]].
+        With count_prefix the events are preceded by their count (the Hercules Gate batch).
+        The events are appended to the out buffer when it is passed.
+    """
+    if out is None:
+        out = bytearray()
+    batch_start = len(out)
+    if count_prefix:
+        out += BATCH_COUNT.pack(0)
+
+    offsets = array('q', [len(out)])
+    try:
+        if isinstance(scheme, (Codec, AdaptiveCodec)):
+            serialize_into_ = scheme.serialize_into
+            for version, timestamp, uuid_, payload in events:
+                serialize_into_(out, version, timestamp, uuid_, payload)
+                offsets.append(len(out))
+        else:
+            for version, timestamp, uuid_, payload in events:
+                serialize_into(out, version, timestamp, uuid_, payload, scheme)
+                offsets.append(len(out))
+    except Exception:
+        del out[batch_start:]
+        raise
+
+    if count_prefix:
+        BATCH_COUNT.pack_into(out, batch_start, len(offsets) - 1)
+    return out, offsets
+
+
+def split_batches(
+    events: Iterable[Event],
+    max_size: int,
+    scheme: Optional[Union[dict, Codec, AdaptiveCodec]] = None,
+    count_prefix: bool = True,
+    max_events: Optional[int] = None
+) -> Iterator[Tuple[bytearray, array]]:
+    """ Translate a stream of events into batches of at most max_size bytes (with the count prefix)
+
+        Yields the buffers and the offsets of the batches as serialize_many returns them,
+        a batch has up to max_events events. The size of every event is computed by serialized_size
+        before it is translated, so an event starts a new batch instead of being translated twice.
+        The events of a codec scheme (which may have native values) are translated
+        and moved to a new batch when they do not fit. An event longer than max_size raises ValueError.
+    """
+    if not isinstance(max_size, int) or max_size < 1:
+        raise ValueError('The max_size has to be a positive number')
+    if max_events is not None and (not isinstance(max_events, int) or max_events < 1):
+        raise ValueError('The max_events has to be a positive number')
+    head = BATCH_COUNT.size if count_prefix else 0
+    codec = scheme if isinstance(scheme, (Codec, AdaptiveCodec)) else None
+
+    def new_batch() -> Tuple[bytearray, array]:
+        out = bytearray(BATCH_COUNT.pack(0) if count_prefix else b'')
+        return out, array('q', [len(out)])
+
+    def finish(out: bytearray, offsets: array) -> Tuple[bytearray, array]:
+        if count_prefix:
+            BATCH_COUNT.pack_into(out, 0, len(offsets) - 1)
+        return out, offsets
+
+    out, offsets = new_batch()
+    for index, (version, timestamp, uuid_, payload) in enumerate(events):
+        if codec is not None:
+            start = len(out)
+            codec.serialize_into(out, version, timestamp, uuid_, payload)
+            size = len(out) - start
+            if size + head > max_size:
+                raise ValueError(f'The event {index} is longer than {max_size - head} bytes')
+            if len(out) > max_size or len(offsets) - 1 == max_events:
+                event = out[start:]
+                del out[start:]
+                yield finish(out, offsets)
+                out, offsets = new_batch()
+                out += event
+        else:
+            size = serialized_size(version, timestamp, uuid_, payload)
+            if size + head > max_size:
+                raise ValueError(f'The event {index} is longer than {max_size - head} bytes')
+            if len(out) + size > max_size or len(offsets) - 1 == max_events:
+                yield finish(out, offsets)
+                out, offsets = new_batch()
+            serialize_into(out, version, timestamp, uuid_, payload, scheme)  # type: ignore
+        offsets.append(len(out))
+    if len(offsets) > 1:
+        yield finish(out, offsets)
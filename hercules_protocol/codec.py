@@ -0,0 +1,604 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+from ctypes import c_char_p, c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double
+from uuid import UUID
+from struct import Struct, pack, unpack_from, error as StructError
+from hercules_protocol.scheme import (
+    Key,
+    Byte,
+    Short,
+    Integer,
+    Long,
+    Flag,
+    Float,
+    Double,
+    String,
+    Guid,
+    Null,
+    ContainerDummy,
+    VectorDummy,
+    VectorByte,
+    VectorShort,
+    VectorInteger,
+    VectorLong,
+    VectorFlag,
+    VectorFloat,
+    VectorDouble,
+    VectorString,
+    VectorGuid,
+    VectorNull,
+    SchemeValues,
+)
+from .datatypes import (
+    PTypes,
+    Vector,
+    ArrayVector,
+    is_ndarray,
+    ndarray_to_bytes,
+    check_version,
+    check_timestamp,
+)
+from .interning import StringInterner
+from .serialization import (
+    HTypes,
+    HTypeSize,
+    _get_p_type,
+)
+
+Encoder = Callable[[Any, bytearray], None]
+Decoder = Callable[[bytes, int], Tuple[int, Any]]
+
+#  Scheme           Hercules           Format   Python
+_FIXED: Dict[Type[SchemeValues], Tuple[HTypes, str, type]] = {
+    Byte: (HTypes.BYTE, 'B', c_uint8),
+    Short: (HTypes.SHORT, 'h', c_int16),
+    Integer: (HTypes.INTEGER, 'i', c_int32),
+    Long: (HTypes.LONG, 'q', c_int64),
+    Flag: (HTypes.FLAG, '?', c_bool),
+    Float: (HTypes.FLOAT, 'f', c_float),
+    Double: (HTypes.DOUBLE, 'd', c_double),
+}
+
+_FIXED_VECTORS: Dict[Type[SchemeValues], Tuple[HTypes, str, type]] = {
+    VectorByte: (HTypes.BYTE, 'B', c_uint8),
+    VectorShort: (HTypes.SHORT, 'h', c_int16),
+    VectorInteger: (HTypes.INTEGER, 'i', c_int32),
+    VectorLong: (HTypes.LONG, 'q', c_int64),
+    VectorFlag: (HTypes.FLAG, '?', c_bool),
+    VectorFloat: (HTypes.FLOAT, 'f', c_float),
+    VectorDouble: (HTypes.DOUBLE, 'd', c_double),
+}
+
+_H_TYPES: Dict[type, HTypes] = {
+    dict: HTypes.CONTAINER,
+    c_uint8: HTypes.BYTE,
+    c_int16: HTypes.SHORT,
+    c_int32: HTypes.INTEGER,
+    c_int64: HTypes.LONG,
+    c_bool: HTypes.FLAG,
+    c_float: HTypes.FLOAT,
+    c_double: HTypes.DOUBLE,
+    c_char_p: HTypes.STRING,
+    UUID: HTypes.GUID,
+    type(None): HTypes.NULL,
+    Vector: HTypes.VECTOR,
+}
+
+_HEAD = Struct('>Bq16s')
+_LENGTH = Struct('>I')
+_TAG_COUNT = Struct('>h')
+_EMPTY_LENGTH = _LENGTH.pack(0)
+
+
+def _type_byte(h_type: int) -> bytes:
+    return h_type.to_bytes(1, byteorder='big')
+
+
+def _compile_fixed(verify: Callable[[Any], None], format_: str, object_: type) -> Tuple[Encoder, Decoder]:
+    struct_ = Struct('>' + format_)
+    pack_, unpack_from_, size = struct_.pack, struct_.unpack_from, struct_.size
+
+    def encode(value: Any, out: bytearray) -> None:
+        if type(value) is not object_:
+            verify(value)
+        out += pack_(value.value)
+
+    def decode(data: bytes, start: int) -> Tuple[int, Any]:
+        return start + size, object_(unpack_from_(data, start)[0])
+
+    return encode, decode
+
+
+def _compile_fixed_native(format_: str) -> Tuple[Encoder, Decoder]:
+    struct_ = Struct('>' + format_)
+    pack_, unpack_from_, size = struct_.pack, struct_.unpack_from, struct_.size
+
+    def encode(value: Any, out: bytearray) -> None:
+        out += pack_(value)
+
+    def decode(data: bytes, start: int) -> Tuple[int, Any]:
+        return start + size, unpack_from_(data, start)[0]
+
+    return encode, decode
+
+
+def _encode_string(value: Any, out: bytearray) -> None:
+    if type(value) is not c_char_p:
+        String.verify(value)
+    string = value.value
+    if string:
+        out += _LENGTH.pack(len(string))
+        out += string
+    else:
+        out += _EMPTY_LENGTH
+
+
+def _decode_string(data: bytes, start: int) -> Tuple[int, c_char_p]:
+    length, = _LENGTH.unpack_from(data, start)
+    start += 4
+    return start + length, c_char_p(unpack_from(f'>{length}s', data, start)[0])
+
+
+def _encode_string_native(value: Any, out: bytearray) -> None:
+    if type(value) is str:
+        value = value.encode()
+    elif not isinstance(value, bytes):
+        raise TypeError(f'The {value!r} is not bytes')
+    out += _LENGTH.pack(len(value))
+    out += value
+
+
+def _decode_string_native(data: bytes, start: int) -> Tuple[int, bytes]:
+    length, = _LENGTH.unpack_from(data, start)
+    start += 4
+    return start + length, unpack_from(f'>{length}s', data, start)[0]
+
+
+def _compile_interned_string(native: bool, interner: StringInterner) -> Decoder:
+    intern = interner.intern
+    max_length = interner.max_length
+
+    def decode(data: bytes, start: int) -> Tuple[int, Any]:
+        length, = _LENGTH.unpack_from(data, start)
+        start += 4
+        value = unpack_from(f'>{length}s', data, start)[0]
+        if length <= max_length:
+            value = intern(value)
+        return start + length, value if native else c_char_p(value)
+
+    return decode
+
+
+def _encode_guid(value: Any, out: bytearray) -> None:
+    if type(value) is not UUID:
+        Guid.verify(value)
+    out += value.bytes
+
+
+def _decode_guid(data: bytes, start: int) -> Tuple[int, UUID]:
+    return start + HTypeSize.GUID, UUID(bytes=unpack_from('>16s', data, start)[0])
+
+
+def _encode_null(value: Any, out: bytearray) -> None:
+    if value is not None:
+        Null.verify(value)
+
+
+def _decode_null(data: bytes, start: int) -> Tuple[int, None]:
+    return start, None
+
+
+def _compile_fixed_vector(verify: Callable[[Any], None], h_type: HTypes, format_: str,
+                          object_: type) -> Tuple[Encoder, Decoder]:
+    head = _type_byte(h_type)
+    size = Struct('>' + format_).size
+
+    def encode(value: Any, out: bytearray) -> None:
+        verify(value)
+        out += head
+        if isinstance(value, ArrayVector):
+            out += _LENGTH.pack(len(value))
+            out += value.to_bytes()
+        elif is_ndarray(value):
+            out += _LENGTH.pack(len(value))
+            out += ndarray_to_bytes(value, object_)
+        else:
+            out += pack(f'>I{len(value)}{format_}', len(value), *[e.value for e in value])
+
+    def decode(data: bytes, start: int) -> Tuple[int, Vector]:
+        if data[start] != h_type:
+            raise ValueError(f'The {data[start]} is not {h_type!r}')
+        length, = _LENGTH.unpack_from(data, start + 1)
+        start += 5
+        result = Vector([], object_)
+        result.extend(map(object_, unpack_from(f'>{length}{format_}', data, start)))
+        return start + length * size, result
+
+    return encode, decode
+
+
+def _compile_fixed_vector_native(h_type: HTypes, format_: str, object_: type) -> Tuple[Encoder, Decoder]:
+    head = _type_byte(h_type)
+    size = Struct('>' + format_).size
+
+    def encode(value: Any, out: bytearray) -> None:
+        out += head
+        if isinstance(value, ArrayVector):
+            out += _LENGTH.pack(len(value))
+            out += value.to_bytes()
+        elif is_ndarray(value):
+            out += _LENGTH.pack(len(value))
+            out += ndarray_to_bytes(value, object_)
+        else:
+            out += pack(f'>I{len(value)}{format_}', len(value), *value)
+
+    def decode(data: bytes, start: int) -> Tuple[int, list]:
+        if data[start] != h_type:
+            raise ValueError(f'The {data[start]} is not {h_type!r}')
+        length, = _LENGTH.unpack_from(data, start + 1)
+        start += 5
+        return start + length * size, list(unpack_from(f'>{length}{format_}', data, start))
+
+    return encode, decode
+
+
+def _compile_vector_of(verify: Optional[Callable[[Any], None]], h_type: HTypes, object_: Optional[type],
+                       encode_element: Encoder, decode_element: Decoder) -> Tuple[Encoder, Decoder]:
+    head = _type_byte(h_type)
+
+    def encode(value: Any, out: bytearray) -> None:
+        if verify:
+            verify(value)
+        out += head
+        out += _LENGTH.pack(len(value))
+        for element in value:
+            encode_element(element, out)
+
+    def decode(data: bytes, start: int) -> Tuple[int, list]:
+        if data[start] != h_type:
+            raise ValueError(f'The {data[start]} is not {h_type!r}')
+        length, = _LENGTH.unpack_from(data, start + 1)
+        start += 5
+        result = Vector([], object_) if object_ else []
+        element: Any
+        for _ in range(length):
+            start, element = decode_element(data, start)
+            result.append(element)
+        return start, result
+
+    return encode, decode
+
+
+def _encode_vector_dummy(value: Any, out: bytearray) -> None:
+    VectorDummy.verify(value)
+    if len(value):
+        raise ValueError('The payload list and the scheme list have to have the same length')
+    out += _type_byte(_H_TYPES[value.type_])
+    out += _EMPTY_LENGTH
+
+
+def _decode_vector_dummy(data: bytes, start: int) -> Tuple[int, Vector]:
+    h_type = data[start]
+    length, = _LENGTH.unpack_from(data, start + 1)
+    if length:
+        raise ValueError('The payload list and the scheme list have to have the same length')
+    return start + 5, Vector([], _get_p_type(h_type))
+
+
+def _encode_vector_dummy_native(value: Any, out: bytearray) -> None:
+    if len(value):
+        raise ValueError('The payload list and the scheme list have to have the same length')
+    out += _type_byte(_H_TYPES[value.type_] if isinstance(value, Vector) else HTypes.CONTAINER)
+    out += _EMPTY_LENGTH
+
+
+def _decode_vector_dummy_native(data: bytes, start: int) -> Tuple[int, Vector]:
+    # the empty Vector keeps the element type, so the event is encoded to the same bytes again
+    return _decode_vector_dummy(data, start)
+
+
+def _compile_list(scheme: list, native: bool, interner: Optional[StringInterner]) -> Tuple[Encoder, Decoder]:
+    if not scheme:
+        raise ValueError("The scheme list mustn't be empty")
+
+    compiled = [_compile(element, native, interner) for element in scheme]
+    encoders = [encode for _, encode, _ in compiled]
+    decoders = [decode for _, _, decode in compiled]
+    h_type = compiled[0][0]
+    if any(e[0] != h_type for e in compiled):
+        raise ValueError('The scheme list has to have same type elements')
+    object_ = dict if h_type == HTypes.CONTAINER else Vector
+    head = _type_byte(h_type) + _LENGTH.pack(len(scheme))
+
+    def encode(value: Any, out: bytearray) -> None:
+        if not native and (not isinstance(value, Vector) or value.type_ is not object_):
+            raise TypeError(f'The {value} is not Vector of {object_.__name__}')
+        if len(value) != len(encoders):
+            raise ValueError('The payload list and the scheme list have to have the same length')
+        out += head
+        for encode_element, element in zip(encoders, value):
+            encode_element(element, out)
+
+    def decode(data: bytes, start: int) -> Tuple[int, list]:
+        stop = start + 5
+        if data[start:stop] != head:
+            raise ValueError('The slice of data has to be equal {!r}'.format(head))
+        start = stop
+        result = [] if native else Vector([], object_)
+        element: Any
+        for decode_element in decoders:
+            start, element = decode_element(data, start)
+            result.append(element)
+        return start, result
+
+    return encode, decode
+
+
+def _compile_dict(scheme: dict, native: bool, interner: Optional[StringInterner]) -> Tuple[Encoder, Decoder]:
+    """ Compile a container body: the tag count and the tags.
+
+        Adjacent fixed-width tags are merged into one struct, in which
+        the key and the type byte of each tag are the constant "s" fields.
+    """
+    for key in scheme:
+        if not isinstance(key, Key):
+            raise TypeError(f'The {key!r} is not Key')
+
+    keys = tuple(key.str_ for key in scheme)
+    count = _TAG_COUNT.pack(len(scheme))
+    encode_steps: List[Callable[[tuple, bytearray], None]] = []
+    decode_steps: List[Callable[[bytes, int, dict], int]] = []
+
+    def add_run(run: List[Tuple[int, Key, HTypes, str, type]]) -> None:
+        struct_ = Struct('>' + ''.join(
+            f'{len(key.bytes_) + 1}s{format_}' for _, key, _, format_, _ in run
+        ))
+        pack_, unpack_from_, size = struct_.pack, struct_.unpack_from, struct_.size
+        prefixes = tuple(key.bytes_ + _type_byte(h_type) for _, key, h_type, _, _ in run)
+        indexes = tuple(index for index, _, _, _, _ in run)
+        objects = tuple(object_ for _, _, _, _, object_ in run)
+        verifies = tuple(_FIXED_VERIFY[object_] for object_ in objects)
+        run_keys = tuple(key.str_ for _, key, _, _, _ in run)
+
+        def encode_run(values: tuple, out: bytearray) -> None:
+            args: List[Any] = []
+            for prefix, index, object_, verify in zip(prefixes, indexes, objects, verifies):
+                value = values[index]
+                if type(value) is not object_:
+                    verify(value)
+                args.append(prefix)
+                args.append(value.value)
+            out += pack_(*args)
+
+        def encode_run_native(values: tuple, out: bytearray) -> None:
+            args: List[Any] = []
+            for prefix, index in zip(prefixes, indexes):
+                args.append(prefix)
+                args.append(values[index])
+            out += pack_(*args)
+
+        def decode_run(data: bytes, start: int, result: dict) -> int:
+            unpacked = unpack_from_(data, start)
+            if unpacked[0::2] != prefixes:
+                raise ValueError('The slice of data has to be equal {!r}'.format(b''.join(prefixes)))
+            for key, object_, value in zip(run_keys, objects, unpacked[1::2]):
+                result[key] = object_(value)
+            return start + size
+
+        def decode_run_native(data: bytes, start: int, result: dict) -> int:
+            unpacked = unpack_from_(data, start)
+            if unpacked[0::2] != prefixes:
+                raise ValueError('The slice of data has to be equal {!r}'.format(b''.join(prefixes)))
+            result.update(zip(run_keys, unpacked[1::2]))
+            return start + size
+
+        encode_steps.append(encode_run_native if native else encode_run)
+        decode_steps.append(decode_run_native if native else decode_run)
+
+    def add_field(index: int, key: Key, h_type: int, encode: Encoder, decode: Decoder) -> None:
+        prefix = key.bytes_ + _type_byte(h_type)
+        length = len(prefix)
+        key_ = key.str_
+
+        def encode_field(values: tuple, out: bytearray) -> None:
+            out += prefix
+            encode(values[index], out)
+
+        def decode_field(data: bytes, start: int, result: dict) -> int:
+            stop = start + length
+            if data[start:stop] != prefix:
+                raise ValueError('The slice of data has to be equal {!r}'.format(prefix))
+            stop, result[key_] = decode(data, stop)
+            return stop
+
+        encode_steps.append(encode_field)
+        decode_steps.append(decode_field)
+
+    run: List[Tuple[int, Key, HTypes, str, type]] = []
+    for index, (key, value) in enumerate(scheme.items()):
+        if isinstance(value, type) and value in _FIXED:
+            run.append((index, key, *_FIXED[value]))
+            continue
+        if run:
+            add_run(run)
+            run = []
+        add_field(index, key, *_compile(value, native, interner))
+    if run:
+        add_run(run)
+
+    def encode(value: Any, out: bytearray) -> None:
+        if not isinstance(value, dict):
+            raise TypeError(f'The {value} is not dict')
+        if len(value) != len(keys):
+            raise ValueError('The payload container and the scheme container have to have the same length')
+        if tuple(value) != keys:
+            for key, key_ in zip(value, keys):
+                if key != key_:
+                    raise ValueError('The key has to be equal {!r}'.format(key_))
+        values = tuple(value.values())
+        out += count
+        for step in encode_steps:
+            step(values, out)
+
+    def decode(data: bytes, start: int) -> Tuple[int, dict]:
+        stop = start + 2
+        if data[start:stop] != count:
+            raise ValueError('The payload container and the scheme container have to have the same length')
+        start = stop
+        result: Dict[str, Any] = {}
+        for step in decode_steps:
+            start = step(data, start, result)
+        return start, result
+
+    return encode, decode
+
+
+_FIXED_VERIFY: Dict[type, Callable[[Any], None]] = {
+    object_: scheme_value.verify for scheme_value, (_, _, object_) in _FIXED.items()
+}
+
+_SIMPLE: Dict[type, Tuple[HTypes, Encoder, Decoder]] = {
+    String: (HTypes.STRING, _encode_string, _decode_string),
+    Guid: (HTypes.GUID, _encode_guid, _decode_guid),
+    Null: (HTypes.NULL, _encode_null, _decode_null),
+    VectorDummy: (HTypes.VECTOR, _encode_vector_dummy, _decode_vector_dummy),
+    VectorString: (HTypes.VECTOR, *_compile_vector_of(
+        VectorString.verify, HTypes.STRING, c_char_p, _encode_string, _decode_string
+    )),
+    VectorGuid: (HTypes.VECTOR, *_compile_vector_of(
+        VectorGuid.verify, HTypes.GUID, UUID, _encode_guid, _decode_guid
+    )),
+    VectorNull: (HTypes.VECTOR, *_compile_vector_of(
+        VectorNull.verify, HTypes.NULL, type(None), _encode_null, _decode_null
+    )),
+}
+_SIMPLE.update({
+    scheme_value: (HTypes.VECTOR, *_compile_fixed_vector(scheme_value.verify, h_type, format_, object_))
+    for scheme_value, (h_type, format_, object_) in _FIXED_VECTORS.items()
+})
+_SIMPLE.update({
+    scheme_value: (h_type, *_compile_fixed(scheme_value.verify, format_, object_))
+    for scheme_value, (h_type, format_, object_) in _FIXED.items()
+})
+
+_SIMPLE_NATIVE: Dict[type, Tuple[HTypes, Encoder, Decoder]] = {
+    String: (HTypes.STRING, _encode_string_native, _decode_string_native),
+    Guid: (HTypes.GUID, _encode_guid, _decode_guid),
+    Null: (HTypes.NULL, _encode_null, _decode_null),
+    VectorDummy: (HTypes.VECTOR, _encode_vector_dummy_native, _decode_vector_dummy_native),
+    VectorString: (HTypes.VECTOR, *_compile_vector_of(
+        None, HTypes.STRING, None, _encode_string_native, _decode_string_native
+    )),
+    VectorGuid: (HTypes.VECTOR, *_compile_vector_of(None, HTypes.GUID, None, _encode_guid, _decode_guid)),
+    VectorNull: (HTypes.VECTOR, *_compile_vector_of(None, HTypes.NULL, None, _encode_null, _decode_null)),
+}
+_SIMPLE_NATIVE.update({
+    scheme_value: (HTypes.VECTOR, *_compile_fixed_vector_native(h_type, format_, object_))
+    for scheme_value, (h_type, format_, object_) in _FIXED_VECTORS.items()
+})
+_SIMPLE_NATIVE.update({
+    scheme_value: (h_type, *_compile_fixed_native(format_))
+    for scheme_value, (h_type, format_, _) in _FIXED.items()
+})
+
+
+def _compile(
+    scheme: Union[type, dict, list], native: bool, interner: Optional[StringInterner]
+) -> Tuple[HTypes, Encoder, Decoder]:
+    simple = _SIMPLE_NATIVE if native else _SIMPLE
+    if isinstance(scheme, dict):
+        return (HTypes.CONTAINER, *_compile_dict(scheme, native, interner))
+    elif isinstance(scheme, list):
+        return (HTypes.VECTOR, *_compile_list(scheme, native, interner))
+    elif scheme is ContainerDummy:
+        return (HTypes.CONTAINER, *_compile_dict({}, native, interner))
+    elif interner is not None and scheme is String:
+        encode = _encode_string_native if native else _encode_string
+        return HTypes.STRING, encode, _compile_interned_string(native, interner)
+    elif interner is not None and scheme is VectorString:
+        encode = _encode_string_native if native else _encode_string
+        return (HTypes.VECTOR, *_compile_vector_of(
+            None if native else VectorString.verify, HTypes.STRING, None if native else c_char_p,
+            encode, _compile_interned_string(native, interner)
+        ))
+    elif isinstance(scheme, type) and scheme in simple:
+        return simple[scheme]  # type: ignore
+    else:
+        raise TypeError(f'The {scheme!r} is not a scheme value')
+
+
+class Codec:
+    """ The scheme compiled into an encoder and a decoder of events of its shape.
+
+        The scheme is walked once, when the codec is made, so the key bytes,
+        the struct formats and the dispatch of every tag are ready for each event.
+        The native codec translates plain int, float, bool, bytes, UUID, None,
+        list and dict values instead of ctypes objects and Vector, except the empty vectors
+        of VectorDummy, which are decoded into an empty Vector of their element type.
+        The repeated short strings are decoded into shared objects of the interner.
+    """
+
+    def __init__(self, scheme: dict, native: bool = False, interner: Optional[StringInterner] = None) -> None:
+        if not isinstance(scheme, dict):
+            raise TypeError('The scheme has to be a dict')
+        self.scheme = scheme
+        self.native = native
+        self.interner = interner
+        self._encode, self._decode = _compile_dict(scheme, native, interner)
+
+    def serialize_into(
+        self, out: bytearray, version: int, timestamp: int, uuid_: UUID, payload: Dict[str, PTypes]
+    ) -> None:
+        """ Translate a data structure into bytes appended to the buffer,
+            the buffer is left as it was if the data structure can't be translated
+        """
+        check_version(version)
+        check_timestamp(timestamp)
+        if not isinstance(payload, dict):
+            raise ValueError('The payload has to be a dict')
+
+        start = len(out)
+        try:
+            out += _HEAD.pack(version, timestamp, uuid_.bytes)
+            self._encode(payload, out)
+        except StructError as err:
+            del out[start:]
+            raise ValueError(f'The payload does not match the scheme: {err}') from err
+        except Exception:
+            del out[start:]
+            raise
+
+    def serialize(self, version: int, timestamp: int, uuid_: UUID, payload: Dict[str, PTypes]) -> bytes:
+        """ Translate a data structure into bytes
+        """
+        out = bytearray()
+        self.serialize_into(out, version, timestamp, uuid_, payload)
+        return bytes(out)
+
+    def deserialize_from(self, data: bytes, start: int = 0) -> Tuple[int, Tuple[int, int, UUID, Dict[str, PTypes]]]:
+        """ Translate bytes from the start offset into a data structure,
+            return the offset of the end of the event and the data structure
+        """
+        version, timestamp, uuid_bytes = _HEAD.unpack_from(data, start)
+        check_version(version)
+        check_timestamp(timestamp)
+
+        start, payload = self._decode(data, start + _HEAD.size)
+        return start, (version, timestamp, UUID(bytes=uuid_bytes), payload)
+
+    def deserialize(self, data: bytes) -> Tuple[int, int, UUID, Dict[str, PTypes]]:
+        """ Translate bytes into a data structure
+        """
+        return self.deserialize_from(data)[1]
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.scheme!r}, native={self.native})'
+
+
+def compile_scheme(
+    scheme: Dict[Key, Union[Type[Any], dict, list]],
+    native: bool = False,
+    interner: Optional[StringInterner] = None
+) -> Codec:
+    """ Make a reusable codec of the scheme
+    """
+    return Codec(scheme, native, interner)
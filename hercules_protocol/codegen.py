@@ -0,0 +1,507 @@
+import io
+from typing import Any, Dict, List, Optional, Tuple, Union
+from struct import Struct
+from tokenize import generate_tokens, NAME
+from ctypes import c_char_p, c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double
+from uuid import UUID
+from hercules_protocol.scheme import (
+    Key,
+    String,
+    Guid,
+    Null,
+    ContainerDummy,
+    VectorDummy,
+    VectorString,
+    VectorGuid,
+    VectorNull,
+)
+from .serialization import HTypes, Vector, _get_p_type
+from .codec import _FIXED, _FIXED_VECTORS
+
+_HEADER = '''""" The codec of the scheme generated by python3 -m hercules_protocol.scheme.make -c
+
+    encode(version, timestamp, uuid_, payload) translates a data structure into bytes,
+    encode_into(out, ...) appends them to a bytearray, decode(buf, offset=0) translates
+    bytes from the offset into a data structure and returns the offset of its end too.
+    The keys, the lengths of the containers and of the lists of the scheme are verified,
+    the types of the values are not.
+"""
+'''
+
+# the names of the aliases of ctypes (c_int64.__name__ is c_long)
+_CTYPE_NAMES: Dict[type, str] = {
+    c_uint8: 'c_uint8',
+    c_int16: 'c_int16',
+    c_int32: 'c_int32',
+    c_int64: 'c_int64',
+    c_bool: 'c_bool',
+    c_float: 'c_float',
+    c_double: 'c_double',
+}
+
+# the constant fields and the values of a run of adjacent fixed-width fields
+Field = Tuple[str, Union[bytes, str]]
+
+# the items of the wrapped lines: the code or the literal and the code after it
+Item = Union[str, Tuple[Union[bytes, str], str]]
+
+# the generated modules pass flake8 --max-line-length 119
+_MAX_LINE = 119
+
+
+def _split_literal(value: Union[bytes, str], width: int) -> List[str]:
+    """ The reprs of the consecutive parts of the value, each of them is not longer than the width
+    """
+    parts = []
+    start = 0
+    while start < len(value):
+        stop = start + 1
+        while stop < len(value) and len(repr(value[start:stop + 1])) <= width:
+            stop += 1
+        parts.append(repr(value[start:stop]))
+        start = stop
+    return parts or [repr(value)]
+
+
+def _wrap(
+    indent: str, head: str, items: List[Item], tail: str, hang: str = '    ', comma: bool = True, force: bool = False
+) -> List[str]:
+    """ The line of the items between the head and the tail or, if it is too long, the lines of the items
+    """
+    rendered = [item if isinstance(item, str) else repr(item[0]) + item[1] for item in items]
+    line = indent + head + ', '.join(rendered) + tail
+    if len(line) <= _MAX_LINE and not force:
+        return [line]
+    lines = [indent + head]
+    inner = indent + hang
+    for item in items:
+        if isinstance(item, str):
+            lines.append(inner + item)
+        else:
+            literal, code = item
+            lines.extend(inner + part for part in _split_literal(literal, _MAX_LINE - len(inner + code) - 1))
+            lines[-1] += code
+        if comma:
+            lines[-1] += ','
+    lines.append(indent + tail)
+    return lines
+
+
+def _vector_dummy_source(native: bool) -> List[str]:
+    """ The functions of the empty vectors of any element type
+    """
+    names = {
+        **_CTYPE_NAMES, dict: 'dict', c_char_p: 'c_char_p', UUID: 'UUID', type(None): 'type(None)', Vector: 'Vector'
+    }
+    code = ["_DUMMY = Struct('>BI')", '_ELEMENT_TYPES = {']
+    code.extend(f'    {h_type.value}: {names[_get_p_type(h_type)]},' for h_type in HTypes)
+    code.append('}')
+    code.append('_H_TYPES = {type_: h_type for h_type, type_ in _ELEMENT_TYPES.items()}')
+    code.append('')
+    code.append('')
+    code.append('def encode_vector_dummy(value, out):')
+    if native:
+        code.append(f'    h_type = _H_TYPES[value.type_] if isinstance(value, Vector) else {HTypes.CONTAINER.value}')
+    else:
+        code.append('    if not isinstance(value, Vector):')
+        code.append("        raise TypeError('The %s is not Vector' % (value,))")
+        code.append('    h_type = _H_TYPES[value.type_]')
+    code.append('    if len(value):')
+    code.append("        raise ValueError('The payload list and the scheme list have to have the same length')")
+    code.append('    out += _DUMMY.pack(h_type, 0)')
+    code.append('')
+    code.append('')
+    code.append('def decode_vector_dummy(buf, o):')
+    code.append('    h_type, n = _DUMMY.unpack_from(buf, o)')
+    code.append('    if h_type not in _ELEMENT_TYPES:')
+    code.append("        raise ValueError('Incorrect data type %d' % h_type)")
+    code.append('    if n:')
+    code.append("        raise ValueError('The payload list and the scheme list have to have the same length')")
+    code.append('    return o + 5, Vector([], _ELEMENT_TYPES[h_type])')
+    return code
+
+
+class _Generator:
+
+    def __init__(self, native: bool, structs: Dict[str, str], indent: str) -> None:
+        self.native = native
+        self.structs = structs
+        self.lines: List[str] = []
+        self.indent = indent
+        self.run: List[Field] = []
+        # the statements, which use the values of the run, emitted after it is unpacked
+        self.pending: List[str] = []
+        self.count = 0
+
+    def name(self, prefix: str) -> str:
+        self.count += 1
+        return f'{prefix}{self.count}'
+
+    def emit(self, line: str) -> None:
+        self.lines.append(self.indent + line)
+
+    def struct(self, format_: str) -> str:
+        if format_ not in self.structs:
+            self.structs[format_] = f'_S{len(self.structs)}'
+        return self.structs[format_]
+
+    def add_const(self, value: bytes) -> None:
+        if self.run and isinstance(self.run[-1][1], bytes):
+            self.run[-1] = ('', self.run[-1][1] + value)
+        else:
+            self.run.append(('', value))
+
+    def add(self, format_: str, value: str) -> None:
+        self.run.append((format_, value))
+
+    @staticmethod
+    def format_of(run: List[Field]) -> str:
+        return '>' + ''.join(f'{len(value)}s' if isinstance(value, bytes) else format_ for format_, value in run)
+
+
+class _Encoder(_Generator):
+    """ Emit the statements, which append the value of an expression of a scheme shape to out
+    """
+
+    def __init__(self, native: bool, structs: Dict[str, str], indent: str) -> None:
+        super().__init__(native, structs, indent)
+        # the names of the tuples of the keys of the containers
+        self.keys: Dict[Tuple[str, ...], str] = {}
+
+    def flush(self) -> None:
+        run, self.run = self.run, []
+        if not run:
+            return
+        if len(run) == 1 and isinstance(run[0][1], bytes):
+            line = f'out += {run[0][1]!r}'
+            if len(self.indent + line) <= _MAX_LINE:
+                self.emit(line)
+            else:
+                self.lines.extend(_wrap(self.indent, 'out += (', [(run[0][1], '')], ')', comma=False, force=True))
+            return
+        args: List[Item] = [(value, '') if isinstance(value, bytes) else value for _, value in run]
+        self.lines.extend(_wrap(self.indent, f'out += {self.struct(self.format_of(run))}.pack(', args, ')'))
+
+    def value(self, expr: str) -> str:
+        return expr if self.native else f'{expr}.value'
+
+    def container(self, expr: str, scheme: dict) -> None:
+        keys = tuple(key.str_ for key in scheme)
+        if keys not in self.keys:
+            self.keys[keys] = f'_K{len(self.keys)}'
+        self.emit(f'if tuple({expr}) != {self.keys[keys]}:')
+        self.emit(f"    raise ValueError('The keys of the container have to be %r' % ({self.keys[keys]},))")
+        names = [self.name('v') for _ in scheme]
+        if len(names) == 1:
+            self.emit(f'{names[0]}, = {expr}.values()')
+        elif names:
+            line = f"{', '.join(names)} = {expr}.values()"
+            if len(self.indent + line) <= _MAX_LINE:
+                self.emit(line)
+            else:
+                self.lines.extend(_wrap(self.indent, '(', list(names), f') = {expr}.values()', force=True))
+        self.add_const(Struct('>h').pack(len(scheme)))
+        for name, (key, value) in zip(names, scheme.items()):
+            self.add_const(key.bytes_ + bytes([_h_type(value)]))
+            self.body(name, value)
+
+    def body(self, expr: str, scheme: Any) -> None:
+        """ The value without its type byte
+        """
+        if isinstance(scheme, dict):
+            self.container(expr, scheme)
+        elif isinstance(scheme, list):
+            h_type = _h_type(scheme[0])
+            self.emit(f'if len({expr}) != {len(scheme)}:')
+            self.emit("    raise ValueError('The payload list and the scheme list have to have the same length')")
+            self.add_const(Struct('>BI').pack(h_type, len(scheme)))
+            for index, element in enumerate(scheme):
+                name = self.name('e')
+                self.emit(f'{name} = {expr}[{index}]')
+                self.body(name, element)
+        elif scheme in _FIXED:
+            self.add(_FIXED[scheme][1], self.value(expr))
+        elif scheme is String:
+            name = self.name('s')
+            self.emit(f'{name} = {expr}' if self.native else f"{name} = {expr}.value or b''")
+            self.add('I', f'len({name})')
+            self.flush()
+            self.emit(f'out += {name}')
+        elif scheme is Guid:
+            self.add('16s', f'{expr}.bytes')
+        elif scheme is Null:
+            pass
+        elif scheme is ContainerDummy:
+            self.emit(f'if len({expr}):')
+            self.emit("    raise ValueError('The payload container has to be empty')")
+            self.add_const(b'\x00\x00')
+        elif scheme is VectorDummy:
+            self.flush()
+            self.emit(f'encode_vector_dummy({expr}, out)')
+        elif scheme in _FIXED_VECTORS:
+            h_type, format_, _ = _FIXED_VECTORS[scheme]
+            elements = expr if self.native else f'[e.value for e in {expr}]'
+            self.add_const(bytes([h_type]))
+            self.add('I', f'len({expr})')
+            self.flush()
+            self.emit(f"out += pack('>%d{format_}' % len({expr}), *{elements})")
+        elif scheme is VectorString:
+            self.add_const(bytes([HTypes.STRING]))
+            self.add('I', f'len({expr})')
+            self.flush()
+            self.emit(f'for e in {expr}:')
+            self.emit('    s = e' if self.native else "    s = e.value or b''")
+            self.emit('    out += _LENGTH.pack(len(s))')
+            self.emit('    out += s')
+        elif scheme is VectorGuid:
+            self.add_const(bytes([HTypes.GUID]))
+            self.add('I', f'len({expr})')
+            self.flush()
+            self.emit(f'for e in {expr}:')
+            self.emit('    out += e.bytes')
+        elif scheme is VectorNull:
+            self.add_const(bytes([HTypes.NULL]))
+            self.add('I', f'len({expr})')
+        else:
+            raise TypeError(f'The {scheme!r} is not a scheme value')
+
+
+class _Decoder(_Generator):
+    """ Emit the statements, which decode a value of a scheme shape from buf at the offset o into a variable
+    """
+
+    def flush(self) -> None:
+        run, self.run = self.run, []
+        pending, self.pending = self.pending, []
+        if not run:
+            self.lines.extend(pending)
+            return
+        struct_ = self.struct(self.format_of(run))
+        consts = [(index, value) for index, (_, value) in enumerate(run) if isinstance(value, bytes)]
+        values = [(index, value) for index, (_, value) in enumerate(run) if not isinstance(value, bytes)]
+        self.emit(f't = {struct_}.unpack_from(buf, o)')
+        if consts:
+            fields = [f't[{index}]' for index, _ in consts]
+            expected = [repr(value) for _, value in consts]
+            if len(consts) == 1:
+                line = f'if {fields[0]} != {expected[0]}:'
+            else:
+                line = f"if ({', '.join(fields)}) != ({', '.join(expected)}):"
+            if len(self.indent + line) <= _MAX_LINE:
+                self.emit(line)
+            else:
+                # the hanging indent of the condition differs from the one of the body
+                self.lines.extend(_wrap(self.indent, 'if (', list(fields), '', ' ' * 8, force=True)[:-1])
+                literals: List[Item] = [(value, '') for _, value in consts]
+                self.lines.extend(_wrap(self.indent, ') != (', literals, '):', ' ' * 8, force=True))
+            self.emit("    raise ValueError('The data does not match the scheme after the offset %d' % o)")
+        for index, target in values:
+            self.emit(target.format(f't[{index}]'))  # type: ignore
+        self.emit(f'o += {Struct(self.format_of(run)).size}')
+        self.lines.extend(pending)
+
+    def wrap(self, object_: str, expr: str) -> str:
+        return expr if self.native else f'{object_}({expr})'
+
+    def container(self, target: str, scheme: dict) -> None:
+        self.add_const(Struct('>h').pack(len(scheme)))
+        names = []
+        for key, value in scheme.items():
+            self.add_const(key.bytes_ + bytes([_h_type(value)]))
+            name = self.name('v')
+            self.body(name, value)
+            names.append((key.str_, name))
+        self.pending.extend(_wrap(self.indent, f'{target} = {{', [(key, f': {name}') for key, name in names], '}'))
+
+    def body(self, target: str, scheme: Any) -> None:
+        if isinstance(scheme, dict):
+            self.container(target, scheme)
+        elif isinstance(scheme, list):
+            h_type = _h_type(scheme[0])
+            self.add_const(Struct('>BI').pack(h_type, len(scheme)))
+            names = []
+            for element in scheme:
+                name = self.name('e')
+                self.body(name, element)
+                names.append(name)
+            type_ = 'dict' if h_type == HTypes.CONTAINER else 'Vector'
+            items: List[Item] = list(names)
+            if self.native:
+                self.pending.extend(_wrap(self.indent, f'{target} = [', items, ']'))
+            else:
+                self.pending.extend(_wrap(self.indent, f'{target} = Vector([', items, f'], {type_})'))
+        elif scheme in _FIXED:
+            _, format_, object_ = _FIXED[scheme]
+            self.add(format_, f'{target} = ' + self.wrap(_CTYPE_NAMES[object_], '{}'))
+        elif scheme is String:
+            self.add('I', 'n = {}')
+            self.flush()
+            self.emit(f'{target} = ' + self.wrap('c_char_p', "unpack_from('>%ds' % n, buf, o)[0]"))
+            self.emit('o += n')
+        elif scheme is Guid:
+            self.add('16s', f'{target} = UUID(bytes={{}})')
+        elif scheme is Null:
+            self.emit(f'{target} = None')
+        elif scheme is ContainerDummy:
+            self.add_const(b'\x00\x00')
+            self.emit(f'{target} = {{}}')
+        elif scheme is VectorDummy:
+            self.flush()
+            self.emit(f'o, {target} = decode_vector_dummy(buf, o)')
+        elif scheme in _FIXED_VECTORS:
+            h_type, format_, object_ = _FIXED_VECTORS[scheme]
+            size = Struct('>' + format_).size
+            self.add_const(bytes([h_type]))
+            self.add('I', 'n = {}')
+            self.flush()
+            unpacked = f"unpack_from('>%d{format_}' % n, buf, o)"
+            if self.native:
+                self.emit(f'{target} = list({unpacked})')
+            else:
+                self.emit(f'{target} = Vector([], {_CTYPE_NAMES[object_]})')
+                self.emit(f'{target}.extend(map({_CTYPE_NAMES[object_]}, {unpacked}))')
+            self.emit(f'o += n * {size}' if size > 1 else 'o += n')
+        elif scheme is VectorString:
+            self.add_const(bytes([HTypes.STRING]))
+            self.add('I', 'n = {}')
+            self.flush()
+            self.emit(f'{target} = []' if self.native else f'{target} = Vector([], c_char_p)')
+            self.emit('for _ in range(n):')
+            self.emit('    m, = _LENGTH.unpack_from(buf, o)')
+            self.emit('    o += 4')
+            self.emit(f'    {target}.append(' + self.wrap('c_char_p', "unpack_from('>%ds' % m, buf, o)[0]") + ')')
+            self.emit('    o += m')
+        elif scheme is VectorGuid:
+            self.add_const(bytes([HTypes.GUID]))
+            self.add('I', 'n = {}')
+            self.flush()
+            self.emit(f'{target} = []' if self.native else f'{target} = Vector([], UUID)')
+            self.emit('for _ in range(n):')
+            self.emit(f"    {target}.append(UUID(bytes=unpack_from('>16s', buf, o)[0]))")
+            self.emit('    o += 16')
+        elif scheme is VectorNull:
+            self.add_const(bytes([HTypes.NULL]))
+            self.add('I', 'n = {}')
+            self.flush()
+            self.emit(f'{target} = [None] * n' if self.native else f'{target} = Vector([None] * n, type(None))')
+        else:
+            raise TypeError(f'The {scheme!r} is not a scheme value')
+
+
+def _h_type(scheme: Any) -> int:
+    if isinstance(scheme, dict) or scheme is ContainerDummy:
+        return HTypes.CONTAINER
+    elif isinstance(scheme, list):
+        if not scheme:
+            raise ValueError("The scheme list mustn't be empty")
+        h_types = {_h_type(element) for element in scheme}
+        if len(h_types) != 1:
+            raise ValueError('The scheme list has to have same type elements')
+        return HTypes.VECTOR
+    elif scheme in _FIXED:
+        return _FIXED[scheme][0]
+    elif scheme is String:
+        return HTypes.STRING
+    elif scheme is Guid:
+        return HTypes.GUID
+    elif scheme is Null:
+        return HTypes.NULL
+    elif scheme is VectorDummy or scheme in _FIXED_VECTORS or scheme in (VectorString, VectorGuid, VectorNull):
+        return HTypes.VECTOR
+    else:
+        raise TypeError(f'The {scheme!r} is not a scheme value')
+
+
+def generate_codec(scheme: Dict[Key, Any], native: bool = False, scheme_source: Optional[str] = None) -> str:
+    """ Generate the source of a module of the straight-line encode and decode functions of the scheme
+
+        Adjacent fixed-width fields (the keys, the type bytes, the numbers, the lengths)
+        are packed and unpacked by one precompiled struct. The native codec translates
+        plain int, float, bool, bytes, UUID, None, list and dict values.
+        The scheme_source (the module of the scheme written by make) is included if it is passed.
+    """
+    if not isinstance(scheme, dict):
+        raise TypeError('The scheme has to be a dict')
+    for key in scheme:
+        if not isinstance(key, Key):
+            raise TypeError(f'The {key!r} is not Key')
+
+    structs: Dict[str, str] = {}
+    encoder = _Encoder(native, structs, ' ' * 8)
+    encoder.add('Bq16s', 'version, timestamp, uuid_.bytes')
+    encoder.container('payload', scheme)
+    encoder.flush()
+
+    decoder = _Decoder(native, structs, ' ' * 4)
+    decoder.add('B', 'version = {}')
+    decoder.add('q', 'timestamp = {}')
+    decoder.add('16s', 'uuid_ = UUID(bytes={})')
+    decoder.container('payload', scheme)
+    decoder.flush()
+
+    code = ['']
+    code.append("_LENGTH = Struct('>I')")
+    for format_, name in structs.items():
+        code.extend(_wrap('', f'{name} = Struct(', [(format_, '')], ')', comma=False))
+    for keys, name in encoder.keys.items():
+        if len(keys) == 1:
+            code.extend(_wrap('', f'{name} = (', [(keys[0], ',')], ')', comma=False))
+        else:
+            code.extend(_wrap('', f'{name} = (', [(key, '') for key in keys], ')'))
+    if any('vector_dummy(' in line for line in encoder.lines + decoder.lines):
+        code.append('')
+        code.append('')
+        code.extend(_vector_dummy_source(native))
+    code.append('')
+    code.append('')
+    code.append('def encode_into(out, version, timestamp, uuid_, payload):')
+    code.append('    check_version(version)')
+    code.append('    check_timestamp(timestamp)')
+    code.append('    try:')
+    code.extend(encoder.lines)
+    code.append('    except StructError as err:')
+    code.append("        raise ValueError(f'The payload does not match the scheme: {err}') from err")
+    code.append('')
+    code.append('')
+    code.append('def encode(version, timestamp, uuid_, payload):')
+    code.append('    out = bytearray()')
+    code.append('    encode_into(out, version, timestamp, uuid_, payload)')
+    code.append('    return bytes(out)')
+    code.append('')
+    code.append('')
+    code.append('def decode(buf, offset=0):')
+    code.append('    o = offset')
+    code.extend(decoder.lines)
+    code.append('    check_version(version)')
+    code.append('    check_timestamp(timestamp)')
+    code.append('    return o, (version, timestamp, uuid_, payload)')
+
+    body = '\n'.join(code)
+    if '_LENGTH.' not in body:
+        code.remove("_LENGTH = Struct('>I')")
+
+    # the global names of the code, not the attributes or the keys in the literals
+    globals_ = set()
+    previous = ''
+    for token in generate_tokens(io.StringIO(body).readline):
+        if token.type == NAME and previous != '.':
+            globals_.add(token.string)
+        previous = token.string
+
+    def used(*names: str) -> str:
+        return ', '.join(name for name in names if name.split()[-1] in globals_)
+
+    result = [_HEADER]
+    ctypes = used('c_char_p', *_CTYPE_NAMES.values())
+    if ctypes:
+        result.append(f'from ctypes import {ctypes}')
+    result.append(f"from struct import {used('Struct', 'pack', 'unpack_from', 'error as StructError')}")
+    result.append('from uuid import UUID')
+    if used('Vector'):
+        result.append('from hercules_protocol import Vector')
+    result.append('from hercules_protocol.datatypes import check_version, check_timestamp')
+    if scheme_source:
+        result.append('')
+        result.append(scheme_source)
+    result.extend(code)
+    return '\n'.join(result) + '\n'
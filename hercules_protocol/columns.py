@@ -0,0 +1,430 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from array import array
+from itertools import repeat
+from mmap import mmap
+from operator import attrgetter, itemgetter
+from struct import Struct, error as StructError
+from uuid import UUID
+from hercules_protocol.scheme import Key
+from .datatypes import check_version, check_timestamp
+from .serialization import (
+    HTypes, HEAD_FORMAT, HEAD_STOP, Path, _to_path, _unpack_key, _unpack_value, _skip_value
+)
+from .codec import _FIXED, _compile, _type_byte
+from .batch import BATCH_COUNT
+
+# the big-endian formats of the numbers and the type codes of their arrays
+_COLUMN_FORMATS: Dict[int, Tuple[Struct, str]] = {
+    HTypes.BYTE: (Struct('>B'), 'B'),
+    HTypes.SHORT: (Struct('>h'), 'h'),
+    HTypes.INTEGER: (Struct('>i'), 'i'),
+    HTypes.LONG: (Struct('>q'), 'q'),
+    HTypes.FLAG: (Struct('>?'), 'B'),
+    HTypes.FLOAT: (Struct('>f'), 'f'),
+    HTypes.DOUBLE: (Struct('>d'), 'd'),
+}
+
+_HEAD = Struct(HEAD_FORMAT)
+_LENGTH = Struct('>I')
+_TAG_COUNT = Struct('>h')
+_NULL_UUID = bytes(16)
+_UUID = Struct('16s')
+
+
+class Column:
+    """ The values of a tag (by its path) of the events
+
+        The values of the numbers are a typed array (0 for the missing tags, the flags are 0 and 1),
+        of the strings a bytearray of their bytes, which ends are the offsets array
+        (the i-th string is values[offsets[i]:offsets[i + 1]]), of the UUIDs a bytearray
+        of 16 bytes per event and of the other types (vectors, containers, nulls) a list of native values.
+        Bit i % 8 of byte i // 8 of the validity bitmap is set if the i-th event has the tag.
+        A tag has to have the same Hercules type (h_type) in all events.
+    """
+
+    def __init__(self, path: Path, length: int = 0) -> None:
+        self.path = path
+        self.h_type: Optional[int] = None
+        self.values: Any = None
+        self.offsets: Optional[array] = None
+        self.validity = bytearray((length + 7) // 8)
+        self.length = length
+
+    def _set_type(self, h_type: int) -> None:
+        if self.h_type is not None:
+            raise ValueError(
+                f'The tag {".".join(self.path)} has to have the same type in all events, '
+                f'not {HTypes(self.h_type).name} and {HTypes(h_type).name}'
+            )
+        length = self.length
+        if h_type in _COLUMN_FORMATS:
+            self.values = array(_COLUMN_FORMATS[h_type][1], [0]) * length
+        elif h_type == HTypes.STRING:
+            self.values = bytearray()
+            self.offsets = array('q', [0]) * (length + 1)
+        elif h_type == HTypes.GUID:
+            self.values = bytearray(16 * length)
+        elif h_type in (HTypes.NULL, HTypes.VECTOR, HTypes.CONTAINER):
+            self.values = [None] * length
+        else:
+            raise ValueError(f'Incorrect data type {h_type}')
+        self.h_type = h_type
+
+    def append(self, data: Any, start: int) -> int:
+        """ Append the value at the start offset (its type byte), return the offset of its end
+        """
+        h_type = data[start]
+        if h_type != self.h_type:
+            self._set_type(h_type)
+        start += 1
+        length = self.length
+        if not length & 7:
+            self.validity.append(0)
+        self.validity[-1] |= 1 << (length & 7)
+        self.length = length + 1
+
+        if h_type in _COLUMN_FORMATS:
+            struct_ = _COLUMN_FORMATS[h_type][0]
+            self.values.append(struct_.unpack_from(data, start)[0])
+            return start + struct_.size
+        elif h_type == HTypes.STRING:
+            length, = _LENGTH.unpack_from(data, start)
+            start += 4
+            self.values += data[start:start + length]
+            self.offsets.append(len(self.values))  # type: ignore
+            return start + length
+        elif h_type == HTypes.GUID:
+            self.values += data[start:start + 16]
+            return start + 16
+        else:
+            stop, value = _unpack_value(data, start - 1, native=True)
+            self.values.append(value)
+            return stop
+
+    def append_null(self) -> None:
+        """ Append a missing value
+        """
+        if not self.length & 7:
+            self.validity.append(0)
+        self.length += 1
+        h_type = self.h_type
+        if h_type is None:
+            return
+        elif h_type in _COLUMN_FORMATS:
+            self.values.append(0)
+        elif h_type == HTypes.STRING:
+            self.offsets.append(self.offsets[-1])  # type: ignore
+        elif h_type == HTypes.GUID:
+            self.values += _NULL_UUID
+        else:
+            self.values.append(None)
+
+    def is_valid(self, index: int) -> bool:
+        return bool(self.validity[index >> 3] >> (index & 7) & 1)
+
+    def __getitem__(self, index: int) -> Any:
+        """ Return the native value of the index-th event or None if it has no tag
+        """
+        if not -self.length <= index < self.length:
+            raise IndexError('The index is out of range')
+        index %= self.length
+        if not self.is_valid(index):
+            return None
+        h_type = self.h_type
+        if h_type == HTypes.FLAG:
+            return bool(self.values[index])
+        elif h_type in _COLUMN_FORMATS:
+            return self.values[index]
+        elif h_type == HTypes.STRING:
+            return bytes(self.values[self.offsets[index]:self.offsets[index + 1]])  # type: ignore
+        elif h_type == HTypes.GUID:
+            return UUID(bytes=bytes(self.values[16 * index:16 * index + 16]))
+        else:
+            return self.values[index]
+
+    def to_list(self) -> list:
+        return [self[index] for index in range(self.length)]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __repr__(self):
+        type_name = 'None' if self.h_type is None else HTypes(self.h_type).name
+        return f'{type(self).__name__}({".".join(self.path)!r}, {type_name}, length={self.length})'
+
+
+class EventColumns:
+    """ The columns of the events: the versions, the timestamps (array('q')), the UUIDs
+        (a bytearray of 16 bytes per event) and the columns of the tags by their paths
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.versions = array('B')
+        self.timestamps = array('q')
+        self.uuids = bytearray()
+        self.columns: Dict[Path, Column] = {}
+
+    def uuid(self, index: int) -> UUID:
+        if not 0 <= index < self.count:
+            raise IndexError('The index is out of range')
+        return UUID(bytes=bytes(self.uuids[16 * index:16 * index + 16]))
+
+    def __getitem__(self, path: Union[str, Iterable[str]]) -> Column:
+        return self.columns[_to_path(path)]
+
+    def __contains__(self, path: Union[str, Iterable[str]]) -> bool:
+        return _to_path(path) in self.columns
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self):
+        return f'{type(self).__name__}(count={self.count}, columns={len(self.columns)})'
+
+
+# the node of a tag in the tree of the paths: its column (if the path ends here) and the nodes of the nested tags
+Node = list
+
+
+def _decode_container(
+    data: Any, start: int, tree: Dict[str, Node], columns: Optional[Dict[Path, Column]], count: int
+) -> int:
+    """ Append the values of the tags of the tree to their columns, skip the other tags,
+        with columns the new top-level tags get new columns of count missing values
+    """
+    tag_count, = _TAG_COUNT.unpack_from(data, start)
+    start += 2
+    for _ in range(tag_count):
+        start, key = _unpack_key(data, start)
+        node = tree.get(key)
+        if node is None:
+            if columns is None:
+                start = _skip_value(data, start + 1, data[start])
+                continue
+            path = (key,)
+            column = columns[path] = Column(path, count)
+            node = tree[key] = [column, {}]
+        column, nested = node
+        if nested and data[start] == HTypes.CONTAINER:
+            _decode_container(data, start + 1, nested, None, count)
+        if column is not None:
+            start = column.append(data, start)
+        else:
+            start = _skip_value(data, start + 1, data[start])
+    return start
+
+
+def decode_columns(
+    data: Union[bytes, bytearray, memoryview, mmap],
+    paths: Optional[Iterable[Union[str, Iterable[str]]]] = None
+) -> EventColumns:
+    """ Translate concatenated events into the columns of their tags
+
+        The paths are tuples of the keys of the nested containers or dotted strings,
+        the other tags are skipped without decoding. Without paths the columns
+        are the top-level tags of all events.
+    """
+    if isinstance(data, memoryview) and data.format != 'B':
+        data = data.cast('B')
+    if not isinstance(data, (bytes, bytearray, memoryview, mmap)):
+        raise TypeError('The data has to be bytes, memoryview or mmap')
+
+    result = EventColumns()
+    columns = result.columns
+    tree: Dict[str, Node] = {}
+    for path in paths or ():
+        path = _to_path(path)
+        column = columns.setdefault(path, Column(path))
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, [None, {}])[1]
+        node.setdefault(path[-1], [None, {}])[0] = column
+    new_columns = columns if paths is None else None
+
+    versions, timestamps, uuids = result.versions, result.timestamps, result.uuids
+    length = len(data)
+    start = 0
+    count = 0
+    while start < length:
+        try:
+            version, timestamp, uuid_bytes, _ = _HEAD.unpack_from(data, start)
+            check_version(version)
+            check_timestamp(timestamp)
+            stop = _decode_container(data, start + HEAD_STOP - 2, tree, new_columns, count)
+        except (IndexError, StructError):
+            stop = length + 1
+        if stop > length:
+            raise ValueError(f'The event at the offset {start} is incomplete')
+        versions.append(version)
+        timestamps.append(timestamp)
+        uuids += uuid_bytes
+        count += 1
+        for column in columns.values():
+            if column.length < count:
+                column.append_null()
+        start = stop
+
+    result.count = count
+    return result
+
+
+# a step of the encoding of an event: it appends the bytes of the index-th event to the buffer
+Step = Callable[[bytearray, int], None]
+
+
+def _presence(values: Any, length: int) -> Optional[bytearray]:
+    """ Return the flags of the events having the tag or None if all of them have it
+    """
+    if isinstance(values, Column):
+        if bin(int.from_bytes(values.validity, 'little')).count('1') == length:
+            return None
+        return bytearray(values.is_valid(index) for index in range(length))
+    if isinstance(values, array):
+        return None
+    present = bytearray(value is not None for value in values)
+    return None if all(present) else present
+
+
+def _uuid_bytes(values: Any) -> Iterable[bytes]:
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        return map(itemgetter(0), _UUID.iter_unpack(values))
+    return map(attrgetter('bytes'), values)
+
+
+def _make_run_step(fields: List[Tuple[str, Iterable]]) -> Step:
+    """ Pack the fixed-width fields of a run of the tags, the constant keys and type bytes are "s" fields
+    """
+    pack_ = Struct('>' + ''.join(format_ for format_, _ in fields)).pack
+    rows = zip(*(values for _, values in fields))
+
+    def step(out: bytearray, index: int) -> None:
+        out += pack_(*next(rows))
+
+    return step
+
+
+def _make_tag_step(prefix: bytes, h_type: int, encode: Callable, values: Any, present: Optional[bytearray]) -> Step:
+    if isinstance(values, Column) and h_type == HTypes.STRING:
+        data, offsets = values.values, values.offsets
+
+        def write(out: bytearray, index: int) -> None:
+            start, stop = offsets[index], offsets[index + 1]  # type: ignore
+            out += _LENGTH.pack(stop - start)
+            out += data[start:stop]
+    elif isinstance(values, Column) and h_type == HTypes.GUID:
+        data = values.values
+
+        def write(out: bytearray, index: int) -> None:
+            out += data[16 * index:16 * index + 16]
+    else:
+        get = (values.values if isinstance(values, Column) else values).__getitem__
+
+        def write(out: bytearray, index: int) -> None:
+            encode(get(index), out)
+
+    def step(out: bytearray, index: int) -> None:
+        if present is None or present[index]:
+            out += prefix
+            write(out, index)
+
+    return step
+
+
+def encode_columns(
+    timestamps: Sequence[int],
+    uuids: Union[bytes, bytearray, memoryview, Sequence[UUID]],
+    columns: Dict[str, Any],
+    scheme: Dict[Key, Any],
+    version: int = 1,
+    count_prefix: bool = False,
+    out: Optional[bytearray] = None
+) -> Tuple[bytearray, array]:
+    """ Translate the columns of the tags into one buffer of the concatenated events
+
+        The i-th event has the i-th timestamp, the i-th UUID (the uuids are UUIDs or bytes of 16 bytes
+        per event) and the i-th values of the columns by the keys of the scheme in the order of the scheme.
+        A column is a sequence of the native values (None for a missing tag, the Null tags are written
+        in all events) or a Column of decode_columns, the tags without columns are missing.
+        The adjacent fixed-width tags of all events (numbers, UUIDs and nulls) are packed
+        straight from their columns with the event head by one struct.
+        Returns the buffer and the offsets of the events as serialize_many does.
+    """
+    if not isinstance(scheme, dict):
+        raise TypeError('The scheme has to be a dict')
+    for key in scheme:
+        if not isinstance(key, Key):
+            raise TypeError(f'The {key!r} is not Key')
+    for name in columns:
+        if name not in scheme:
+            raise ValueError(f'The key {name!r} is not in the scheme')
+    check_version(version)
+    length = len(timestamps)
+    if length:
+        check_timestamp(min(timestamps))
+    if isinstance(uuids, (bytes, bytearray, memoryview)):
+        if memoryview(uuids).nbytes != 16 * length:
+            raise ValueError('The uuids have to have 16 bytes per timestamp')
+    elif len(uuids) != length:
+        raise ValueError('The uuids have to have the same length as the timestamps')
+
+    tags = []
+    presences = []
+    for key, scheme_value in scheme.items():
+        values = columns.get(key.str_)
+        if values is None or isinstance(values, Column) and values.h_type is None:
+            continue
+        if len(values) != length:
+            raise ValueError(f'The column {key.str_!r} has to have the same length as the timestamps')
+        h_type, encode, _ = _compile(scheme_value, True, None)
+        if isinstance(values, Column) and values.h_type != h_type:
+            raise ValueError(f'The column {key.str_!r} has to have the type {HTypes(h_type).name}')
+        if h_type == HTypes.NULL and not isinstance(values, Column):
+            present = None
+        else:
+            present = _presence(values, length)
+        if present is not None:
+            presences.append(present)
+        tags.append((key, scheme_value, h_type, encode, values, present))
+
+    tag_count = len(tags) - len(presences)
+    counts = [tag_count + sum(flags) for flags in zip(*presences)] if presences else repeat(tag_count)
+    fields: List[Tuple[str, Iterable]] = [
+        ('B', repeat(version)), ('q', timestamps), ('16s', _uuid_bytes(uuids)), ('h', counts)
+    ]
+    steps: List[Step] = []
+    for key, scheme_value, h_type, encode, values, present in tags:
+        prefix = key.bytes_ + _type_byte(h_type)
+        fixed = _FIXED.get(scheme_value) if isinstance(scheme_value, type) else None
+        if present is None and (fixed is not None or h_type in (HTypes.GUID, HTypes.NULL)):
+            fields.append((f'{len(prefix)}s', repeat(prefix)))
+            if fixed is not None:
+                fields.append((fixed[1], values.values if isinstance(values, Column) else values))
+            elif h_type == HTypes.GUID:
+                fields.append(('16s', _uuid_bytes(values.values if isinstance(values, Column) else values)))
+            continue
+        if fields:
+            steps.append(_make_run_step(fields))
+            fields = []
+        steps.append(_make_tag_step(prefix, h_type, encode, values, present))
+    if fields:
+        steps.append(_make_run_step(fields))
+
+    if out is None:
+        out = bytearray()
+    batch_start = len(out)
+    if count_prefix:
+        out += BATCH_COUNT.pack(length)
+    offsets = array('q', [len(out)])
+    try:
+        for index in range(length):
+            for step in steps:
+                step(out, index)
+            offsets.append(len(out))
+    except StructError as err:
+        del out[batch_start:]
+        raise ValueError(f'The columns do not match the scheme: {err}') from None
+    except Exception:
+        del out[batch_start:]
+        raise
+    return out, offsets
@@ -0,0 +1,295 @@
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Tuple, Union
+from uuid import UUID
+from struct import Struct
+import time
+import zlib
+from .datatypes import PTypes
+from .serialization import serialize_into
+from .codec import Codec
+from .adaptive import AdaptiveCodec
+from .interning import StringInterner
+from .stream import _get_deserialize_from, _iter_buffer
+
+try:
+    import lz4.block as lz4_block
+except ImportError:  # LZ4 is optional
+    lz4_block = None
+
+try:
+    import zstandard
+except ImportError:  # Zstandard is optional
+    zstandard = None
+
+Event = Tuple[int, int, UUID, Dict[str, PTypes]]
+
+BLOCK_SIZE = 1024 * 1024
+
+# a block: the magic, the compression id, the event count, the length of the events and of the compressed block
+BLOCK_MAGIC = b'HEVB'
+BLOCK_HEAD = Struct('>4sBIII')
+
+
+class Compression:
+    """ The compression of the blocks: its id in the block head, its name, the functions
+        compress(data, level) and decompress(data, length of the decompressed data)
+        and the default level
+    """
+
+    def __init__(
+        self,
+        id_: int,
+        name: str,
+        compress: Callable[[Union[bytes, bytearray], Any], Union[bytes, bytearray]],
+        decompress: Callable[[bytes, int], bytes],
+        level: Any = None
+    ) -> None:
+        self.id_ = id_
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+        self.level = level
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.id_}, {self.name!r})'
+
+
+_COMPRESSIONS: Dict[Union[int, str], Compression] = {}
+
+
+def register_compression(compression: Compression) -> None:
+    """ Make a compression available by its id and its name
+    """
+    if not isinstance(compression.id_, int) or not 0 <= compression.id_ <= 255:
+        raise ValueError('The id of the compression has to be in range 0..255')
+    for key in (compression.id_, compression.name):
+        if key in _COMPRESSIONS and _COMPRESSIONS[key] is not compression:
+            raise ValueError(f'The compression {key!r} is registered already')
+    _COMPRESSIONS[compression.id_] = _COMPRESSIONS[compression.name] = compression
+
+
+def _get_compression(compression: Union[int, str, Compression]) -> Compression:
+    if isinstance(compression, Compression):
+        return compression
+    result = _COMPRESSIONS.get(compression)
+    if result is None:
+        raise ValueError(f'The compression {compression!r} is not available')
+    return result
+
+
+def compressions() -> Dict[str, int]:
+    """ Return the ids of the available compressions by their names
+    """
+    return {key: value.id_ for key, value in _COMPRESSIONS.items() if isinstance(key, str)}
+
+
+register_compression(Compression(0, 'none', lambda data, level: data, lambda data, length: data))
+register_compression(Compression(
+    1, 'zlib',
+    lambda data, level: zlib.compress(data, level),
+    lambda data, length: zlib.decompress(data, bufsize=length),
+    level=6
+))
+if lz4_block is not None:
+    register_compression(Compression(
+        2, 'lz4',
+        lambda data, level: lz4_block.compress(data, mode='high_compression' if level else 'default',
+                                               compression=level or 0, store_size=False),
+        lambda data, length: lz4_block.decompress(data, uncompressed_size=length)
+    ))
+if zstandard is not None:
+    register_compression(Compression(
+        3, 'zstd',
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+        lambda data, length: zstandard.ZstdDecompressor().decompress(data, max_output_size=length),
+        level=3
+    ))
+
+
+def _stats(blocks: int, events: int, raw_bytes: int, compressed_bytes: int, seconds: float) -> Dict[str, Any]:
+    return {
+        'blocks': blocks,
+        'events': events,
+        'raw_bytes': raw_bytes,
+        'compressed_bytes': compressed_bytes,
+        'ratio': raw_bytes / compressed_bytes if compressed_bytes else 0.0,
+        'seconds': seconds,
+        'throughput': raw_bytes / seconds if seconds else 0.0,
+    }
+
+
+class BlockWriter:
+    """ The writer of events into compressed blocks of a binary file object
+
+        The events are translated into a buffer, which is compressed and written as a block
+        when it reaches block_size bytes, on flush() and on close(). The events never span blocks.
+        The compression is a name ('none', 'zlib', 'lz4' and 'zstd' if LZ4 or Zstandard
+        is installed), an id or a Compression, the level is its level.
+        stats() reports the compression ratio and throughput (raw bytes per second of compression).
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        compression: Union[int, str, Compression] = 'zlib',
+        level: Any = None,
+        block_size: int = BLOCK_SIZE,
+        scheme: Optional[Union[dict, Codec, AdaptiveCodec]] = None
+    ) -> None:
+        if not isinstance(block_size, int) or block_size < 1:
+            raise ValueError('The block_size has to be a positive number')
+        self.file = file
+        self.compression = _get_compression(compression)
+        self.level = self.compression.level if level is None else level
+        self.block_size = block_size
+        self.scheme = scheme
+        self._buffer = bytearray()
+        self._count = 0
+        self._blocks = self._events = self._raw_bytes = self._compressed_bytes = 0
+        self._seconds = 0.0
+
+    def write(self, version: int, timestamp: int, uuid_: UUID, payload: Dict[str, PTypes]) -> None:
+        """ Translate an event into bytes, write the block when it is full
+        """
+        if isinstance(self.scheme, (Codec, AdaptiveCodec)):
+            self.scheme.serialize_into(self._buffer, version, timestamp, uuid_, payload)
+        else:
+            serialize_into(self._buffer, version, timestamp, uuid_, payload, self.scheme)
+        self._count += 1
+        if len(self._buffer) >= self.block_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Compress the buffered events and write them as a block
+        """
+        if not self._count:
+            return
+        started = time.perf_counter()
+        data = self.compression.compress(self._buffer, self.level)
+        self._seconds += time.perf_counter() - started
+        self.file.write(BLOCK_HEAD.pack(BLOCK_MAGIC, self.compression.id_, self._count, len(self._buffer), len(data)))
+        self.file.write(data)
+        self._blocks += 1
+        self._events += self._count
+        self._raw_bytes += len(self._buffer)
+        self._compressed_bytes += BLOCK_HEAD.size + len(data)
+        self._buffer = bytearray()
+        self._count = 0
+
+    def close(self) -> None:
+        """ Write the buffered events, the file is not closed
+        """
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """ Return the numbers of the written blocks, events, raw and compressed bytes (with the block heads),
+            the compression ratio, the seconds of compression and the throughput
+        """
+        return _stats(self._blocks, self._events, self._raw_bytes, self._compressed_bytes, self._seconds)
+
+    def __enter__(self) -> 'BlockWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self):
+        return f'{type(self).__name__}(compression={self.compression.name!r}, block_size={self.block_size})'
+
+
+class BlockReader:
+    """ The iterator of the events of compressed blocks of bytes or of a binary file object
+
+        The blocks are read and decompressed one by one, so only one block is in memory,
+        and their events are decoded as iter_events does with the same arguments.
+        Every block names its compression, so the blocks of a file may be compressed differently.
+        stats() reports the compression ratio and throughput (raw bytes per second of decompression).
+    """
+
+    def __init__(
+        self,
+        source: Union[bytes, bytearray, memoryview, BinaryIO],
+        scheme: Optional[Union[dict, Codec, AdaptiveCodec]] = None,
+        view_threshold: Optional[int] = None,
+        native: bool = False,
+        arrays: bool = False,
+        numpy: bool = False,
+        interner: Optional[StringInterner] = None
+    ) -> None:
+        if not isinstance(source, (bytes, bytearray, memoryview)) and not hasattr(source, 'read'):
+            raise TypeError('The source has to be bytes, memoryview or a binary file object')
+        self.source = source
+        self._deserialize_from = _get_deserialize_from(scheme, view_threshold, native, arrays, numpy, interner)
+        self._blocks = self._events = self._raw_bytes = self._compressed_bytes = 0
+        self._seconds = 0.0
+
+    def _iter_blocks(self) -> Iterator[Tuple[int, int, int, Compression, Any]]:
+        """ Yield the offset, the event count, the length of the events, the compression and the data of every block
+        """
+        source = self.source
+        offset = 0
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = memoryview(source).cast('B')
+            while offset < len(data):
+                head = bytes(data[offset:offset + BLOCK_HEAD.size])
+                magic, compression_id, count, length, compressed_length = self._unpack_head(head, offset)
+                start = offset + BLOCK_HEAD.size
+                if start + compressed_length > len(data):
+                    raise ValueError(f'The block at the offset {offset} is incomplete')
+                yield offset, count, length, _get_compression(compression_id), data[start:start + compressed_length]
+                offset = start + compressed_length
+            return
+
+        while True:
+            head = source.read(BLOCK_HEAD.size)  # type: ignore
+            if not head:
+                return
+            while len(head) < BLOCK_HEAD.size:
+                chunk = source.read(BLOCK_HEAD.size - len(head))  # type: ignore
+                if not chunk:
+                    break
+                head += chunk
+            magic, compression_id, count, length, compressed_length = self._unpack_head(head, offset)
+            block = bytearray()
+            while len(block) < compressed_length:
+                chunk = source.read(compressed_length - len(block))  # type: ignore
+                if not chunk:
+                    raise ValueError(f'The block at the offset {offset} is incomplete')
+                block += chunk
+            yield offset, count, length, _get_compression(compression_id), block
+            offset += BLOCK_HEAD.size + compressed_length
+
+    @staticmethod
+    def _unpack_head(head: bytes, offset: int) -> Tuple[bytes, int, int, int, int]:
+        if len(head) < BLOCK_HEAD.size:
+            raise ValueError(f'The block at the offset {offset} is incomplete')
+        result = BLOCK_HEAD.unpack(head)
+        if result[0] != BLOCK_MAGIC:
+            raise ValueError(f'The block at the offset {offset} has to start with {BLOCK_MAGIC!r}')
+        return result
+
+    def __iter__(self) -> Iterator[Event]:
+        for offset, count, length, compression, block in self._iter_blocks():
+            started = time.perf_counter()
+            data = compression.decompress(block, length)
+            self._seconds += time.perf_counter() - started
+            if len(data) != length:
+                raise ValueError(f'The block at the offset {offset} has to have {length} bytes of events')
+            events = 0
+            for event in _iter_buffer(data, self._deserialize_from):
+                events += 1
+                yield event
+            if events != count:
+                raise ValueError(f'The block at the offset {offset} has to have {count} events')
+            self._blocks += 1
+            self._events += events
+            self._raw_bytes += len(data)
+            self._compressed_bytes += BLOCK_HEAD.size + len(block)
+
+    def stats(self) -> Dict[str, Any]:
+        """ Return the numbers of the read blocks, events, raw and compressed bytes (with the block heads),
+            the compression ratio, the seconds of decompression and the throughput
+        """
+        return _stats(self._blocks, self._events, self._raw_bytes, self._compressed_bytes, self._seconds)
+
+    def __repr__(self):
+        return f'{type(self).__name__}()'
@@ -1,12 +1,22 @@
-from typing import Union, Iterable, Type
-from ctypes import c_char_p, c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double
+from typing import Any, Dict, Iterator, List, Optional, Union, Iterable, Type
+from ctypes import c_char_p, c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double, sizeof
+from array import array
 import re
+import sys
 from uuid import UUID
 
+np: Any
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
 
 LENGTH_OF_TAG_KEY = 255
 MAX_VERSION = 1
 
+_TAG_KEY_REGEX = re.compile(r'\A[a-zA-Z0-9_.-]+\Z')
+
 PTypes = Union[
     dict,
     c_uint8,      # byte in C#/Java
@@ -19,7 +29,8 @@ PTypes = Union[
     c_char_p,
     UUID,
     None,
-    'Vector'
+    'Vector',
+    'ArrayVector'
 ]
 
 
@@ -36,6 +47,157 @@ class Vector(list):
         return f'{type(self).__name__}({super().__repr__()}, type_={self.type_.__name__})'
 
 
+def _get_int_typecode(size: int) -> str:
+    for typecode in ('h', 'i', 'l', 'q'):
+        if array(typecode).itemsize == size:
+            return typecode
+    raise ValueError(f'There is no array typecode of {size} bytes')
+
+
+ARRAY_TYPECODES: Dict[type, str] = {
+    c_uint8: 'B',
+    c_int16: _get_int_typecode(2),
+    c_int32: _get_int_typecode(4),
+    c_int64: _get_int_typecode(8),
+    c_bool: 'B',
+    c_float: 'f',
+    c_double: 'd',
+}
+_ARRAY_SIZES: Dict[type, int] = {type_: sizeof(type_) for type_ in ARRAY_TYPECODES}
+
+
+# the kinds of the buffer items by the format characters (without the byte order) and the kinds of the vector types
+_FORMAT_KINDS: Dict[str, str] = {
+    **{format_: 'i' for format_ in 'bBhHiIlLqQnN'},
+    **{format_: 'f' for format_ in 'efd'},
+    '?': 'b',
+}
+_ARRAY_KINDS: Dict[type, str] = {
+    c_uint8: 'ib',
+    c_int16: 'i',
+    c_int32: 'i',
+    c_int64: 'i',
+    c_bool: 'bi',
+    c_float: 'f',
+    c_double: 'f',
+}
+
+
+class ArrayVector:
+    """ The vector of numbers in one buffer: an array.array or any buffer object (a NumPy array)
+
+        The numbers are plain int, float or bool, a Vector holds a ctypes object per number.
+    """
+
+    def __init__(self, value: Any, type_: Type[PTypes]) -> None:
+        if type_ not in ARRAY_TYPECODES:
+            raise ValueError(f'Incorrect data type {type_}')
+        self.type_ = type_
+        self.typecode = ARRAY_TYPECODES[type_]
+
+        try:
+            view = memoryview(value)
+        except TypeError:
+            value = array(self.typecode, value)
+            view = memoryview(value)
+        if view.ndim != 1 or view.itemsize != _ARRAY_SIZES[type_]:
+            raise ValueError(f'The buffer has to be one-dimensional with items of {_ARRAY_SIZES[type_]} bytes')
+        if _FORMAT_KINDS.get(view.format.lstrip('@=<>!')) not in tuple(_ARRAY_KINDS[type_]):
+            raise TypeError(f'The buffer items of the format {view.format!r} have to be numbers of {type_.__name__}')
+        self.array = value
+        self._view = view
+
+    @classmethod
+    def from_bytes(cls, data: Any, type_: Type[PTypes]) -> 'ArrayVector':
+        """ Make the vector of the big-endian numbers of the buffer
+        """
+        result = array(ARRAY_TYPECODES[type_])
+        result.frombytes(data)
+        if sys.byteorder == 'little' and result.itemsize > 1:
+            result.byteswap()
+        return cls(result, type_)
+
+    def to_bytes(self) -> bytes:
+        """ Return the big-endian numbers
+        """
+        view = self._view
+        byteorder = view.format[:1]
+        if view.itemsize == 1 or byteorder in ('>', '!') or (sys.byteorder == 'big' and byteorder != '<'):
+            return view.tobytes()
+        swapped = array(self.typecode)
+        try:
+            swapped.frombytes(view.cast('B'))
+        except (TypeError, ValueError):  # not contiguous or not native format
+            swapped.frombytes(view.tobytes())
+        swapped.byteswap()
+        return swapped.tobytes()
+
+    def tolist(self) -> List[Any]:
+        if self.type_ is c_bool:
+            return [bool(e) for e in self._view.tolist()]
+        return self._view.tolist()
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def __getitem__(self, index: int) -> Union[int, float, bool]:
+        if self.type_ is c_bool:
+            return bool(self._view[index])
+        return self._view[index]
+
+    def __iter__(self) -> Iterator[Union[int, float, bool]]:
+        return iter(self.tolist())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ArrayVector):
+            return self.type_ is other.type_ and self.tolist() == other.tolist()
+        return NotImplemented
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.tolist()!r}, type_={self.type_.__name__})'
+
+
+NUMPY_DTYPES: Dict[type, str] = {
+    c_uint8: 'u1',
+    c_int16: '>i2',
+    c_int32: '>i4',
+    c_int64: '>i8',
+    c_bool: '?',
+    c_float: '>f4',
+    c_double: '>f8',
+}
+
+_NUMPY_KINDS: Dict[tuple, type] = {
+    ('u', 1): c_uint8,
+    ('i', 2): c_int16,
+    ('i', 4): c_int32,
+    ('i', 8): c_int64,
+    ('b', 1): c_bool,
+    ('f', 4): c_float,
+    ('f', 8): c_double,
+}
+
+
+def is_ndarray(value: Any) -> bool:
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def get_vector_type(value: Any) -> Optional[type]:
+    """ Return the type of the elements of a Vector, an ArrayVector or a one-dimensional NumPy array
+    """
+    if isinstance(value, (Vector, ArrayVector)):
+        return value.type_
+    if is_ndarray(value) and value.ndim == 1:
+        return _NUMPY_KINDS.get((value.dtype.kind, value.dtype.itemsize))
+    return None
+
+
+def ndarray_to_bytes(value: Any, type_: type) -> bytes:
+    """ Return the big-endian numbers of the NumPy array
+    """
+    return value.astype(NUMPY_DTYPES[type_], copy=False).tobytes()
+
+
 def check_tag_key(key: str) -> str:
     if not isinstance(key, str):
         raise ValueError('The key has to be a string')
@@ -46,8 +208,7 @@ def check_tag_key(key: str) -> str:
     if len(key) > LENGTH_OF_TAG_KEY:
         raise ValueError(f'The length of the key has to be less or equal {LENGTH_OF_TAG_KEY}')
 
-    regex = re.compile(r'\A[a-zA-Z0-9_.-]+\Z')
-    if not bool(regex.match(key)):
+    if not bool(_TAG_KEY_REGEX.match(key)):
         raise ValueError('Permitted characters of the key: "a-z", "A-Z", "0-9", "_", ".", "-"')
 
     return key
@@ -1,4 +1,4 @@
-from typing import Set, Tuple, Dict, Union, Type
+from typing import Iterable, Set, Tuple, Dict, Union, Type
 from ctypes import c_char_p, c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double, _SimpleCData
 from uuid import UUID
 from hercules_protocol.scheme import (
@@ -29,7 +29,10 @@ from hercules_protocol.scheme import (
 )
 from .datatypes import (
     PTypes,
-    Vector
+    Vector,
+    ArrayVector,
+    is_ndarray,
+    get_vector_type
 )
 
 
@@ -39,7 +42,7 @@ def make_scheme(
     if not isinstance(payload, dict):
         raise ValueError('The payload has to be a dict')
 
-    def construct_list(list_: Vector) -> list:
+    def construct_list(list_: Iterable) -> list:
         result = []
         for element in list_:
             result.append(construct(element))
@@ -84,38 +87,39 @@ def make_scheme(
         elif isinstance(value, type(None)):
             scheme_classes.add(Null)
             return Null
-        elif isinstance(value, Vector):
-            if value.type_ is c_uint8:
+        elif get_vector_type(value) is not None:
+            type_ = get_vector_type(value)
+            if type_ is c_uint8:
                 scheme_classes.add(VectorByte)
                 return VectorByte
-            elif value.type_ is c_int16:
+            elif type_ is c_int16:
                 scheme_classes.add(VectorShort)
                 return VectorShort
-            elif value.type_ is c_int32:
+            elif type_ is c_int32:
                 scheme_classes.add(VectorInteger)
                 return VectorInteger
-            elif value.type_ is c_int64:
+            elif type_ is c_int64:
                 scheme_classes.add(VectorLong)
                 return VectorLong
-            elif value.type_ is c_bool:
+            elif type_ is c_bool:
                 scheme_classes.add(VectorFlag)
                 return VectorFlag
-            elif value.type_ is c_float:
+            elif type_ is c_float:
                 scheme_classes.add(VectorFloat)
                 return VectorFloat
-            elif value.type_ is c_double:
+            elif type_ is c_double:
                 scheme_classes.add(VectorDouble)
                 return VectorDouble
-            elif value.type_ is c_char_p:
+            elif type_ is c_char_p:
                 scheme_classes.add(VectorString)
                 return VectorString
-            elif value.type_ is UUID:
+            elif type_ is UUID:
                 scheme_classes.add(VectorGuid)
                 return VectorGuid
-            elif value.type_ is type(None):  # noqa: E721
+            elif type_ is type(None):  # noqa: E721
                 scheme_classes.add(VectorNull)
                 return VectorNull
-            elif value.type_ is Vector or value.type_ is dict:
+            elif type_ is Vector or type_ is dict:
                 if len(value):
                     return construct_list(value)
                 else:
@@ -152,7 +156,9 @@ def simplify(
         replace c_float with float,
         replace c_double with float,
         replace c_char_p with str,
-        replace Vector with list
+        replace Vector with list,
+        replace ArrayVector with list,
+        replace numpy.ndarray with list
     """
 
     if not isinstance(data, tuple):
@@ -171,6 +177,8 @@ def simplify(
                 new_item.append(_simplify(i))
         elif isinstance(item, _SimpleCData):
             new_item = item.value
+        elif isinstance(item, ArrayVector) or is_ndarray(item):
+            new_item = item.tolist()
         else:
             new_item = item
 
@@ -0,0 +1,50 @@
+from typing import Any, Dict, Tuple
+from struct import unpack_from
+from .datatypes import PTypes
+from .serialization import (
+    HTypes,
+    HEAD_STOP,
+    _skip_value,
+    _unpack_value,
+)
+
+Path = Tuple[str, ...]
+# (the data type, the offset of the value, the length of the value)
+TagEntry = Tuple[int, int, int]
+
+
+def index_event(data: bytes, start: int = 0) -> Dict[Path, TagEntry]:
+    """ Find the tags of the event without decoding them
+
+        Returns the data type, the offset and the length in bytes of the value
+        of every tag by its path, the tuple of the keys of the nested containers.
+        Values are skipped by their sizes, so the time depends on the number of tags.
+    """
+    result: Dict[Path, TagEntry] = {}
+
+    def index_container(start: int, path: Path) -> int:
+        tag_count, = unpack_from('>h', data, start)
+        start += 2
+        for _ in range(tag_count):
+            stop = start + 1 + data[start]
+            key_path = path + (str(data[start + 1:stop], 'utf-8'),)
+            h_type = data[stop]
+            start = stop + 1
+            if h_type == HTypes.CONTAINER:
+                result[key_path] = (h_type, start, 0)
+                stop = index_container(start, key_path)
+            else:
+                stop = _skip_value(data, start, h_type)
+            result[key_path] = (h_type, start, stop - start)
+            start = stop
+        return start
+
+    index_container(start + HEAD_STOP - 2, ())
+    return result
+
+
+def read_tag(data: Any, entry: TagEntry) -> PTypes:
+    """ Translate the value of the tag found by index_event into a data structure
+    """
+    _, start, _ = entry
+    return _unpack_value(data, start - 1)[1]  # type: ignore
@@ -0,0 +1,141 @@
+from typing import Any, Counter as CounterType, Dict, Iterable, List, Optional, Set, Tuple, Union
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from mmap import mmap, ACCESS_READ
+import os
+from hercules_protocol.scheme import Key
+from .shapes import Shape, _event_shape_from, _to_scheme, _type_name
+from .serialization import HTypes
+from .stream import CHUNK_SIZE, Source, _iter_buffer, _iter_file
+
+
+def scheme_classes(scheme: Union[type, dict, list]) -> Set[type]:
+    """ Return the scheme classes used in the scheme (and Key), as make_scheme does
+    """
+    result: Set[type] = {Key}
+
+    def collect(value: Union[type, dict, list]) -> None:
+        if isinstance(value, dict):
+            for element in value.values():
+                collect(element)
+        elif isinstance(value, list):
+            for element in value:
+                collect(element)
+        else:
+            result.add(value)
+
+    collect(scheme)
+    return result
+
+
+class SchemeInference:
+    """ The distinct shapes of the events of a corpus and their frequencies
+
+        A shape is the exact scheme of an event, so the events with optional tags
+        or vectors of containers of different lengths have different shapes;
+        tags() merges them into the statistics of every tag.
+    """
+
+    def __init__(self) -> None:
+        self.events = 0
+        self.shapes: CounterType[Shape] = Counter()
+
+    def add(self, shape: Shape, count: int = 1) -> None:
+        self.events += count
+        self.shapes[shape] += count
+
+    def update(self, other: 'SchemeInference') -> None:
+        """ Merge the shapes of another corpus
+        """
+        self.events += other.events
+        self.shapes.update(other.shapes)
+
+    def schemes(self, top: Optional[int] = None) -> List[Tuple[Dict[Key, Any], int]]:
+        """ Return the schemes of the shapes and their frequencies, the most frequent first
+        """
+        return [
+            ({Key(key): _to_scheme(value) for key, value in shape[1]}, count)  # type: ignore
+            for shape, count in self.shapes.most_common(top)
+        ]
+
+    def tags(self) -> Dict[Tuple[str, ...], Dict[str, Any]]:
+        """ Return the statistics of every tag of the containers by its path (the keys of the nested containers):
+            the number of the events with the tag, the frequencies of its types and whether it is optional
+        """
+        result: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+        def add_container(shape: tuple, path: Tuple[str, ...], count: int) -> None:
+            for key, value in shape[1]:
+                key_path = path + (key,)
+                tag = result.setdefault(key_path, {'count': 0, 'types': Counter()})
+                tag['count'] += count
+                tag['types'][_type_name(value)] += count
+                if not isinstance(value, int) and value[0] == HTypes.CONTAINER:
+                    add_container(value, key_path, count)
+
+        for shape, count in self.shapes.items():
+            add_container(shape, (), count)  # type: ignore
+        for tag in result.values():
+            tag['types'] = dict(tag['types'])
+            tag['optional'] = tag['count'] < self.events
+        return result
+
+    def optional_tags(self) -> List[Tuple[str, ...]]:
+        """ Return the paths of the tags, which some events do not have
+        """
+        return [path for path, tag in self.tags().items() if tag['optional']]
+
+    def __repr__(self):
+        return f'{type(self).__name__}(events={self.events}, shapes={len(self.shapes)})'
+
+
+def scan_schemes(source: Union[Source, str, os.PathLike], chunk_size: int = CHUNK_SIZE) -> SchemeInference:
+    """ Find the shapes of the concatenated events of bytes, an mmap, a binary file object or a file path
+
+        The events are scanned without decoding their values, a file path is mapped to memory.
+    """
+    result = SchemeInference()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return result
+            with mmap(file.fileno(), 0, access=ACCESS_READ) as data:
+                for shape in _iter_buffer(data, _event_shape_from):
+                    result.add(shape)
+        return result
+
+    if isinstance(source, (bytes, bytearray, mmap)):
+        shapes = _iter_buffer(source, _event_shape_from)
+    elif isinstance(source, memoryview):
+        shapes = _iter_buffer(source.cast('B') if source.format != 'B' else source, _event_shape_from)
+    elif hasattr(source, 'read'):
+        shapes = _iter_file(source, _event_shape_from, chunk_size)
+    else:
+        raise TypeError('The source has to be bytes, memoryview, mmap, a binary file object or a file path')
+    for shape in shapes:
+        result.add(shape)
+    return result
+
+
+def infer_schemes(
+    sources: Iterable[Union[Source, str, os.PathLike]],
+    processes: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> SchemeInference:
+    """ Find the shapes of the events of many sources and merge them
+
+        The file paths are scanned by a pool of processes (processes=None is the number of CPUs),
+        the other sources and the paths with processes=1 are scanned in this process.
+    """
+    result = SchemeInference()
+    sources = list(sources)
+    paths = [source for source in sources if isinstance(source, (str, os.PathLike))]
+    if len(paths) > 1 and processes != 1:
+        with ProcessPoolExecutor(processes) as executor:
+            for inference in executor.map(scan_schemes, paths, [chunk_size] * len(paths)):
+                result.update(inference)
+        sources = [source for source in sources if not isinstance(source, (str, os.PathLike))]
+
+    for source in sources:
+        result.update(scan_schemes(source, chunk_size))
+    return result
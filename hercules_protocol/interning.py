@@ -0,0 +1,72 @@
+from typing import Dict
+from collections import OrderedDict
+
+POLICIES = ('lru', 'fifo', 'freeze')
+
+
+class StringInterner:
+    """ The bounded table of the decoded strings, so the repeated strings are shared bytes objects
+
+        Strings of at most max_length bytes are interned, the table keeps at most maxsize of them.
+        When the table is full, the policy "lru" evicts the least recently used string,
+        "fifo" evicts the oldest one and "freeze" keeps the table as it is.
+        The native values are the shared bytes, the c_char_p wrappers are not shared as they are mutable.
+    """
+
+    def __init__(self, maxsize: int = 4096, max_length: int = 64, policy: str = 'lru') -> None:
+        if not isinstance(maxsize, int) or maxsize < 0:
+            raise ValueError('The maxsize has to be a positive number')
+        if not isinstance(max_length, int) or max_length < 0:
+            raise ValueError('The max_length has to be a positive number')
+        if policy not in POLICIES:
+            raise ValueError(f'The policy has to be one of {POLICIES}')
+        self.maxsize = maxsize
+        self.max_length = max_length
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._table: Dict[bytes, bytes] = OrderedDict()
+
+    def intern(self, value: bytes) -> bytes:
+        """ Return the shared string equal to the value, the value is added to the table if it is absent
+        """
+        table = self._table
+        result = table.get(value)
+        if result is not None:
+            self.hits += 1
+            if self.policy == 'lru':
+                table.move_to_end(value)  # type: ignore
+            return result
+
+        self.misses += 1
+        if len(table) >= self.maxsize:
+            if self.policy == 'freeze' or not table:
+                return value
+            table.popitem(last=False)  # type: ignore
+            self.evictions += 1
+        table[value] = value
+        return value
+
+    def info(self) -> Dict[str, int]:
+        """ Return the statistics of the table
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._table),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self) -> None:
+        """ Remove the strings and reset the statistics
+        """
+        self._table.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __repr__(self):
+        return f'{type(self).__name__}(maxsize={self.maxsize}, max_length={self.max_length}, policy={self.policy!r})'
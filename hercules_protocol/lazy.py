@@ -0,0 +1,174 @@
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+from ctypes import c_char_p
+from uuid import UUID
+from struct import unpack_from
+from .datatypes import (
+    PTypes,
+    Vector,
+    check_version,
+    check_timestamp,
+)
+from .serialization import (
+    HTypes,
+    HEAD_FORMAT,
+    HEAD_STOP,
+    _H_TYPE_SIZES,
+    _H_TYPE_FORMATS,
+    _get_p_type,
+    _unpack_key,
+    _skip_value,
+)
+
+
+def _get_value(data: Any, h_type: int, start: int) -> Any:
+    if h_type in _H_TYPE_FORMATS:
+        format_, object_ = _H_TYPE_FORMATS[h_type]
+        return object_(unpack_from('>' + format_, data, start)[0])
+    elif h_type == HTypes.STRING:
+        length, = unpack_from('>I', data, start)
+        return c_char_p(unpack_from(f'>{length}s', data, start + 4)[0])
+    elif h_type == HTypes.GUID:
+        return UUID(bytes=unpack_from('>16s', data, start)[0])
+    elif h_type == HTypes.NULL:
+        return None
+    elif h_type == HTypes.VECTOR:
+        return LazyVector(data, start)
+    elif h_type == HTypes.CONTAINER:
+        return LazyContainer(data, start)
+    else:
+        raise ValueError(f'Incorrect data type {h_type}')
+
+
+def _materialize(value: Any) -> PTypes:
+    if isinstance(value, (LazyContainer, LazyVector)):
+        return value.materialize()
+    return value
+
+
+class LazyContainer(Mapping[str, Any]):
+    """ The container of the data, which is decoded when its tags are accessed
+
+        The offsets of the tags are scanned on the first access,
+        the value of a tag is decoded on the first access to it.
+    """
+
+    def __init__(self, data: Any, start: int) -> None:
+        self._data = data
+        self._start = start
+        self._offsets: Optional[Dict[str, Tuple[int, int]]] = None
+        self._values: Dict[str, Any] = {}
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        data = self._data
+        tag_count, = unpack_from('>h', data, self._start)
+        start = self._start + 2
+        offsets = {}
+        for _ in range(tag_count):
+            start, key = _unpack_key(data, start)
+            h_type = data[start]
+            offsets[key] = (h_type, start + 1)
+            start = _skip_value(data, start + 1, h_type)
+        self._offsets = offsets
+        return offsets
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._values:
+            return self._values[key]
+        offsets = self._offsets if self._offsets is not None else self._scan()
+        h_type, start = offsets[key]
+        value = self._values[key] = _get_value(self._data, h_type, start)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        offsets = self._offsets if self._offsets is not None else self._scan()
+        return key in offsets
+
+    def __iter__(self) -> Iterator[str]:
+        offsets = self._offsets if self._offsets is not None else self._scan()
+        return iter(offsets)
+
+    def __len__(self) -> int:
+        return unpack_from('>h', self._data, self._start)[0]
+
+    def materialize(self) -> Dict[str, PTypes]:
+        """ Decode all the tags as deserialize does
+        """
+        return {key: _materialize(self[key]) for key in self}
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self)!r})'
+
+
+class LazyVector(Sequence[Any]):
+    """ The vector of the data, which elements are decoded when they are accessed
+    """
+
+    def __init__(self, data: Any, start: int) -> None:
+        self._data = data
+        self.h_type = data[start]
+        self.type_ = _get_p_type(self.h_type)
+        self._length: int = unpack_from('>I', data, start + 1)[0]
+        self._start = start + 5
+        self._offsets: Optional[List[int]] = None
+
+    def _offset(self, index: int) -> int:
+        if self.h_type in _H_TYPE_SIZES:
+            return self._start + index * _H_TYPE_SIZES[self.h_type]
+        if self._offsets is None:
+            offsets = []
+            start = self._start
+            for _ in range(self._length):
+                offsets.append(start)
+                start = _skip_value(self._data, start, self.h_type)
+            self._offsets = offsets
+        return self._offsets[index]
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:  # type: ignore
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('The vector index out of range')
+        return _get_value(self._data, self.h_type, self._offset(index))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def materialize(self) -> Vector:
+        """ Decode all the elements as deserialize does
+        """
+        result = Vector([], self.type_)
+        result.extend(_materialize(self[i]) for i in range(self._length))
+        return result
+
+    def __repr__(self):
+        return f'{type(self).__name__}(length={self._length}, type_={self.type_.__name__})'
+
+
+class LazyEvent(LazyContainer):
+    """ The event of the data, which header is decoded at once and payload on access
+    """
+
+    def __init__(self, data: Any, start: int = 0) -> None:
+        version, timestamp, uuid_bytes, _ = unpack_from(HEAD_FORMAT, data, start)
+        check_version(version)
+        check_timestamp(timestamp)
+        super().__init__(data, start + HEAD_STOP - 2)
+        self.version: int = version
+        self.timestamp: int = timestamp
+        self.uuid = UUID(bytes=uuid_bytes)
+
+    def materialize(self) -> Tuple[int, int, UUID, Dict[str, PTypes]]:  # type: ignore
+        """ Decode the event as deserialize does
+        """
+        return self.version, self.timestamp, self.uuid, super().materialize()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.version}, {self.timestamp}, {self.uuid!r}, {list(self)!r})'
+
+
+def deserialize_lazy(data: bytes) -> LazyEvent:
+    """ Translate bytes into an event, which tags are decoded when they are accessed
+    """
+    return LazyEvent(data)
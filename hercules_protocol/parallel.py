@@ -0,0 +1,205 @@
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from mmap import mmap, ACCESS_READ
+from struct import error as StructError
+from tempfile import NamedTemporaryFile
+from uuid import UUID
+import os
+from .serialization import deserialize_from, _skip_event
+from .codec import Codec, compile_scheme
+from .stream import Event, _iter_buffer
+
+SharedMemory: Any
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:  # Python 3.7
+    SharedMemory = None
+
+# the versions, the timestamps, the UUIDs and the values of the payload tags (None for the missing ones)
+Columns = Tuple[array, array, List[UUID], Dict[str, list]]
+
+PARALLEL_CHUNK_SIZE = 1024 * 1024
+
+# the source and the decoder of a worker process
+_WORKER: Dict[str, Any] = {}
+
+
+def _get_native_deserialize_from(scheme: Optional[dict]) -> Callable[[Any, int], Tuple[int, Event]]:
+    if scheme is None:
+        return lambda data, start: deserialize_from(data, start, native=True)
+    return compile_scheme(scheme, native=True).deserialize_from
+
+
+def _init_worker(kind: str, name: str, scheme: Optional[dict]) -> None:
+    if kind == 'path':
+        with open(name, 'rb') as file:
+            _WORKER['data'] = memoryview(mmap(file.fileno(), 0, access=ACCESS_READ))
+    else:
+        # the segment is registered by the parent, which unlinks it
+        _WORKER['memory'] = SharedMemory(name=name)
+        _WORKER['data'] = _WORKER['memory'].buf
+    _WORKER['deserialize_from'] = _get_native_deserialize_from(scheme)
+
+
+def _to_columns(events: Iterator[Event]) -> Columns:
+    versions, timestamps, uuids = array('B'), array('q'), []
+    tags: Dict[str, list] = {}
+    count = 0
+    for version, timestamp, uuid_, payload in events:
+        versions.append(version)
+        timestamps.append(timestamp)
+        uuids.append(uuid_)
+        for key, value in payload.items():
+            column = tags.get(key)
+            if column is None:
+                column = tags[key] = [None] * count
+            elif len(column) < count:
+                column.extend([None] * (count - len(column)))
+            column.append(value)
+        count += 1
+    for column in tags.values():
+        column.extend([None] * (count - len(column)))
+    return versions, timestamps, uuids, tags
+
+
+def _merge_columns(result: Columns, other: Columns) -> None:
+    count, other_count = len(result[0]), len(other[0])
+    result[0].extend(other[0])
+    result[1].extend(other[1])
+    result[2].extend(other[2])
+    tags = result[3]
+    for key, column in other[3].items():
+        if key in tags:
+            tags[key].extend(column)
+        else:
+            tags[key] = [None] * count + column
+    for column in tags.values():
+        if len(column) < count + other_count:
+            column.extend([None] * other_count)
+
+
+def _decode_chunk(start: int, stop: int, columns: bool) -> Union[List[Event], Columns]:
+    events = _iter_buffer(_WORKER['data'][start:stop], _WORKER['deserialize_from'])
+    return _to_columns(events) if columns else list(events)
+
+
+def _iter_chunks(data: Any, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """ Find the boundaries of the events by skipping them and group them into chunks of at least chunk_size bytes
+    """
+    length = len(data)
+    chunk_start = start = 0
+    while start < length:
+        try:
+            stop = _skip_event(data, start)
+        except (IndexError, StructError):
+            stop = length + 1
+        if stop > length:
+            raise ValueError(f'The event at the offset {start} is incomplete')
+        start = stop
+        if start - chunk_start >= chunk_size:
+            yield chunk_start, start
+            chunk_start = start
+    if chunk_start < length:
+        yield chunk_start, length
+
+
+def _iter_results(
+    data: Any, kind: str, name: str, scheme: Optional[dict], workers: int, chunk_size: int, columns: bool
+) -> Iterator[Union[List[Event], Columns]]:
+    pending: Deque[Any] = deque()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(kind, name, scheme)) as executor:
+        for start, stop in _iter_chunks(data, chunk_size):
+            pending.append(executor.submit(_decode_chunk, start, stop, columns))
+            # a bounded number of the decoded chunks wait for the consumer
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _decode_in_process(data: Any, scheme: Optional[dict], columns: bool) -> Union[Iterator[Event], Columns]:
+    events = _iter_buffer(data, _get_native_deserialize_from(scheme))
+    return _to_columns(events) if columns else events
+
+
+def _iter_source(
+    source: Any, scheme: Optional[dict], workers: int, chunk_size: int, columns: bool
+) -> Iterator[Union[Iterator[Event], List[Event], Columns]]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap(file.fileno(), 0, access=ACCESS_READ) as data:
+                if workers == 1:
+                    yield _decode_in_process(data, scheme, columns)
+                else:
+                    yield from _iter_results(data, 'path', os.fspath(source), scheme, workers, chunk_size, columns)
+        return
+
+    if workers == 1:
+        yield _decode_in_process(source, scheme, columns)
+        return
+    if not len(source):
+        return
+    if SharedMemory is None:
+        # no shared memory before Python 3.8, the workers map a temporary file
+        with NamedTemporaryFile(suffix='.bin') as file:
+            file.write(source)
+            file.flush()
+            yield from _iter_results(source, 'path', file.name, scheme, workers, chunk_size, columns)
+        return
+
+    memory = SharedMemory(create=True, size=len(source))
+    try:
+        memory.buf[:len(source)] = source
+        yield from _iter_results(source, 'shared_memory', memory.name, scheme, workers, chunk_size, columns)
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def _iter_events(chunks: Iterator[Any]) -> Iterator[Event]:
+    for events in chunks:
+        yield from events
+
+
+def deserialize_parallel(
+    source: Union[bytes, bytearray, memoryview, mmap, str, os.PathLike],
+    workers: Optional[int] = None,
+    scheme: Optional[Union[dict, Codec]] = None,
+    chunk_size: int = PARALLEL_CHUNK_SIZE,
+    columns: bool = False
+) -> Union[Iterator[Event], Columns]:
+    """ Translate concatenated events into data structures by a pool of processes
+
+        The boundaries of the events are found by skipping them, the chunks of about
+        chunk_size bytes are decoded by workers (workers=None is the number of CPUs),
+        which map the file of a path or read the buffer copied once into shared memory.
+        The events are native (plain values as deserialize(native=True) returns),
+        because ctypes objects with pointers can't be sent between processes.
+        The events come back in order one by one, with columns they are aggregated into
+        (versions, timestamps, uuids, {key: values of the tag}) of the top-level tags.
+        With workers=1 the events are decoded in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not isinstance(workers, int) or workers < 1:
+        raise ValueError('The workers has to be a positive number')
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError('The chunk_size has to be a positive number')
+    if isinstance(scheme, Codec):
+        scheme = scheme.scheme
+    if isinstance(source, memoryview) and source.format != 'B':
+        source = source.cast('B')
+    if not isinstance(source, (bytes, bytearray, memoryview, mmap, str, os.PathLike)):
+        raise TypeError('The source has to be bytes, memoryview, mmap or a file path')
+
+    chunks = _iter_source(source, scheme, workers, chunk_size, columns)
+    if not columns:
+        return _iter_events(chunks)  # type: ignore
+    result: Columns = (array('B'), array('q'), [], {})
+    for chunk in chunks:
+        _merge_columns(result, chunk)  # type: ignore
+    return result
@@ -0,0 +1,231 @@
+from typing import Any, Callable, Dict, Iterable, Tuple, Union
+from abc import ABC, abstractmethod
+from struct import Struct
+from uuid import UUID
+import operator
+from hercules_protocol.scheme import Key
+from .datatypes import check_tag_key
+from .serialization import HTypes, HEAD_STOP, Path, _to_path, _skip_value, _H_TYPE_FORMATS
+
+_LENGTH = Struct('>I')
+_TAG_COUNT = Struct('>h')
+
+# the big-endian structs of the numbers by their data types
+_NUMBERS: Dict[int, Struct] = {h_type: Struct('>' + format_) for h_type, (format_, _) in _H_TYPE_FORMATS.items()}
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def _find_tag(data: Any, start: int, keys: Tuple[bytes, ...]) -> int:
+    """ Return the offset of the data type of the tag of the path (the encoded keys)
+        in the container at the start offset (its tag count) or -1 if there is no such tag
+    """
+    last = len(keys) - 1
+    for index, key in enumerate(keys):
+        tag_count, = _TAG_COUNT.unpack_from(data, start)
+        start += 2
+        length = len(key)
+        for _ in range(tag_count):
+            stop = start + 1 + data[start]
+            if stop - start == length and data[start:stop] == key:
+                break
+            start = _skip_value(data, stop + 1, data[stop])
+        else:
+            return -1
+        if index == last:
+            return stop
+        if data[stop] != HTypes.CONTAINER:
+            return -1
+        start = stop + 1
+    return -1
+
+
+class Predicate(ABC):
+    """ The condition of the raw bytes of an event, predicate(data, start) tells whether
+        the event at the start offset satisfies it without decoding the event
+
+        The predicates are combined by & (and), | (or) and ~ (not).
+    """
+
+    @abstractmethod
+    def __call__(self, data: Any, start: int = 0) -> bool:
+        pass
+
+    def __and__(self, other: 'Predicate') -> 'Predicate':
+        return _All(self, other)
+
+    def __or__(self, other: 'Predicate') -> 'Predicate':
+        return _Any(self, other)
+
+    def __invert__(self) -> 'Predicate':
+        return _Not(self)
+
+    def __bool__(self):
+        raise TypeError('The predicates have to be combined by &, | and ~ instead of and, or and not')
+
+
+class _All(Predicate):
+
+    def __init__(self, *predicates: Predicate) -> None:
+        self.predicates = tuple(_check(predicate) for predicate in predicates)
+
+    def __call__(self, data: Any, start: int = 0) -> bool:
+        for predicate in self.predicates:
+            if not predicate(data, start):
+                return False
+        return True
+
+    def __repr__(self):
+        return '(' + ' & '.join(map(repr, self.predicates)) + ')'
+
+
+class _Any(Predicate):
+
+    def __init__(self, *predicates: Predicate) -> None:
+        self.predicates = tuple(_check(predicate) for predicate in predicates)
+
+    def __call__(self, data: Any, start: int = 0) -> bool:
+        for predicate in self.predicates:
+            if predicate(data, start):
+                return True
+        return False
+
+    def __repr__(self):
+        return '(' + ' | '.join(map(repr, self.predicates)) + ')'
+
+
+class _Not(Predicate):
+
+    def __init__(self, predicate: Predicate) -> None:
+        self.predicate = _check(predicate)
+
+    def __call__(self, data: Any, start: int = 0) -> bool:
+        return not self.predicate(data, start)
+
+    def __repr__(self):
+        return f'~{self.predicate!r}'
+
+
+def _check(predicate: Any) -> Predicate:
+    if not isinstance(predicate, Predicate):
+        raise TypeError(f'The {predicate!r} is not Predicate')
+    return predicate
+
+
+class _Exists(Predicate):
+
+    def __init__(self, tag_: 'Tag') -> None:
+        self.tag = tag_
+
+    def __call__(self, data: Any, start: int = 0) -> bool:
+        return _find_tag(data, start + HEAD_STOP - 2, self.tag.keys) >= 0
+
+    def __repr__(self):
+        return f'{self.tag!r}.exists()'
+
+
+class _Comparison(Predicate):
+    """ The comparison of the value of a tag, the numbers are unpacked in place,
+        the strings (bytes or str encoded as UTF-8) and the UUIDs are compared with the raw bytes
+    """
+
+    def __init__(self, tag_: 'Tag', operator_: str, value: Any) -> None:
+        self.tag = tag_
+        self.operator = operator_
+        self.value = value
+        self._compare = _OPERATORS[operator_]
+        if value is None:
+            if operator_ not in ('==', '!='):
+                raise ValueError(f'The None has to be compared by == or !=, not {operator_}')
+            self._h_types: Tuple[int, ...] = tuple(HTypes)
+            self._target: Any = None
+        elif isinstance(value, (bool, int, float)):
+            self._h_types = tuple(_NUMBERS)
+            self._target = value
+        elif isinstance(value, (str, bytes)):
+            self._h_types = (HTypes.STRING,)
+            self._target = value.encode() if isinstance(value, str) else value
+        elif isinstance(value, UUID):
+            self._h_types = (HTypes.GUID,)
+            self._target = value.bytes
+        else:
+            raise TypeError(f'The {value!r} is not a number, a string, UUID or None')
+
+    def __call__(self, data: Any, start: int = 0) -> bool:
+        offset = _find_tag(data, start + HEAD_STOP - 2, self.tag.keys)
+        if offset < 0:
+            return False
+        h_type = data[offset]
+        if h_type not in self._h_types:
+            return False
+        offset += 1
+        target = self._target
+        if target is None:
+            return self._compare(h_type, HTypes.NULL)
+        elif h_type == HTypes.STRING:
+            length, = _LENGTH.unpack_from(data, offset)
+            offset += 4
+            if self.operator == '==':
+                return length == len(target) and data[offset:offset + length] == target
+            elif self.operator == '!=':
+                return length != len(target) or data[offset:offset + length] != target
+            return self._compare(bytes(data[offset:offset + length]), target)
+        elif h_type == HTypes.GUID:
+            return self._compare(bytes(data[offset:offset + 16]), target)
+        else:
+            return self._compare(_NUMBERS[h_type].unpack_from(data, offset)[0], target)
+
+    def __repr__(self):
+        return f'({self.tag!r} {self.operator} {self.value!r})'
+
+
+class Tag:
+    """ The tag of a path (a tuple of the nested keys or a dotted string) in the predicates
+
+        The comparisons of a tag with a number, a string, UUID or None make predicates:
+        tag('level') == 'Error', tag('elapsed') > 1000, tag('properties.host') != b'localhost'.
+        A missing tag or a value of another type satisfies none of them.
+    """
+
+    def __init__(self, path: Union[str, Iterable[str]]) -> None:
+        self.path: Path = _to_path(path)
+        self.keys = tuple(Key(check_tag_key(key)).bytes_ for key in self.path)
+
+    def exists(self) -> Predicate:
+        return _Exists(self)
+
+    def __eq__(self, value: Any) -> Predicate:  # type: ignore
+        return _Comparison(self, '==', value)
+
+    def __ne__(self, value: Any) -> Predicate:  # type: ignore
+        return _Comparison(self, '!=', value)
+
+    def __lt__(self, value: Any) -> Predicate:
+        return _Comparison(self, '<', value)
+
+    def __le__(self, value: Any) -> Predicate:
+        return _Comparison(self, '<=', value)
+
+    def __gt__(self, value: Any) -> Predicate:
+        return _Comparison(self, '>', value)
+
+    def __ge__(self, value: Any) -> Predicate:
+        return _Comparison(self, '>=', value)
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self):
+        return f'tag({self.path!r})'
+
+
+def tag(path: Union[str, Iterable[str]]) -> Tag:
+    """ Return the tag of the path for the predicates of iter_events(where=...)
+    """
+    return Tag(path)
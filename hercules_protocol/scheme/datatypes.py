@@ -2,7 +2,7 @@ from typing import Any, Union, Tuple
 from abc import abstractmethod
 from ctypes import c_char_p, c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double
 from uuid import UUID
-from ..datatypes import Vector
+from ..datatypes import Vector, get_vector_type
 
 
 class SimpleRepr(type):
@@ -132,49 +132,49 @@ class VectorDummy(Value):
 class VectorByte(Value):
     @staticmethod
     def verify(value: Vector) -> None:
-        if not isinstance(value, Vector) or value.type_ is not c_uint8:
+        if get_vector_type(value) is not c_uint8:
             raise TypeError(f'The {value} is not Vector of c_uint8')
 
 
 class VectorShort(Value):
     @staticmethod
     def verify(value: Vector) -> None:
-        if not isinstance(value, Vector) or value.type_ is not c_int16:
+        if get_vector_type(value) is not c_int16:
             raise TypeError(f'The {value} is not Vector of c_int16')
 
 
 class VectorInteger(Value):
     @staticmethod
     def verify(value: Vector) -> None:
-        if not isinstance(value, Vector) or value.type_ is not c_int32:
+        if get_vector_type(value) is not c_int32:
             raise TypeError(f'The {value} is not Vector of c_int32')
 
 
 class VectorLong(Value):
     @staticmethod
     def verify(value: Vector) -> None:
-        if not isinstance(value, Vector) or value.type_ is not c_int64:
+        if get_vector_type(value) is not c_int64:
             raise TypeError(f'The {value} is not Vector of c_int64')
 
 
 class VectorFlag(Value):
     @staticmethod
     def verify(value: Vector) -> None:
-        if not isinstance(value, Vector) or value.type_ is not c_bool:
+        if get_vector_type(value) is not c_bool:
             raise TypeError(f'The {value} is not Vector of c_bool')
 
 
 class VectorFloat(Value):
     @staticmethod
     def verify(value: Vector) -> None:
-        if not isinstance(value, Vector) or value.type_ is not c_float:
+        if get_vector_type(value) is not c_float:
             raise TypeError(f'The {value} is not Vector of c_float')
 
 
 class VectorDouble(Value):
     @staticmethod
     def verify(value: Vector) -> None:
-        if not isinstance(value, Vector) or value.type_ is not c_double:
+        if get_vector_type(value) is not c_double:
             raise TypeError(f'The {value} is not Vector of c_double')
 
 
@@ -0,0 +1,67 @@
+import sys
+import os
+import argparse
+from ..inference import infer_schemes, scheme_classes
+from .make import _pformat_import, _pformat_variable
+
+
+def _names(number: int) -> list:
+    return [f'scheme_{index}' for index in range(1, number + 1)] if number > 1 else ['scheme']
+
+
+def _pformat_report(inference, schemes: list) -> str:
+    result = [f'# {inference.events} events, {len(inference.shapes)} shapes']
+    for name, (_, count) in zip(_names(len(schemes)), schemes):
+        result.append(f'# {name}: {count} events ({count / inference.events:.2%})')
+    optional_tags = inference.optional_tags()
+    if optional_tags:
+        result.append('# optional tags:')
+        tags = inference.tags()
+        for path in optional_tags:
+            result.append(f"#     {'.'.join(path)}: {tags[path]['count']} events {tags[path]['types']}")
+    return '\n'.join(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Make the schemes of the concatenated events of the binary files for the hercules protocol',
+        prog='python3 -m hercules_protocol.scheme.infer'
+    )
+    parser.add_argument('binary_files', type=str, nargs='+', help='binary files of concatenated events')
+    parser.add_argument('-o', dest='module_file', type=str, help='output python module file', required=False)
+    parser.add_argument('-j', dest='processes', type=int, help='number of processes, CPUs by default', required=False)
+    parser.add_argument('-n', dest='top', type=int, default=1, help='number of the most frequent schemes')
+    options = parser.parse_args()
+
+    try:
+        inference = infer_schemes(options.binary_files, processes=options.processes)
+    except IOError as err:
+        print(str(err))
+        sys.exit(err.errno)
+    except ValueError as err:
+        print(str(err))
+        sys.exit(os.EX_DATAERR)
+
+    if not inference.events:
+        print('There are no events')
+        sys.exit(os.EX_DATAERR)
+
+    schemes = inference.schemes(options.top)
+    classes = sorted(set().union(*(scheme_classes(scheme) for scheme, _ in schemes)), key=lambda e: e.__name__)
+    variables = [_pformat_variable(name, scheme) for name, (scheme, _) in zip(_names(len(schemes)), schemes)]
+    module = '\n\n'.join([_pformat_report(inference, schemes), _pformat_import(tuple(classes))] + variables)
+
+    if options.module_file:
+        try:
+            with open(options.module_file, mode='x', encoding='utf-8') as mfh:
+                mfh.write(module)
+                mfh.write('\n')
+        except IOError as err:
+            print(str(err))
+            sys.exit(err.errno)
+    else:
+        print(module)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ import os
 import argparse
 from ..serialization import deserialize
 from ..extra_functions import make_scheme
+from ..codegen import generate_codec
 
 
 PAYLOAD_ELEMENT_NUMBER = 3
@@ -54,6 +55,8 @@ def main():
     )
     parser.add_argument('-b', dest='binary_file', type=str, help='binary file', required=True)
     parser.add_argument('-o', dest='module_file', type=str, help='output python module file', required=False)
+    parser.add_argument('-c', dest='codec', action='store_true', help='output the module of the codec of the scheme')
+    parser.add_argument('--native', dest='native', action='store_true', help='the codec of plain python values')
     options = parser.parse_args()
 
     binary_file = options.binary_file
@@ -80,20 +83,20 @@ def main():
         print(str(err))
         sys.exit(os.EX_SOFTWARE)
 
+    module = '\n\n'.join((_pformat_import(tuple(scheme_classes)), _pformat_variable('scheme', scheme)))
+    if options.codec:
+        module = generate_codec(scheme, native=options.native, scheme_source=module).rstrip('\n')
+
     if module_file:
         try:
             with open(module_file, mode='x', encoding='utf-8') as mfh:
-                mfh.write(_pformat_import(tuple(scheme_classes)))
-                mfh.write('\n')
-                mfh.write(_pformat_variable('scheme', scheme))
+                mfh.write(module)
                 mfh.write('\n')
         except IOError as err:
             print(str(err))
             sys.exit(err.errno)
     else:
-        print(_pformat_import(tuple(scheme_classes)))
-        print()
-        print(_pformat_variable('scheme', scheme))
+        print(module)
 
 
 if __name__ == '__main__':
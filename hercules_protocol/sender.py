@@ -0,0 +1,265 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urlsplit
+from queue import Queue, Full, Empty
+import random
+import threading
+import time
+from .datatypes import PTypes
+from .serialization import serialize_into
+from .codec import Codec
+from .adaptive import AdaptiveCodec
+from .batch import BATCH_COUNT
+
+BATCH_SIZE = 1024 * 1024
+MAX_QUEUE_SIZE = 100000
+
+# the statuses of the responses, which are retried
+_RETRY_STATUSES = frozenset((408, 429, 500, 502, 503, 504))
+
+
+class _Metrics:
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.sent_events = 0
+        self.sent_batches = 0
+        self.sent_bytes = 0
+        self.failed_events = 0
+        self.failed_batches = 0
+        self.dropped_events = 0
+        self.retries = 0
+        self.requests = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.last_error: Optional[str] = None
+
+    def request(self, latency: float) -> None:
+        with self.lock:
+            self.requests += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+
+class GateSender:
+    """ The sender of events to a Hercules Gate compatible HTTP endpoint
+
+        send() translates an event into bytes and puts it into the queue of max_queue_size events,
+        it waits while the queue is full (or drops the event with block=False).
+        The failures are counted by metrics() with the last error.
+        The connections threads take batches of batch_size bytes (the last event may exceed it)
+        and up to max_batch_events events from the queue, a batch is sent flush_interval seconds
+        after its first event at the latest.
+        Every thread keeps its own keep-alive connection, so up to connections requests are in flight.
+        A batch is the event count followed by the events (Hercules Gate batch), it is retried
+        retries times after the connection errors and the 408, 429 and 5xx statuses
+        with a full jitter exponential backoff of backoff seconds up to max_backoff seconds.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: Optional[str] = None,
+        scheme: Optional[Union[dict, Codec, AdaptiveCodec]] = None,
+        connections: int = 4,
+        max_queue_size: int = MAX_QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        max_batch_events: Optional[int] = None,
+        flush_interval: float = 1.0,
+        retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 5.0,
+        timeout: float = 10.0,
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError('The url has to be an http or https URL')
+        for name, value in (('connections', connections), ('max_queue_size', max_queue_size),
+                            ('batch_size', batch_size)):
+            if not isinstance(value, int) or value < 1:
+                raise ValueError(f'The {name} has to be a positive number')
+        if max_batch_events is not None and (not isinstance(max_batch_events, int) or max_batch_events < 1):
+            raise ValueError('The max_batch_events has to be a positive number')
+        if not isinstance(retries, int) or retries < 0:
+            raise ValueError("The retries mustn't be negative")
+
+        self.url = url
+        self.scheme = scheme
+        self.batch_size = batch_size
+        self.max_batch_events = max_batch_events
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self._connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self._headers = {'Content-Type': 'application/octet-stream', **(headers or {})}
+        if api_key is not None:
+            self._headers['apiKey'] = api_key
+
+        self._queue: Queue = Queue(max_queue_size)
+        self._metrics = _Metrics()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f'{type(self).__name__}-{index}', daemon=True)
+            for index in range(connections)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def send(
+        self,
+        version: int,
+        timestamp: int,
+        uuid_: UUID,
+        payload: Dict[str, PTypes],
+        block: bool = True,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """ Translate an event into bytes and put it into the queue,
+            return False if the queue is full and the event is dropped
+        """
+        if self._closed:
+            raise ValueError('The sender is closed')
+        out = bytearray()
+        if isinstance(self.scheme, (Codec, AdaptiveCodec)):
+            self.scheme.serialize_into(out, version, timestamp, uuid_, payload)
+        else:
+            serialize_into(out, version, timestamp, uuid_, payload, self.scheme)
+        try:
+            self._queue.put(bytes(out), block, timeout)
+        except Full:
+            with self._metrics.lock:
+                self._metrics.dropped_events += 1
+            return False
+        return True
+
+    def flush(self) -> None:
+        """ Wait until the queued events have been sent or have failed
+        """
+        self._queue.join()
+
+    def close(self) -> None:
+        """ Send the queued events and stop the connections threads
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def metrics(self) -> Dict[str, Any]:
+        """ Return the queue depth, the counters of the events, batches and retries and the request latency
+        """
+        metrics = self._metrics
+        with metrics.lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'sent_events': metrics.sent_events,
+                'sent_batches': metrics.sent_batches,
+                'sent_bytes': metrics.sent_bytes,
+                'failed_events': metrics.failed_events,
+                'failed_batches': metrics.failed_batches,
+                'dropped_events': metrics.dropped_events,
+                'retries': metrics.retries,
+                'requests': metrics.requests,
+                'latency_avg': metrics.latency_total / metrics.requests if metrics.requests else 0.0,
+                'latency_max': metrics.latency_max,
+                'last_error': metrics.last_error,
+            }
+
+    def _next_batch(self) -> Tuple[List[bytes], bool]:
+        """ Take the events of a batch from the queue, return them and whether the thread has to stop
+        """
+        event = self._queue.get()
+        if event is None:
+            self._queue.task_done()
+            return [], True
+        events, size = [event], len(event)
+        deadline = time.monotonic() + self.flush_interval
+        while size < self.batch_size and (self.max_batch_events is None or len(events) < self.max_batch_events):
+            try:
+                event = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except Empty:
+                break
+            if event is None:
+                self._queue.task_done()
+                return events, True
+            events.append(event)
+            size += len(event)
+        return events, False
+
+    def _run(self) -> None:
+        connection = None
+        stop = False
+        while not stop:
+            events, stop = self._next_batch()
+            if not events:
+                continue
+            try:
+                connection = self._post(connection, events)
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+        if connection is not None:
+            connection.close()
+
+    def _post(self, connection: Optional[HTTPConnection], events: List[bytes]) -> Optional[HTTPConnection]:
+        """ Send a batch with the retries, return the connection to reuse
+        """
+        body = BATCH_COUNT.pack(len(events)) + b''.join(events)
+        metrics = self._metrics
+        error = ''
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with metrics.lock:
+                    metrics.retries += 1
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))))
+            if connection is None:
+                connection = self._connection_class(self._host, self._port, timeout=self.timeout)
+            started = time.monotonic()
+            try:
+                connection.request('POST', self._path, body, self._headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, HTTPException) as err:
+                connection.close()
+                connection = None
+                error = f'{type(err).__name__}: {err}'
+                continue
+            metrics.request(time.monotonic() - started)
+            if response.will_close:
+                connection.close()
+                connection = None
+            if response.status < 300:
+                with metrics.lock:
+                    metrics.sent_events += len(events)
+                    metrics.sent_batches += 1
+                    metrics.sent_bytes += len(body)
+                return connection
+            error = f'HTTP {response.status} {response.reason}'
+            if response.status not in _RETRY_STATUSES:
+                break
+
+        with metrics.lock:
+            metrics.failed_events += len(events)
+            metrics.failed_batches += 1
+            metrics.last_error = error
+        return connection
+
+    def __enter__(self) -> 'GateSender':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self):
+        return f'{type(self).__name__}(url={self.url!r}, connections={len(self._threads)})'
@@ -1,19 +1,25 @@
-from typing import Iterator, Optional, Tuple, Dict, Union, Type, List
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Dict, Union, Type, List, Mapping
 from ctypes import c_char_p, c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double
 from uuid import UUID
-from struct import pack, unpack
-from itertools import chain
+from struct import Struct, pack, unpack_from, error as StructError
 from enum import Enum, IntEnum
+from functools import lru_cache
 from hercules_protocol.scheme import (
     Key,
 )
 from .datatypes import (
     PTypes,
     Vector,
+    ArrayVector,
+    np,
+    NUMPY_DTYPES,
+    get_vector_type,
+    ndarray_to_bytes,
     check_tag_key,
     check_version,
     check_timestamp,
 )
+from .interning import StringInterner
 
 
 class HTypes(IntEnum):
@@ -64,6 +70,28 @@ class HTypeSize(IntEnum):
 HEAD_FORMAT = '>Bq16sh'
 HEAD_STOP = 27
 
+_H_TYPE_SIZES: Dict[int, int] = {HTypes[name]: size for name, size in HTypeSize.__members__.items()}
+
+_H_TYPE_FORMATS: Dict[int, Tuple[str, Type[Union[c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double]]]] = {
+    HTypes.BYTE: ('B', c_uint8),
+    HTypes.SHORT: ('h', c_int16),
+    HTypes.INTEGER: ('i', c_int32),
+    HTypes.LONG: ('q', c_int64),
+    HTypes.FLAG: ('?', c_bool),
+    HTypes.FLOAT: ('f', c_float),
+    HTypes.DOUBLE: ('d', c_double),
+}
+
+_ARRAY_H_TYPES: Dict[type, int] = {
+    c_uint8: HTypes.BYTE,
+    c_int16: HTypes.SHORT,
+    c_int32: HTypes.INTEGER,
+    c_int64: HTypes.LONG,
+    c_bool: HTypes.FLAG,
+    c_float: HTypes.FLOAT,
+    c_double: HTypes.DOUBLE,
+}
+
 
 def _get_p_type(h_type: int) -> Type[PTypes]:
     if h_type == HTypes.CONTAINER:
@@ -94,101 +122,233 @@ def _get_p_type(h_type: int) -> Type[PTypes]:
         raise ValueError(f'Incorrect data type {h_type}')
 
 
+# the tag keys come from a small vocabulary, so they are checked and encoded (decoded) once per distinct key
+KEY_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
 def _pack_key(key: str) -> bytes:
     check_tag_key(key)
     return pack(f'>B{len(key)}s', len(key), bytes(key, 'ascii'))
 
 
-def _pack_value(value: PTypes, ikeys: Optional[Iterator[Key]] = None) -> List[bytes]:
-
-    def pack_vector_length(value: Vector) -> bytes:
-        return pack('>I', len(value))
-
-    def pack_string_vector(value: Vector) -> List[bytes]:
-        result = [HTypesBytes.STRING.value]
-        format_ = ['>I']
-        args = [len(value)]
-        for e in value:
-            format_.append(f'I{len(e.value)}s')
-            args.extend([len(e.value), e.value])
-        result.append(pack(''.join(format_), *args))
-        return result
-
-    def pack_vector(format_: str, value: Vector) -> bytes:
-        return pack(f'>I{len(value)}{format_}', len(value), *[e.value for e in value])
-
-    def get_vector(value: Vector) -> List[bytes]:
-        if value.type_ is c_uint8:
-            return [HTypesBytes.BYTE.value, pack_vector('B', value)]
-        elif value.type_ is c_int16:
-            return [HTypesBytes.SHORT.value, pack_vector('h', value)]
-        elif value.type_ is c_int32:
-            return [HTypesBytes.INTEGER.value, pack_vector('i', value)]
-        elif value.type_ is c_int64:
-            return [HTypesBytes.LONG.value, pack_vector('q', value)]
-        elif value.type_ is c_bool:
-            return [HTypesBytes.FLAG.value, pack_vector('?', value)]
-        elif value.type_ is c_float:
-            return [HTypesBytes.FLOAT.value, pack_vector('f', value)]
-        elif value.type_ is c_double:
-            return [HTypesBytes.DOUBLE.value, pack_vector('d', value)]
-        elif value.type_ is c_char_p:
-            return pack_string_vector(value)
-        elif value.type_ is UUID:
-            return [HTypesBytes.GUID.value, pack('>I', len(value))] + [e.bytes for e in value]
-        elif value.type_ is type(None):  # noqa: E721
-            return [HTypesBytes.NULL.value, pack_vector_length(value)]
-        elif value.type_ is Vector:
-            return [HTypesBytes.VECTOR.value, pack_vector_length(value)] + list(chain(*[get_vector(e) for e in value]))
-        elif value.type_ is dict:
-            return [HTypesBytes.CONTAINER, pack_vector_length(value)] + list(chain(*[get_container(e) for e in value]))
-        else:
-            raise ValueError(f'Incorrect data type {value.type_}')
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _decode_key(key: bytes) -> str:
+    return check_tag_key(str(key, 'utf-8'))
 
-    def get_container(value: Dict[str, PTypes]) -> List[bytes]:
-        if ikeys:
-            return (
-                [pack('>h', len(value))] +
-                list(chain(*[[next(ikeys).pack(k)] + get_value(v) for k, v in value.items()]))
-            )
-        else:
-            return (
-                [pack('>h', len(value))] +
-                list(chain(*[[_pack_key(k)] + get_value(v) for k, v in value.items()]))
-            )
 
-    def get_value(value: PTypes) -> List[bytes]:
-        if isinstance(value, c_uint8):
-            return [HTypesBytes.BYTE.value, pack('>B', value.value)]
-        elif isinstance(value, c_int16):
-            return [HTypesBytes.SHORT.value, pack('>h', value.value)]
-        elif isinstance(value, c_int32):
-            return [HTypesBytes.INTEGER.value, pack('>i', value.value)]
-        elif isinstance(value, c_int64):
-            return [HTypesBytes.LONG.value, pack('>q', value.value)]
-        elif isinstance(value, c_bool):
-            return [HTypesBytes.FLAG.value, pack('>?', value.value)]
-        elif isinstance(value, c_float):
-            return [HTypesBytes.FLOAT.value, pack('>f', value.value)]
-        elif isinstance(value, c_double):
-            return [HTypesBytes.DOUBLE.value, pack('>d', value.value)]
-        elif isinstance(value, c_char_p):
-            if value.value:
-                return [HTypesBytes.STRING.value, pack(f'>I{len(value.value)}s', len(value.value), value.value)]
+def key_cache_info() -> Dict[str, Any]:
+    """ Return the statistics (hits, misses, maxsize, currsize) of the caches of the encoded and decoded keys
+    """
+    return {'encode': _pack_key.cache_info(), 'decode': _decode_key.cache_info()}
+
+
+def key_cache_clear() -> None:
+    """ Clear the caches of the encoded and decoded keys and their statistics
+    """
+    _pack_key.cache_clear()
+    _decode_key.cache_clear()
+
+
+Writer = Callable[[bytearray, Any], None]
+
+_LENGTH = Struct('>I')
+_TAG_COUNT = Struct('>h')
+_VECTOR_HEAD = Struct('>BI')          # the type of the elements and the length of a vector
+_NESTED_VECTOR_HEAD = Struct('>BBI')  # the type of a vector, the type of the elements and the length
+_CONTAINER_HEAD = Struct('>Bh')       # the type of a container and the count of the tags
+_STRING_HEAD = Struct('>BI')          # the type of a string and its length
+_NESTED_TYPES: Dict[type, int] = {Vector: HTypes.VECTOR, dict: HTypes.CONTAINER}
+
+
+def _make_scalar_writer(h_type: int, format_: str) -> Writer:
+    struct_ = Struct('>B' + format_)
+
+    def write(out: bytearray, value: Any) -> None:
+        out += struct_.pack(h_type, value.value)
+
+    return write
+
+
+def _write_string(out: bytearray, value: c_char_p) -> None:
+    string = value.value or b''
+    out += _STRING_HEAD.pack(HTypes.STRING, len(string))
+    out += string
+
+
+def _write_uuid(out: bytearray, value: UUID) -> None:
+    out += HTypesBytes.GUID.value
+    out += value.bytes
+
+
+def _write_null(out: bytearray, value: None) -> None:
+    out += HTypesBytes.NULL.value
+
+
+def _make_fixed_vector_writer(h_type: int, format_: str) -> Writer:
+
+    def write(out: bytearray, value: Vector) -> None:
+        out += pack(f'>BI{len(value)}{format_}', h_type, len(value), *[e.value for e in value])
+
+    return write
+
+
+def _write_string_vector(out: bytearray, value: Vector) -> None:
+    out += _VECTOR_HEAD.pack(HTypes.STRING, len(value))
+    for element in value:
+        string = element.value or b''
+        out += _LENGTH.pack(len(string))
+        out += string
+
+
+def _write_uuid_vector(out: bytearray, value: Vector) -> None:
+    out += _VECTOR_HEAD.pack(HTypes.GUID, len(value))
+    for element in value:
+        out += element.bytes
+
+
+def _write_null_vector(out: bytearray, value: Vector) -> None:
+    out += _VECTOR_HEAD.pack(HTypes.NULL, len(value))
+
+
+# the writers of the bodies of the vectors (without the type byte of a vector) by the type of the elements
+_VECTOR_WRITERS: Dict[type, Writer] = {
+    **{object_: _make_fixed_vector_writer(h_type, format_) for h_type, (format_, object_) in _H_TYPE_FORMATS.items()},
+    c_char_p: _write_string_vector,
+    UUID: _write_uuid_vector,
+    type(None): _write_null_vector,
+}
+
+
+def _write_vector_body(out: bytearray, value: Vector) -> None:
+    try:
+        write = _VECTOR_WRITERS[value.type_]
+    except KeyError:
+        raise ValueError(f'Incorrect data type {value.type_}') from None
+    write(out, value)
+
+
+def _write_array_vector_body(out: bytearray, value: ArrayVector) -> None:
+    out += _VECTOR_HEAD.pack(_ARRAY_H_TYPES[value.type_], len(value))
+    out += value.to_bytes()
+
+
+def _write_ndarray_body(out: bytearray, value: Any) -> None:
+    type_ = get_vector_type(value)
+    if type_ is None:
+        raise ValueError(f'Incorrect data type {value.dtype} of {value.ndim}-dimensional array')
+    out += _VECTOR_HEAD.pack(_ARRAY_H_TYPES[type_], len(value))
+    out += ndarray_to_bytes(value, type_)
+
+
+def _make_vector_writer(write_body: Writer) -> Writer:
+
+    def write(out: bytearray, value: Any) -> None:
+        out += HTypesBytes.VECTOR.value
+        write_body(out, value)
+
+    return write
+
+
+# the writers of the bodies of the vectors, which are elements of a vector of vectors
+_BODY_WRITERS: Dict[type, Writer] = {
+    Vector: _write_vector_body,
+    ArrayVector: _write_array_vector_body,
+}
+
+# the writers of the type byte and the value of a tag, except containers and vectors of vectors and containers
+_WRITERS: Dict[type, Writer] = {
+    **{object_: _make_scalar_writer(h_type, format_) for h_type, (format_, object_) in _H_TYPE_FORMATS.items()},
+    c_char_p: _write_string,
+    UUID: _write_uuid,
+    type(None): _write_null,
+    Vector: _make_vector_writer(_write_vector_body),
+    ArrayVector: _make_vector_writer(_write_array_vector_body),
+}
+
+if np is not None:
+    _BODY_WRITERS[np.ndarray] = _write_ndarray_body
+    _WRITERS[np.ndarray] = _make_vector_writer(_write_ndarray_body)
+
+
+def _get_writer(writers: Dict[type, Writer], type_: type) -> Writer:
+    writer = writers.get(type_)
+    if writer is None:
+        for base in type_.__mro__[1:]:
+            if base in writers:
+                return writers[base]
+        raise ValueError(f'Incorrect data type {type_}')
+    return writer
+
+
+def _write_payload(out: bytearray, payload: Dict[str, PTypes], ikeys: Optional[Iterator[Key]] = None) -> None:
+    """ Write the tags of the payload into the buffer
+
+        The nested containers and vectors of vectors or containers are written in one loop
+        with a stack of the iterators of their items, not by a call of a closure per value.
+        The type of the items of an iterator is None for the tags of a container,
+        or the type of the elements of a vector.
+    """
+    stack: List[Tuple[Optional[type], Iterator[Any]]] = [(None, iter(payload.items()))]
+    while stack:
+        type_, items = stack[-1]
+        for item in items:
+            if type_ is None:
+                key, value = item
+                out += next(ikeys).pack(key) if ikeys else _pack_key(key)
+                if isinstance(value, dict):
+                    out += _CONTAINER_HEAD.pack(HTypes.CONTAINER, len(value))
+                    stack.append((None, iter(value.items())))
+                    break
+                elif isinstance(value, Vector) and value.type_ in _NESTED_TYPES:
+                    out += _NESTED_VECTOR_HEAD.pack(HTypes.VECTOR, _NESTED_TYPES[value.type_], len(value))
+                    stack.append((value.type_, iter(value)))
+                    break
+                else:
+                    _get_writer(_WRITERS, type(value))(out, value)
+            elif type_ is dict:
+                if not isinstance(item, dict):
+                    raise ValueError(f'Incorrect data type {type(item)}')
+                out += _TAG_COUNT.pack(len(item))
+                stack.append((None, iter(item.items())))
+                break
+            elif isinstance(item, Vector) and item.type_ in _NESTED_TYPES:
+                out += _VECTOR_HEAD.pack(_NESTED_TYPES[item.type_], len(item))
+                stack.append((item.type_, iter(item)))
+                break
             else:
-                return [HTypesBytes.STRING.value, b'\x00\x00\x00\x00']
-        elif isinstance(value, UUID):
-            return [HTypesBytes.GUID.value, value.bytes]
-        elif value is None:
-            return [HTypesBytes.NULL.value]
-        elif isinstance(value, Vector):
-            return [HTypesBytes.VECTOR.value] + get_vector(value)
-        elif isinstance(value, dict):
-            return [HTypesBytes.CONTAINER.value] + get_container(value)
+                _get_writer(_BODY_WRITERS, type(item))(out, item)
         else:
-            raise ValueError(f'Incorrect data type {type(value)}')
+            stack.pop()
 
-    return get_value(value)
+
+def serialize_into(
+    out: bytearray,
+    version: int,
+    timestamp: int,
+    uuid_: UUID,
+    payload: Dict[str, PTypes],
+    scheme: Optional[dict] = None
+) -> None:
+    """ Translate a data structure into bytes appended to the buffer,
+        the buffer is left as it was if the data structure can't be translated
+    """
+    check_version(version)
+    check_timestamp(timestamp)
+    if not isinstance(payload, dict):
+        raise ValueError('The payload has to be a dict')
+
+    start = len(out)
+    try:
+        out += pack(HEAD_FORMAT, version, timestamp, uuid_.bytes, len(payload))
+        if scheme:
+            _verify(payload, scheme)
+            _write_payload(out, payload, make_iterator_of_keys(scheme))
+        else:
+            _write_payload(out, payload)
+    except Exception:
+        del out[start:]
+        raise
 
 
 def serialize(
@@ -200,23 +360,116 @@ def serialize(
 ) -> bytes:
     """ Translate a data structure into bytes
     """
+    out = bytearray()
+    serialize_into(out, version, timestamp, uuid_, payload, scheme)
+    return bytes(out)
+
+
+# the sizes of the type byte and the value of a tag and of the bodies of the vectors, as the writers write them
+_FIXED_SIZES: Dict[type, int] = {
+    **{object_: 1 + _H_TYPE_SIZES[h_type] for h_type, (_, object_) in _H_TYPE_FORMATS.items()},
+    UUID: 1 + HTypeSize.GUID,
+    type(None): 1,
+}
+_SIZES: Dict[type, Callable[[Any], int]] = {
+    **{
+        object_: lambda value, size=1 + _H_TYPE_SIZES[h_type]: size  # type: ignore
+        for h_type, (_, object_) in _H_TYPE_FORMATS.items()
+    },
+    c_char_p: lambda value: 5 + len(value.value or b''),
+    UUID: lambda value: 1 + HTypeSize.GUID,
+    type(None): lambda value: 1,
+}
+
+
+def _vector_body_size(value: Vector) -> int:
+    type_ = value.type_
+    if type_ in _ARRAY_H_TYPES:
+        return 5 + len(value) * _H_TYPE_SIZES[_ARRAY_H_TYPES[type_]]
+    elif type_ is c_char_p:
+        return 5 + 4 * len(value) + sum(len(element.value or b'') for element in value)
+    elif type_ is UUID:
+        return 5 + len(value) * HTypeSize.GUID
+    elif type_ is type(None):
+        return 5
+    raise ValueError(f'Incorrect data type {type_}')
+
+
+def _make_vector_size(body_size: Callable[[Any], int]) -> Callable[[Any], int]:
+
+    def size(value: Any) -> int:
+        return 1 + body_size(value)
+
+    return size
+
+
+def _ndarray_body_size(value: Any) -> int:
+    type_ = get_vector_type(value)
+    if type_ is None:
+        raise ValueError(f'Incorrect data type {value.dtype} of {value.ndim}-dimensional array')
+    return 5 + len(value) * _H_TYPE_SIZES[_ARRAY_H_TYPES[type_]]
+
+
+_BODY_SIZES: Dict[type, Callable[[Any], int]] = {
+    Vector: _vector_body_size,
+    ArrayVector: lambda value: 5 + len(value) * _H_TYPE_SIZES[_ARRAY_H_TYPES[value.type_]],
+}
+if np is not None:
+    _BODY_SIZES[np.ndarray] = _ndarray_body_size
+_SIZES.update({type_: _make_vector_size(body_size) for type_, body_size in _BODY_SIZES.items()})
+
+
+def _payload_size(payload: Dict[str, PTypes]) -> int:
+    """ Sum the sizes of the tags of the payload
+
+        As _write_payload does, the nested containers and vectors of vectors or containers
+        are taken from a stack, the type of an item is None for a container
+        or the type of the elements of a vector.
+    """
+    size = 0
+    stack: List[Tuple[Optional[type], Any]] = [(None, payload)]
+    while stack:
+        type_, value = stack.pop()
+        if type_ is None:
+            size += 2
+            for key, item in value.items():
+                size += len(_pack_key(key))
+                fixed = _FIXED_SIZES.get(type(item))
+                if fixed is not None:
+                    size += fixed
+                elif type(item) is c_char_p:
+                    size += 5 + len(item.value or b'')
+                elif isinstance(item, dict):
+                    size += 1
+                    stack.append((None, item))
+                elif isinstance(item, Vector) and item.type_ in _NESTED_TYPES:
+                    size += 1 + _VECTOR_HEAD.size
+                    stack.extend((item.type_, element) for element in item)
+                else:
+                    size += _get_writer(_SIZES, type(item))(item)  # type: ignore
+        elif type_ is dict:
+            if not isinstance(value, dict):
+                raise ValueError(f'Incorrect data type {type(value)}')
+            stack.append((None, value))
+        elif isinstance(value, Vector) and value.type_ in _NESTED_TYPES:
+            size += _VECTOR_HEAD.size
+            stack.extend((value.type_, element) for element in value)
+        else:
+            size += _get_writer(_BODY_SIZES, type(value))(value)  # type: ignore
+    return size
+
+
+def serialized_size(version: int, timestamp: int, uuid_: UUID, payload: Dict[str, PTypes]) -> int:
+    """ Return the length of the bytes of serialize without translating the data structure
+
+        The length is the head, the keys, the sizes of the fixed-width values
+        and the lengths of the strings and vectors.
+    """
     check_version(version)
     check_timestamp(timestamp)
     if not isinstance(payload, dict):
         raise ValueError('The payload has to be a dict')
-
-    result: List[bytes] = [pack(HEAD_FORMAT, version, timestamp, uuid_.bytes, len(payload))]
-    if scheme:
-        _verify(payload, scheme)
-        ikeys = make_iterator_of_keys(scheme)
-        for key, value in payload.items():
-            result.append(next(ikeys).pack(key))
-            result.extend(_pack_value(value, ikeys))
-    else:
-        for key, value in payload.items():
-            result.append(_pack_key(key))
-            result.extend(_pack_value(value))
-    return b''.join(result)
+    return HEAD_STOP - 2 + _payload_size(payload)
 
 
 # ----------------------------------------------------------------------------------------------
@@ -226,28 +479,63 @@ def _unpack_key(data: bytes, start: int) -> Tuple[int, str]:
     lenght_of_key = data[start]
     start += 1
     stop = start + lenght_of_key
-    key, = unpack(f'>{lenght_of_key}s', data[start:stop])
-    return stop, check_tag_key(key.decode())
+    key = data[start:stop]
+    # the slices of a bytearray or a memoryview are not hashable
+    return stop, _decode_key(key if type(key) is bytes else bytes(key))
 
 
-def _unpack_value(data: bytes, start: int, ikeys: Optional[Iterator[Key]] = None) -> Tuple[int, PTypes]:
+def _check_slice(data: Any, start: int, stop: int) -> None:
+    """ Raise struct.error as unpack_from does if the slice of a value, which is not unpacked, exceeds the data
+    """
+    if stop > len(data):
+        raise StructError(
+            f'unpack_from requires a buffer of at least {stop} bytes for unpacking {stop - start} bytes '
+            f'at offset {start} (actual buffer size is {len(data)})'
+        )
+
+
+def _unpack_value(
+    data: Any,
+    start: int,
+    ikeys: Optional[Iterator[Key]] = None,
+    view_threshold: Optional[int] = None,
+    native: bool = False,
+    arrays: bool = False,
+    numpy: bool = False,
+    interner: Optional[StringInterner] = None
+) -> Tuple[int, Union[PTypes, list, memoryview]]:
 
     def get_h_type(start: int) -> Tuple[int, int]:
         return start + 1, data[start]
 
     def get_length(start: int) -> Tuple[int, int]:
-        stop = start + 4
-        return stop, unpack('>I', data[start:stop])[0]
+        return start + 4, unpack_from('>I', data, start)[0]
 
     def get_tag_count(start: int) -> Tuple[int, int]:
-        stop = start + 2
-        return stop, unpack('>h', data[start:stop])[0]
+        return start + 2, unpack_from('>h', data, start)[0]
 
-    def get_vector(start: int) -> Tuple[int, Vector]:
+    def get_vector(start: int) -> Tuple[int, Union[Vector, list, memoryview, ArrayVector]]:
         start, h_type = get_h_type(start)
-        result = Vector([], _get_p_type(h_type))
-        value: PTypes
         start, len_of_vector = get_length(start)
+        if h_type in _H_TYPE_FORMATS:
+            format_, object_ = _H_TYPE_FORMATS[h_type]
+            stop = start + len_of_vector * _H_TYPE_SIZES[h_type]
+            _check_slice(data, start, stop)
+            if h_type == HTypes.BYTE and view_threshold is not None and len_of_vector >= view_threshold:
+                return stop, data[start:stop]
+            if numpy:
+                return stop, np.frombuffer(data, NUMPY_DTYPES[object_], len_of_vector, start)
+            if arrays:
+                return stop, ArrayVector.from_bytes(memoryview(data)[start:stop], object_)
+            if native and len_of_vector:
+                return stop, list(unpack_from(f'>{len_of_vector}{format_}', data, start))
+            vector = Vector([], object_)
+            vector.extend(map(object_, unpack_from(f'>{len_of_vector}{format_}', data, start)))
+            return stop, vector
+
+        # the empty vectors keep the element type even in the native data structure
+        result: list = [] if native and len_of_vector else Vector([], _get_p_type(h_type))
+        value: Union[PTypes, list, memoryview]
         for _ in range(len_of_vector):
             start, value = get_value(start, h_type)
             result.append(value)
@@ -255,7 +543,7 @@ def _unpack_value(data: bytes, start: int, ikeys: Optional[Iterator[Key]] = None
 
     def get_container(start: int) -> Tuple[int, dict]:
         result = {}
-        value: PTypes
+        value: Union[PTypes, list, memoryview]
         start, tag_count = get_tag_count(start)
         for _ in range(tag_count):
             if ikeys:
@@ -266,7 +554,7 @@ def _unpack_value(data: bytes, start: int, ikeys: Optional[Iterator[Key]] = None
             result[key] = value
         return start, result
 
-    def get_value(start: int, h_type) -> Tuple[int, PTypes]:
+    def get_value(start: int, h_type) -> Tuple[int, Union[PTypes, list, memoryview]]:
 
         def unpack_(
                 start: int,
@@ -274,19 +562,24 @@ def _unpack_value(data: bytes, start: int, ikeys: Optional[Iterator[Key]] = None
                 format_: str,
                 object_: Type[Union[c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double]]
         ) -> Tuple[int, PTypes]:
-            stop = start + htype_size
-            result, = unpack(format_, data[start:stop])
-            return stop, object_(result)
+            result, = unpack_from(format_, data, start)
+            return start + htype_size, result if native else object_(result)
 
-        def unpack_string(start: int) -> Tuple[int, c_char_p]:
+        def unpack_string(start: int) -> Tuple[int, Union[c_char_p, memoryview]]:
             start, length = get_length(start)
             stop = start + length
-            result, = unpack(f'>{length}s', data[start:stop])
-            return stop, c_char_p(result)
+            if view_threshold is not None and length >= view_threshold:
+                _check_slice(data, start, stop)
+                return stop, data[start:stop]
+            result, = unpack_from(f'>{length}s', data, start)
+            if interner is not None and length <= interner.max_length:
+                result = interner.intern(result)
+            return stop, result if native else c_char_p(result)
 
         def unpack_uuid(start: int) -> Tuple[int, UUID]:
             stop = start + HTypeSize.GUID
-            return stop, UUID(bytes=data[start:stop])
+            result, = unpack_from('>16s', data, start)
+            return stop, UUID(bytes=result)
 
         if h_type == HTypes.BYTE:
             return unpack_(start, HTypeSize.BYTE, '>B', c_uint8)
@@ -318,33 +611,193 @@ def _unpack_value(data: bytes, start: int, ikeys: Optional[Iterator[Key]] = None
     return get_value(*get_h_type(start))
 
 
-def deserialize(data: bytes, scheme: Optional[dict] = None) -> Tuple[int, int, UUID, Dict[str, PTypes]]:
-    """ Translate bytes into a data structure
+Path = Tuple[str, ...]
+
+# the tree of the requested tags: the nested tree of a key or None for its whole value
+Fields = Dict[str, Optional[dict]]
+
+
+def _to_path(path: Union[str, Iterable[str]]) -> Path:
+    """ A path of the nested keys is a tuple of them or a dotted string (when the keys have no dots)
+    """
+    result = tuple(path.split('.')) if isinstance(path, str) else tuple(path)
+    if not result or not all(isinstance(key, str) and key for key in result):
+        raise ValueError(f'The path {path!r} has to be a dotted string or a tuple of keys')
+    return result
+
+
+def _make_fields(fields: Iterable[Union[str, Iterable[str]]]) -> Fields:
+    """ Make the tree of the paths, a path covers the paths of its nested tags
+    """
+    if isinstance(fields, str):
+        raise TypeError('The fields have to be a collection of paths, not a string')
+    tree: Fields = {}
+    for path in fields:
+        path = _to_path(path)
+        node = tree
+        for key in path[:-1]:
+            if key in node and node[key] is None:
+                break
+            node = node.setdefault(key, {})  # type: ignore
+        else:
+            node[path[-1]] = None
+    return tree
+
+
+def _unpack_fields(data: bytes, start: int, fields: Fields, options: Dict[str, Any]) -> Tuple[int, dict]:
+    """ Decode the tags of the fields of a container from its tag count, skip the other tags
+    """
+    tag_count, = unpack_from('>h', data, start)
+    start += 2
+    result = {}
+    for _ in range(tag_count):
+        start, key = _unpack_key(data, start)
+        h_type = data[start]
+        if key in fields:
+            nested = fields[key]
+            if nested is None:
+                start, result[key] = _unpack_value(data, start, **options)
+                continue
+            elif h_type == HTypes.CONTAINER:
+                start, result[key] = _unpack_fields(data, start + 1, nested, options)
+                continue
+        start = _skip_value(data, start + 1, h_type)
+    return start, result
+
+
+def _deserialize_fields_from(
+    data: bytes, start: int, fields: Fields, options: Dict[str, Any]
+) -> Tuple[int, Tuple[int, int, UUID, Dict[str, PTypes]]]:
+    if options['view_threshold'] is not None and not isinstance(data, memoryview):
+        data = memoryview(data)  # type: ignore
+    version, timestamp, uuid_bytes, _ = unpack_from(HEAD_FORMAT, data, start)
+    check_version(version)
+    check_timestamp(timestamp)
+    start, payload = _unpack_fields(data, start + HEAD_STOP - 2, fields, options)
+    return start, (version, timestamp, UUID(bytes=uuid_bytes), payload)
+
+
+def deserialize_from(
+    data: bytes,
+    start: int = 0,
+    scheme: Optional[dict] = None,
+    view_threshold: Optional[int] = None,
+    native: bool = False,
+    arrays: bool = False,
+    numpy: bool = False,
+    interner: Optional[StringInterner] = None,
+    fields: Optional[Iterable[Union[str, Iterable[str]]]] = None
+) -> Tuple[int, Tuple[int, int, UUID, Dict[str, PTypes]]]:
+    """ Translate bytes from the start offset into a data structure,
+        return the offset of the end of the event and the data structure
+
+        Strings and vectors of bytes of at least view_threshold bytes are
+        memoryview slices of the data instead of copies.
+        The native data structure has int, float, bool, bytes, UUID, None,
+        list and dict values instead of ctypes objects and Vector, the empty vectors
+        are empty Vector of their element type.
+        With arrays the vectors of numbers are ArrayVector,
+        with numpy they are big-endian NumPy arrays over the data.
+        The repeated short strings are shared objects of the interner.
+        With fields (the paths of the tags: tuples of the nested keys or dotted strings)
+        only their tags are decoded, the other tags are skipped by their lengths.
     """
-    version, timestamp, uuid_bytes, tag_count = unpack(HEAD_FORMAT, data[:HEAD_STOP])
+    if numpy and np is None:
+        raise ImportError('The numpy arrays require NumPy')
+    if native and scheme:
+        raise ValueError("The native values mustn't be used with a scheme, compile it with native=True")
+    if fields is not None:
+        if scheme:
+            raise ValueError("The fields mustn't be used with a scheme")
+        options = {
+            'view_threshold': view_threshold, 'native': native, 'arrays': arrays, 'numpy': numpy, 'interner': interner
+        }
+        return _deserialize_fields_from(data, start, _make_fields(fields), options)
+    if view_threshold is not None:
+        if scheme:
+            raise ValueError("The views mustn't be used with a scheme")
+        if not isinstance(data, memoryview):
+            data = memoryview(data)  # type: ignore
+    version, timestamp, uuid_bytes, tag_count = unpack_from(HEAD_FORMAT, data, start)
     check_version(version)
     check_timestamp(timestamp)
 
-    payload: Dict[str, PTypes] = {}
-    start = HEAD_STOP
+    payload: Dict[str, Union[PTypes, list, memoryview]] = {}
+    start += HEAD_STOP
     if scheme:
         ikeys = make_iterator_of_keys(scheme)
         for _ in range(tag_count):
             start, key = next(ikeys).unpack(data, start)
-            start, value = _unpack_value(data, start, ikeys)
+            start, value = _unpack_value(data, start, ikeys, arrays=arrays, numpy=numpy, interner=interner)
             payload[key] = value
 
         _verify(payload, scheme)
     else:
         for _ in range(tag_count):
             start, key = _unpack_key(data, start)
-            start, value = _unpack_value(data, start)
+            start, value = _unpack_value(
+                data, start,
+                view_threshold=view_threshold, native=native, arrays=arrays, numpy=numpy, interner=interner
+            )
             payload[key] = value
 
-    return version, timestamp, UUID(bytes=uuid_bytes), payload
+    return start, (version, timestamp, UUID(bytes=uuid_bytes), payload)  # type: ignore
+
+
+def deserialize(
+    data: bytes,
+    scheme: Optional[dict] = None,
+    view_threshold: Optional[int] = None,
+    native: bool = False,
+    arrays: bool = False,
+    numpy: bool = False,
+    interner: Optional[StringInterner] = None,
+    fields: Optional[Iterable[Union[str, Iterable[str]]]] = None
+) -> Tuple[int, int, UUID, Dict[str, PTypes]]:
+    """ Translate bytes into a data structure, only the tags of the fields if they are passed
+    """
+    return deserialize_from(data, 0, scheme, view_threshold, native, arrays, numpy, interner, fields)[1]
+
+
+def _skip_value(data: Any, start: int, h_type: int) -> int:
+    """ Return the offset of the end of the value without decoding it
+    """
+    if h_type in _H_TYPE_SIZES:
+        return start + _H_TYPE_SIZES[h_type]
+    elif h_type == HTypes.STRING:
+        return start + 4 + unpack_from('>I', data, start)[0]
+    elif h_type == HTypes.VECTOR:
+        h_type = data[start]
+        len_of_vector, = unpack_from('>I', data, start + 1)
+        start += 5
+        if h_type in _H_TYPE_SIZES:
+            return start + len_of_vector * _H_TYPE_SIZES[h_type]
+        for _ in range(len_of_vector):
+            start = _skip_value(data, start, h_type)
+        return start
+    elif h_type == HTypes.CONTAINER:
+        return _skip_container(data, start)
+    else:
+        raise ValueError(f'Incorrect data type {h_type}')
+
+
+def _skip_container(data: Any, start: int) -> int:
+    tag_count, = unpack_from('>h', data, start)
+    start += 2
+    for _ in range(tag_count):
+        start += 1 + data[start]
+        start = _skip_value(data, start + 1, data[start])
+    return start
+
+
+def _skip_event(data: Any, start: int) -> int:
+    """ Return the offset of the end of the event without decoding it,
+        the offset may be greater than the length of the data if the event is incomplete
+    """
+    return _skip_container(data, start + HEAD_STOP - 2)
 
 
-def _verify(payload: Dict[str, PTypes], scheme: dict) -> None:
+def _verify(payload: Mapping[str, Union[PTypes, list, memoryview]], scheme: dict) -> None:
 
     def _verify_list(payload_list: list, scheme_list: list) -> None:
         if len(payload_list) != len(scheme_list):
@@ -368,7 +821,7 @@ def _verify(payload: Dict[str, PTypes], scheme: dict) -> None:
             else:
                 scheme_element.verify(payload_element)
 
-    def _verify_dict(payload_dict: dict, scheme_dict: dict) -> None:
+    def _verify_dict(payload_dict: Mapping, scheme_dict: dict) -> None:
         if len(payload_dict) != len(scheme_dict):
             raise ValueError('The payload container and the scheme container have to have the same length')
 
@@ -0,0 +1,172 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from ctypes import c_char_p, c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double
+from uuid import UUID
+from struct import unpack_from
+from hercules_protocol.scheme import (
+    Key,
+    Byte,
+    Short,
+    Integer,
+    Long,
+    Flag,
+    Float,
+    Double,
+    String,
+    Guid,
+    Null,
+    ContainerDummy,
+    VectorDummy,
+    VectorByte,
+    VectorShort,
+    VectorInteger,
+    VectorLong,
+    VectorFlag,
+    VectorFloat,
+    VectorDouble,
+    VectorString,
+    VectorGuid,
+    VectorNull,
+)
+from .datatypes import Vector, ArrayVector, get_vector_type, check_version
+from .serialization import HTypes, HEAD_STOP, _ARRAY_H_TYPES, _get_p_type, _unpack_key, _skip_value
+
+# The shape of a value is its Hercules type for the scalars,
+# (CONTAINER, ((key, shape), ...)) for the containers,
+# (VECTOR, type of the elements) for the vectors of scalars and
+# (VECTOR, type of the elements, (shape, ...)) for the vectors of vectors and containers.
+Shape = Union[int, tuple]
+
+_SCALAR_SCHEMES: Dict[int, type] = {
+    HTypes.BYTE: Byte,
+    HTypes.SHORT: Short,
+    HTypes.INTEGER: Integer,
+    HTypes.LONG: Long,
+    HTypes.FLAG: Flag,
+    HTypes.FLOAT: Float,
+    HTypes.DOUBLE: Double,
+    HTypes.STRING: String,
+    HTypes.GUID: Guid,
+    HTypes.NULL: Null,
+}
+
+_VECTOR_SCHEMES: Dict[int, type] = {
+    HTypes.BYTE: VectorByte,
+    HTypes.SHORT: VectorShort,
+    HTypes.INTEGER: VectorInteger,
+    HTypes.LONG: VectorLong,
+    HTypes.FLAG: VectorFlag,
+    HTypes.FLOAT: VectorFloat,
+    HTypes.DOUBLE: VectorDouble,
+    HTypes.STRING: VectorString,
+    HTypes.GUID: VectorGuid,
+    HTypes.NULL: VectorNull,
+}
+
+
+def _value_shape(data: Any, start: int, h_type: int) -> Tuple[int, Shape]:
+    if h_type == HTypes.CONTAINER:
+        return _container_shape(data, start)
+    elif h_type == HTypes.VECTOR:
+        element_type = data[start]
+        if element_type == HTypes.CONTAINER or element_type == HTypes.VECTOR:
+            len_of_vector, = unpack_from('>I', data, start + 1)
+            start += 5
+            elements = []
+            for _ in range(len_of_vector):
+                start, shape = _value_shape(data, start, element_type)
+                elements.append(shape)
+            return start, (HTypes.VECTOR, element_type, tuple(elements))
+        _get_p_type(element_type)
+        return _skip_value(data, start, h_type), (HTypes.VECTOR, element_type)
+    else:
+        return _skip_value(data, start, h_type), h_type
+
+
+def _container_shape(data: Any, start: int) -> Tuple[int, Shape]:
+    tag_count, = unpack_from('>h', data, start)
+    start += 2
+    tags = []
+    for _ in range(tag_count):
+        start, key = _unpack_key(data, start)
+        start, shape = _value_shape(data, start + 1, data[start])
+        tags.append((key, shape))
+    return start, (HTypes.CONTAINER, tuple(tags))
+
+
+def _event_shape_from(data: Any, start: int) -> Tuple[int, Shape]:
+    check_version(data[start])
+    return _container_shape(data, start + HEAD_STOP - 2)
+
+
+_P_H_TYPES: Dict[type, int] = {
+    c_uint8: HTypes.BYTE,
+    c_int16: HTypes.SHORT,
+    c_int32: HTypes.INTEGER,
+    c_int64: HTypes.LONG,
+    c_bool: HTypes.FLAG,
+    c_float: HTypes.FLOAT,
+    c_double: HTypes.DOUBLE,
+    c_char_p: HTypes.STRING,
+    UUID: HTypes.GUID,
+    type(None): HTypes.NULL,
+}
+
+
+def _payload_shape(value: Any) -> Optional[Shape]:
+    """ Return the shape of a value of a payload, as the encoder writes it,
+        or None if it is not a value of the exact types of the data model
+    """
+    type_ = type(value)
+    h_type = _P_H_TYPES.get(type_)
+    if h_type is not None:
+        return h_type
+    elif type_ is dict:
+        # the types of the scalars are looked up at once, the containers and the vectors one by one
+        shapes: List[Optional[Shape]] = list(map(_P_H_TYPES.get, map(type, value.values())))
+        if None in shapes:
+            for index, element in enumerate(value.values()):
+                if shapes[index] is None:
+                    shapes[index] = _payload_shape(element)
+                    if shapes[index] is None:
+                        return None
+        return HTypes.CONTAINER, tuple(zip(value, shapes))
+    elif type_ is Vector:
+        element_type = value.type_
+        if element_type is dict or element_type is Vector:
+            element_h_type: Optional[int] = HTypes.CONTAINER if element_type is dict else HTypes.VECTOR
+            elements = []
+            for element in value:
+                shape = _payload_shape(element)
+                if type(shape) is not tuple or shape[0] != element_h_type:  # type: ignore
+                    return None
+                elements.append(shape)
+            return HTypes.VECTOR, element_h_type, tuple(elements)
+        element_h_type = _P_H_TYPES.get(element_type)
+        return None if element_h_type is None else (HTypes.VECTOR, element_h_type)
+    elif type_ is ArrayVector:
+        return HTypes.VECTOR, _ARRAY_H_TYPES[value.type_]
+    else:
+        element_type = get_vector_type(value)  # a NumPy array
+        return None if element_type is None else (HTypes.VECTOR, _ARRAY_H_TYPES[element_type])
+
+
+def _to_scheme(shape: Shape) -> Union[type, dict, list]:
+    if isinstance(shape, int):
+        return _SCALAR_SCHEMES[shape]
+    elif shape[0] == HTypes.CONTAINER:
+        return {Key(key): _to_scheme(value) for key, value in shape[1]} if shape[1] else ContainerDummy
+    elif len(shape) == 2:
+        return _VECTOR_SCHEMES[shape[1]]
+    else:
+        return [_to_scheme(element) for element in shape[2]] if shape[2] else VectorDummy
+
+
+def _type_name(shape: Shape) -> str:
+    if isinstance(shape, int):
+        return _SCALAR_SCHEMES[shape].__name__
+    elif shape[0] == HTypes.CONTAINER:
+        return 'Container'
+    elif len(shape) == 2:
+        return _VECTOR_SCHEMES[shape[1]].__name__
+    else:
+        return 'Vector'
@@ -0,0 +1,186 @@
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+from uuid import UUID
+from mmap import mmap
+from struct import error as StructError
+from .datatypes import PTypes, np
+from .serialization import HEAD_STOP, deserialize_from, _deserialize_fields_from, _make_fields, _skip_event
+from .codec import Codec
+from .adaptive import AdaptiveCodec
+from .interning import StringInterner
+
+Event = Tuple[int, int, UUID, Dict[str, PTypes]]
+Source = Union[bytes, bytearray, memoryview, mmap, BinaryIO]
+# the predicate of the raw bytes of the event at the offset
+Where = Callable[[Any, int], bool]
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _get_deserialize_from(
+    scheme: Optional[Union[dict, Codec, AdaptiveCodec]],
+    view_threshold: Optional[int],
+    native: bool,
+    arrays: bool,
+    numpy: bool,
+    interner: Optional[StringInterner],
+    fields: Optional[Iterable[Union[str, Iterable[str]]]] = None
+) -> Callable[[Any, int], Tuple[int, Event]]:
+    if fields is not None:
+        if scheme:
+            raise ValueError("The fields mustn't be used with a scheme")
+        if numpy and np is None:
+            raise ImportError('The numpy arrays require NumPy')
+        tree = _make_fields(fields)
+        options = {
+            'view_threshold': view_threshold, 'native': native, 'arrays': arrays, 'numpy': numpy, 'interner': interner
+        }
+        return lambda data, start: _deserialize_fields_from(data, start, tree, options)
+    elif isinstance(scheme, Codec):
+        if view_threshold is not None:
+            raise ValueError("The views mustn't be used with a scheme")
+        if arrays or numpy:
+            raise ValueError("The arrays mustn't be used with a compiled scheme")
+        if native and not scheme.native:
+            raise ValueError("The native values mustn't be used with a scheme, compile it with native=True")
+        if interner is not None and interner is not scheme.interner:
+            raise ValueError("The interner mustn't be used with a compiled scheme, compile it with the interner")
+        return scheme.deserialize_from
+    elif isinstance(scheme, AdaptiveCodec):
+        if view_threshold is not None or native or arrays or numpy or interner is not None:
+            raise ValueError("The views, native values, arrays and interner mustn't be used with an adaptive codec")
+        return scheme.deserialize_from
+    else:
+        return lambda data, start: deserialize_from(
+            data, start, scheme, view_threshold, native, arrays, numpy, interner
+        )
+
+
+def _iter_buffer(
+    data: Any, deserialize_from_: Callable[[Any, int], Tuple[int, Any]], where: Optional[Where] = None
+) -> Iterator[Any]:
+    length = len(data)
+    start = 0
+    while start < length:
+        event = None
+        try:
+            if where is None or where(data, start):
+                stop, event = deserialize_from_(data, start)
+            else:
+                stop = _skip_event(data, start)
+        except (IndexError, StructError):
+            stop = length + 1
+        if stop > length:
+            raise ValueError(f'The event at the offset {start} is incomplete')
+        if event is not None:
+            yield event
+        start = stop
+
+
+class _Framing:
+    """ The framing of the concatenated events of a stream read by chunks
+
+        feed(chunk) finds the complete events of the buffered chunks. An incomplete event
+        is scanned again only when its known length has been read or the buffer has doubled.
+    """
+
+    def __init__(self, max_event_size: Optional[int] = None) -> None:
+        self.max_event_size = max_event_size
+        self.buffer = bytearray()
+        # the offset of the buffer in the stream
+        self.offset = 0
+        self.wanted = HEAD_STOP
+
+    def feed(self, chunk: bytes) -> Iterator[Tuple[bytearray, int, int]]:
+        """ Append the chunk (an empty one at the end of the stream) to the buffer,
+            yield the buffer, the start and the stop offsets of every complete event in it
+        """
+        self.buffer += chunk
+        if chunk and len(self.buffer) < self.wanted:
+            return
+
+        buffer = self.buffer
+        start = 0
+        self.wanted = 0
+        while start < len(buffer):
+            try:
+                stop = _skip_event(buffer, start)
+            except (IndexError, StructError):
+                self.wanted = 2 * (len(buffer) - start)
+                break
+            if self.max_event_size is not None and stop - start > self.max_event_size:
+                raise ValueError(
+                    f'The event at the offset {self.offset + start} is longer than {self.max_event_size} bytes'
+                )
+            if stop > len(buffer):
+                self.wanted = stop - start
+                break
+            yield buffer, start, stop
+            start = stop
+
+        if start:
+            # a new buffer, the decoded events may hold views of the old one
+            self.buffer = buffer[start:]
+            self.offset += start
+        if not chunk and self.buffer:
+            raise ValueError(f'The event at the offset {self.offset} is incomplete')
+        if self.max_event_size is not None and len(self.buffer) > self.max_event_size:
+            raise ValueError(f'The event at the offset {self.offset} is longer than {self.max_event_size} bytes')
+
+
+def _iter_file(
+    source: BinaryIO,
+    deserialize_from_: Callable[[Any, int], Tuple[int, Any]],
+    chunk_size: int,
+    where: Optional[Where] = None
+) -> Iterator[Any]:
+    # read1 returns the bytes at hand, the read of a buffered socket file waits for the whole chunk
+    read = getattr(source, 'read1', source.read)
+    framing = _Framing()
+    while True:
+        chunk = read(chunk_size)
+        for buffer, start, _ in framing.feed(chunk):
+            if where is None or where(buffer, start):
+                yield deserialize_from_(buffer, start)[1]
+        if not chunk:
+            break
+
+
+def iter_events(
+    source: Source,
+    scheme: Optional[Union[dict, Codec, AdaptiveCodec]] = None,
+    chunk_size: int = CHUNK_SIZE,
+    view_threshold: Optional[int] = None,
+    native: bool = False,
+    arrays: bool = False,
+    numpy: bool = False,
+    interner: Optional[StringInterner] = None,
+    fields: Optional[Iterable[Union[str, Iterable[str]]]] = None,
+    where: Optional[Where] = None
+) -> Iterator[Event]:
+    """ Translate concatenated events into data structures one by one
+
+        The source is bytes, a memoryview, an mmap or a binary file object
+        (a file, a socket file), which is read by chunks of at most chunk_size bytes.
+        A buffer is decoded in place, the events of a file are decoded as soon
+        as they have been read completely.
+        Strings and vectors of bytes of at least view_threshold bytes are
+        memoryview slices of the source (or of the read chunks) instead of copies.
+        The native events have plain values as deserialize(native=True) returns.
+        With arrays the vectors of numbers are ArrayVector, with numpy they are NumPy arrays.
+        The repeated short strings are shared objects of the interner.
+        With fields only the tags of their paths are decoded as deserialize does.
+        With where (a predicate such as tag('level') == 'Error') only the events
+        satisfying it are decoded, it is checked on the raw bytes of every event.
+    """
+    if where is not None and not callable(where):
+        raise TypeError('The where has to be a predicate')
+    deserialize_from_ = _get_deserialize_from(scheme, view_threshold, native, arrays, numpy, interner, fields)
+
+    if isinstance(source, (bytes, bytearray, mmap)):
+        return _iter_buffer(source, deserialize_from_, where)
+    elif isinstance(source, memoryview):
+        return _iter_buffer(source.cast('B') if source.format != 'B' else source, deserialize_from_, where)
+    elif hasattr(source, 'read'):
+        return _iter_file(source, deserialize_from_, chunk_size, where)
+    else:
+        raise TypeError('The source has to be bytes, memoryview, mmap or a binary file object')
@@ -15,6 +15,7 @@ setup(
     python_requires=">=3.7",
     setup_requires=["pytest-runner"],
     tests_require=["pytest", "pytest-cov"],
+    extras_require={"numpy": ["numpy"], "lz4": ["lz4"], "zstd": ["zstandard"]},
     url="https://github.com/alex-v-yakimov/hercules_protocol",
     packages=["hercules_protocol"],
     test_suite="tests",
@@ -0,0 +1,81 @@
+import pytest
+from ctypes import c_char_p, c_int32
+from hercules_protocol import AdaptiveCodec, serialize, simplify, serialize_many, iter_events, Vector
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+
+def test_adaptive_codec():
+    codec = AdaptiveCodec(threshold=2)
+    for _ in range(3):
+        for sample in SAMPLES:
+            assert codec.serialize(*sample['tuple']) == sample['bytes']
+            assert simplify(codec.deserialize(sample['bytes'])) == simplify(sample['tuple'])
+
+    info = codec.info()
+    # every shape is translated twice by the generic path before its codec is compiled
+    assert (info['hits'], info['misses'], info['size']) == (8, 16, 8)
+    assert info['hit_rate'] == pytest.approx(1 / 3)
+
+    codec.clear()
+    assert codec.info()['size'] == 0
+
+
+def test_adaptive_codec_fallback():
+    uuid_ = sample_data.from_github['tuple'][2]
+    codec = AdaptiveCodec(maxsize=1, threshold=1)
+    first = {'a': {'b': c_int32(1)}}
+    second = {'a': {'c': c_char_p(b'v')}}  # the same keys and types of the tags of the event
+    for payload in (first, first, second, first):
+        assert codec.serialize(1, 12345, uuid_, payload) == serialize(1, 12345, uuid_, payload)
+    assert codec.info()['hits'] == 2
+
+    codec.deserialize(serialize(1, 12345, uuid_, first))
+    codec.deserialize(serialize(1, 12345, uuid_, second))
+    assert codec.info()['evictions'] == 1
+
+    with pytest.raises(ValueError, match='Permitted characters of the key: *'):
+        codec.serialize(1, 12345, uuid_, {'+': c_int32(1)})
+    with pytest.raises(ValueError, match='The version has to be *'):
+        codec.serialize(2, 12345, uuid_, first)
+
+
+def test_adaptive_codec_nested_shapes():
+    uuid_ = sample_data.from_github['tuple'][2]
+    codec = AdaptiveCodec(threshold=2)
+    payloads = [
+        {'host': c_char_p(b'h'), 'items': Vector([{'a': c_int32(i)} for i in range(n % 5 + 1)], dict)}
+        for n in range(100)
+    ]
+    for payload in payloads:
+        assert codec.serialize(1, 12345, uuid_, payload) == serialize(1, 12345, uuid_, payload)
+
+    # the codec of the first nested shape mismatches the next payloads, so it is bypassed
+    info = codec.info()
+    assert (info['hits'], info['misses'], info['size']) == (0, 100, 0)
+
+
+def test_adaptive_codec_stream():
+    codec = AdaptiveCodec()
+    events = [sample['tuple'] for sample in SAMPLES] * 3
+    out, offsets = serialize_many(events, codec)
+    assert bytes(out) == b''.join(sample['bytes'] for sample in SAMPLES) * 3
+    assert [simplify(event) for event in iter_events(out, codec)] == [simplify(event) for event in events]
+
+    with pytest.raises(ValueError, match="The views, native values, arrays and interner mustn't be used *"):
+        iter_events(out, codec, native=True)
+
+
+def test_adaptive_codec_raises():
+    with pytest.raises(ValueError, match='The maxsize has to be a positive number'):
+        AdaptiveCodec(maxsize=0)
+
+    with pytest.raises(ValueError, match='The threshold has to be a positive number'):
+        AdaptiveCodec(threshold=0)
@@ -0,0 +1,86 @@
+import asyncio
+import socket
+import pytest
+from ctypes import c_int32
+from hercules_protocol import aread_events, AsyncEventWriter, compile_scheme, simplify
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+
+async def open_pair():
+    left, right = socket.socketpair()
+    # the unused ends are kept, a collected StreamWriter closes its transport
+    reader, left_writer = await asyncio.open_connection(sock=left)
+    right_reader, writer = await asyncio.open_connection(sock=right)
+    return reader, writer, (left_writer, right_reader)
+
+
+async def read_all(reader, **kwargs):
+    return [event async for event in aread_events(reader, **kwargs)]
+
+
+def test_aread_events():
+
+    async def run():
+        reader, writer, _ends = await open_pair()
+        async with AsyncEventWriter(writer, buffer_size=100) as event_writer:
+            for sample in SAMPLES * 2:
+                await event_writer.write(*sample['tuple'])
+        return await read_all(reader, chunk_size=7, offload_size=500)
+
+    events = asyncio.run(run())
+    assert [simplify(event) for event in events] == [simplify(sample['tuple']) for sample in SAMPLES * 2]
+
+
+def test_async_event_writer_scheme():
+    sample = sample_data.from_balconlib
+
+    async def run():
+        reader, writer, _ends = await open_pair()
+        event_writer = AsyncEventWriter(writer, compile_scheme(sample['scheme']))
+        for _ in range(3):
+            await event_writer.write(*sample['tuple'])
+        await event_writer.close()
+        return await reader.read()
+
+    assert asyncio.run(run()) == sample['bytes'] * 3
+
+
+def test_async_event_writer_failed_write():
+    sample = sample_data.from_github
+
+    async def run():
+        reader, writer, _ends = await open_pair()
+        async with AsyncEventWriter(writer) as event_writer:
+            with pytest.raises(ValueError, match='Incorrect data type *'):
+                await event_writer.write(1, 0, sample['tuple'][2], {'a': c_int32(1), 'b': {'c': 0}})
+            await event_writer.write(*sample['tuple'])
+        return await read_all(reader)
+
+    assert [simplify(event) for event in asyncio.run(run())] == [simplify(sample['tuple'])]
+
+
+def test_aread_events_raises():
+    data = b''.join(sample['bytes'] for sample in SAMPLES)
+
+    async def run(data, **kwargs):
+        reader, writer, _ends = await open_pair()
+        writer.write(data)
+        writer.close()
+        return await read_all(reader, **kwargs)
+
+    with pytest.raises(ValueError, match=f'The event at the offset {len(data)} is incomplete'):
+        asyncio.run(run(data + data[:30]))
+
+    with pytest.raises(ValueError, match='The event at the offset 0 is longer than 100 bytes'):
+        asyncio.run(run(sample_data.from_balconlib['bytes'], max_event_size=100))
+
+    with pytest.raises(ValueError, match='The buffer_size has to be a positive number'):
+        AsyncEventWriter(None, buffer_size=0)  # type: ignore  # type hints error for testing
@@ -0,0 +1,91 @@
+import pytest
+from ctypes import c_uint8
+from uuid import uuid4
+from hercules_protocol import serialize_many, split_batches, compile_scheme
+from hercules_protocol.batch import BATCH_COUNT
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+
+def test_serialize_many():
+    out, offsets = serialize_many(sample['tuple'] for sample in SAMPLES)
+    assert bytes(out) == b''.join(sample['bytes'] for sample in SAMPLES)
+    assert len(offsets) == len(SAMPLES) + 1
+    for i, sample in enumerate(SAMPLES):
+        assert out[offsets[i]:offsets[i + 1]] == sample['bytes']
+
+
+def test_serialize_many_with_scheme():
+    for scheme in (sample_data.from_balconlib['scheme'], compile_scheme(sample_data.from_balconlib['scheme'])):
+        out, offsets = serialize_many([sample_data.from_balconlib['tuple']] * 3, scheme=scheme)
+        assert bytes(out) == sample_data.from_balconlib['bytes'] * 3
+        assert list(offsets) == [len(sample_data.from_balconlib['bytes']) * i for i in range(4)]
+
+
+def test_serialize_many_count_prefix():
+    out, offsets = serialize_many([sample['tuple'] for sample in SAMPLES], count_prefix=True)
+    assert bytes(out) == b'\x00\x00\x00\x04' + b''.join(sample['bytes'] for sample in SAMPLES)
+    assert offsets[0] == 4
+
+    out, offsets = serialize_many([], count_prefix=True)
+    assert bytes(out) == b'\x00\x00\x00\x00'
+    assert list(offsets) == [4]
+
+
+def test_serialize_many_out():
+    out = bytearray(b'head')
+    result, offsets = serialize_many([sample_data.from_github['tuple']], out=out)
+    assert result is out
+    assert bytes(out) == b'head' + sample_data.from_github['bytes']
+    assert list(offsets) == [4, len(out)]
+
+
+def test_serialize_many_raises():
+    out = bytearray(b'head')
+    with pytest.raises(ValueError, match='Incorrect data type *'):
+        serialize_many(
+            [sample_data.from_github['tuple'], (1, 12345, uuid4(), {'h': 0})],  # type: ignore
+            count_prefix=True,
+            out=out
+        )
+    assert bytes(out) == b'head'
+
+    with pytest.raises(ValueError, match='The payload has to be a dict'):
+        serialize_many([(1, 12345, uuid4(), {'h': c_uint8(0)}), (1, 12345, uuid4(), [])])  # type: ignore
+
+
+def test_split_batches():
+    sample = sample_data.from_balconlib
+    for events, sizes, scheme in (
+        ([sample['tuple'] for sample in SAMPLES] * 3, [len(sample['bytes']) for sample in SAMPLES] * 3, None),
+        ([sample['tuple']] * 5, [len(sample['bytes'])] * 5, compile_scheme(sample['scheme'])),
+    ):
+        batches = list(split_batches(events, 3000, scheme=scheme))
+        assert all(len(out) <= 3000 for out, _ in batches)
+        assert b''.join(bytes(out[4:]) for out, _ in batches) == serialize_many(events, scheme)[0]
+        assert sum(BATCH_COUNT.unpack_from(out)[0] for out, _ in batches) == len(events)
+        for out, offsets in batches:
+            assert offsets[-1] == len(out)
+            assert [offsets[i + 1] - offsets[i] for i in range(len(offsets) - 1)] == sizes[:len(offsets) - 1]
+            sizes = sizes[len(offsets) - 1:]
+            # a batch is full: the next event does not fit
+            assert not sizes or len(out) + sizes[0] > 3000
+
+    batches = list(split_batches([sample_data.from_github['tuple']] * 5, 10 ** 6, count_prefix=False, max_events=2))
+    assert [len(offsets) - 1 for _, offsets in batches] == [2, 2, 1]
+    assert bytes(batches[0][0]) == sample_data.from_github['bytes'] * 2
+    assert list(split_batches([], 100)) == []
+
+
+def test_split_batches_raises():
+    with pytest.raises(ValueError, match='The event 1 is longer than 96 bytes'):
+        list(split_batches([sample_data.from_github['tuple'], sample_data.from_balconlib['tuple']], 100))
+    with pytest.raises(ValueError, match='The max_size has to be a positive number'):
+        list(split_batches([], 0))
@@ -0,0 +1,119 @@
+import pytest
+from ctypes import c_int16, c_int32, c_int64, c_char_p
+from uuid import uuid4
+from hercules_protocol import compile_scheme, simplify, serialize, deserialize, make_scheme, Vector
+from hercules_protocol.scheme import Key, Short, Long, String, VectorString, VectorDummy
+from hercules_protocol.serialization import serialize_into
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_serialize(sample):
+    codec = compile_scheme(sample['scheme'])
+    assert codec.serialize(*sample['tuple']) == sample['bytes']
+    assert codec.serialize(*sample['tuple']) == sample['bytes']
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_deserialize(sample):
+    codec = compile_scheme(sample['scheme'])
+    assert simplify(codec.deserialize(sample['bytes'])) == simplify(sample['tuple'])
+
+
+def test_compile_scheme_raises():
+    with pytest.raises(TypeError, match='The scheme has to be a dict'):
+        compile_scheme([])  # type: ignore  # type hints error for testing
+
+    with pytest.raises(TypeError, match=r'The .+ is not Key'):
+        compile_scheme({'time': Long})  # type: ignore  # type hints error for testing
+
+    with pytest.raises(TypeError, match=r'The .+ is not a scheme value'):
+        compile_scheme({Key('time'): int})
+
+
+def test_serialize_raises():
+    codec = compile_scheme({Key('time'): Long, Key('status'): Short, Key('tags'): VectorString})
+    tags = Vector([c_char_p(b'a')], c_char_p)
+
+    with pytest.raises(ValueError, match='The payload has to be a dict'):
+        codec.serialize(1, 12345, uuid4(), [])  # type: ignore  # type hints error for testing
+
+    with pytest.raises(
+        ValueError, match='The payload container and the scheme container have to have the same length'
+    ):
+        codec.serialize(1, 12345, uuid4(), {'time': c_int64(1)})
+
+    with pytest.raises(ValueError, match='The key has to be equal *'):
+        codec.serialize(1, 12345, uuid4(), {'time': c_int64(1), 'code': c_int16(200), 'tags': tags})
+
+    with pytest.raises(TypeError, match=r'The .+ is not c_int16'):
+        codec.serialize(1, 12345, uuid4(), {'time': c_int64(1), 'status': c_int32(200), 'tags': tags})
+
+    with pytest.raises(TypeError, match=r'The .+ is not Vector of c_char_p'):
+        codec.serialize(1, 12345, uuid4(), {'time': c_int64(1), 'status': c_int16(200), 'tags': c_char_p(b'a')})
+
+    out = bytearray(b'head')
+    with pytest.raises(TypeError, match=r'The .+ is not Vector of c_char_p'):
+        codec.serialize_into(out, 1, 12345, uuid4(), {'time': c_int64(1), 'status': c_int16(200), 'tags': None})
+    with pytest.raises(ValueError, match='Incorrect data type *'):
+        serialize_into(out, 1, 12345, uuid4(), {'time': c_int64(1), 'status': 200})  # type: ignore
+    assert out == b'head'
+
+
+def test_deserialize_raises():
+    codec = compile_scheme({Key('host'): String, Key('time'): Long})
+
+    with pytest.raises(ValueError, match='The slice of data has to be equal *'):
+        codec.deserialize(sample_data.from_github['bytes'])
+
+    with pytest.raises(
+        ValueError, match='The payload container and the scheme container have to have the same length'
+    ):
+        codec.deserialize(sample_data.container['bytes'])
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_native(sample):
+    codec = compile_scheme(sample['scheme'], native=True)
+    assert codec.serialize(*simplify(sample['tuple'])) == sample['bytes']
+    assert codec.deserialize(sample['bytes']) == simplify(sample['tuple'])
+
+
+def test_native_empty_vector():
+    scheme = {Key('ints'): VectorDummy, Key('args'): [VectorDummy]}
+    payload = {'ints': Vector([], c_int32), 'args': Vector([Vector([], c_char_p)], Vector)}
+    data = compile_scheme(scheme).serialize(1, 12345, uuid4(), payload)
+    codec = compile_scheme(scheme, native=True)
+    event = codec.deserialize(data)
+    assert event[3] == {'ints': [], 'args': [[]]}
+    assert event[3]['ints'].type_ is c_int32
+    assert event[3]['args'][0].type_ is c_char_p
+    assert codec.serialize(*event) == data
+
+    payload = {'e': Vector([], Vector), 'd': Vector([], dict), 'i': Vector([], c_int16), 'n': Vector([], c_char_p)}
+    data = serialize(1, 12345, uuid4(), payload)
+    event = deserialize(data, native=True)
+    assert compile_scheme(make_scheme(payload)[1], native=True).serialize(*event) == data
+
+
+def test_native_raises():
+    codec = compile_scheme({Key('time'): Long, Key('host'): String}, native=True)
+    uuid_ = uuid4()
+    assert (
+        codec.serialize(1, 12345, uuid_, {'time': 1, 'host': 'localhost'}) ==
+        codec.serialize(1, 12345, uuid_, {'time': 1, 'host': b'localhost'})
+    )
+
+    with pytest.raises(ValueError, match='The payload does not match the scheme: *'):
+        codec.serialize(1, 12345, uuid4(), {'time': 'now', 'host': b'localhost'})
+
+    with pytest.raises(TypeError, match=r'The .+ is not bytes'):
+        codec.serialize(1, 12345, uuid4(), {'time': 1, 'host': 1})
@@ -0,0 +1,99 @@
+import struct
+import pytest
+from ctypes import c_int32, c_char_p
+from uuid import uuid4
+from hercules_protocol import compile_scheme, generate_codec, simplify, Vector
+from hercules_protocol.scheme import Key, Integer, String, VectorDummy
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+
+def load(scheme, native=False):
+    module = {}
+    exec(compile(generate_codec(scheme, native=native), '<codec>', 'exec'), module)
+    return module
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_generate_codec(sample):
+    module = load(sample['scheme'])
+    assert module['encode'](*sample['tuple']) == sample['bytes']
+    stop, event = module['decode'](b'\x00' + sample['bytes'], 1)
+    assert stop == len(sample['bytes']) + 1
+    assert simplify(event) == simplify(sample['tuple'])
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_generate_codec_native(sample):
+    module = load(sample['scheme'], native=True)
+    event = compile_scheme(sample['scheme'], native=True).deserialize(sample['bytes'])
+    assert module['decode'](memoryview(sample['bytes'])) == (len(sample['bytes']), event)
+    assert module['encode'](*event) == sample['bytes']
+
+
+@pytest.mark.parametrize('native', [False, True])
+def test_generate_codec_truncated(native):
+    for sample in SAMPLES:
+        decode = load(sample['scheme'], native=native)['decode']
+        data = sample['bytes']
+        for stop in range(len(data)):
+            with pytest.raises(struct.error):
+                decode(memoryview(data)[:stop])
+
+
+def test_generate_codec_raises():
+    with pytest.raises(TypeError, match='The scheme has to be a dict'):
+        generate_codec([])  # type: ignore  # type hints error for testing
+
+    with pytest.raises(TypeError, match=r'The .+ is not a scheme value'):
+        generate_codec({Key('time'): int})
+
+    module = load({Key('count'): Integer, Key('host'): String, Key('args'): [VectorDummy]})
+    payload = {'count': c_int32(1), 'host': c_char_p(b'h'), 'args': Vector([Vector([], c_int32)], Vector)}
+    event = (1, 0, uuid4(), payload)
+    data = module['encode'](*event)
+    assert simplify(module['decode'](data)[1]) == simplify(event)
+
+    with pytest.raises(ValueError, match='The keys of the container have to be'):
+        module['encode'](1, 0, uuid4(), {'host': c_char_p(b'h'), 'count': c_int32(1), 'args': payload['args']})
+
+    with pytest.raises(ValueError, match='The payload list and the scheme list have to have the same length'):
+        module['encode'](1, 0, uuid4(), {**payload, 'args': Vector([], Vector)})
+
+    with pytest.raises(ValueError, match='The payload does not match the scheme'):
+        load({Key('count'): Integer}, native=True)['encode'](1, 0, uuid4(), {'count': 1 << 40})
+
+    with pytest.raises(ValueError, match='The data does not match the scheme after the offset 0'):
+        module['decode'](data.replace(b'count', b'COUNT'))
+
+
+@pytest.mark.parametrize('native', [False, True])
+def test_generate_codec_source(native):
+    scheme = {
+        Key('k' * 200): Integer,
+        Key('x' * 150): {Key('y' * 120): String},
+        Key('args'): [VectorDummy] * 40,
+    }
+    source = generate_codec(scheme, native=native)
+    assert max(map(len, source.splitlines())) <= 119
+    assert 'hercules_protocol.codec' not in source
+
+    module = load(scheme, native=native)
+    integer = (lambda value: value) if native else c_int32
+    payload = {
+        'k' * 200: integer(1),
+        'x' * 150: {'y' * 120: b'h' if native else c_char_p(b'h')},
+        'args': Vector([Vector([], c_int32)] * 40, Vector),
+    }
+    event = (1, 0, uuid4(), payload)
+    data = module['encode'](*event)
+    assert data == compile_scheme(scheme, native=native).serialize(*event)
+    assert simplify(module['decode'](data)[1]) == simplify(event)
+    assert module['encode'](*module['decode'](data)[1]) == data
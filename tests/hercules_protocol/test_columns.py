@@ -0,0 +1,124 @@
+import pytest
+from array import array
+from ctypes import c_bool, c_int16, c_int32, c_char_p
+from uuid import uuid4
+from hercules_protocol import decode_columns, encode_columns, deserialize, serialize, Vector
+from hercules_protocol.batch import BATCH_COUNT
+from hercules_protocol.scheme import Key, Integer, String, Flag, Guid, VectorShort
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+DATA = b''.join(sample['bytes'] for sample in SAMPLES) * 3
+EVENTS = [deserialize(sample['bytes'], native=True) for sample in SAMPLES] * 3
+
+
+def test_decode_columns():
+    columns = decode_columns(memoryview(DATA))
+    assert len(columns) == len(EVENTS)
+    assert columns.versions == array('B', [event[0] for event in EVENTS])
+    assert columns.timestamps == array('q', [event[1] for event in EVENTS])
+    assert columns.uuids == b''.join(event[2].bytes for event in EVENTS)
+    assert columns.uuid(1) == EVENTS[1][2]
+    assert set(columns.columns) == {(key,) for event in EVENTS for key in event[3]}
+    for path, column in columns.columns.items():
+        assert column.to_list() == [event[3].get(path[0]) for event in EVENTS]
+
+    host = columns['host']
+    assert host.values == b'localhostextern-api.testkontur.ru' * 3
+    assert host.offsets[:3] == array('q', [0, 9, 9])
+    assert [host.is_valid(index) for index in range(4)] == [True, False, False, True]
+    assert host.validity[0] == 0b10011001
+
+
+def test_decode_columns_paths():
+    paths = ['container-in-container.host.os', ('container-in-container', 'host'), 'c_int32', 'absent']
+    columns = decode_columns(DATA, paths)
+    assert list(columns.columns) == [
+        ('container-in-container', 'host', 'os'), ('container-in-container', 'host'), ('c_int32',), ('absent',)
+    ]
+    host = sample_data.container['tuple'][3]['container-in-container']['host']
+    assert columns['container-in-container.host.os'].to_list() == [None, b'centos', None, None] * 3
+    assert columns[('container-in-container', 'host')][1] == {key: value.value for key, value in host.items()}
+    assert columns['c_int32'].values == array('i', [0, 2147483647, 0, 0]) * 3
+    assert columns['absent'].to_list() == [None] * 12
+    assert columns['absent'].h_type is None
+
+
+def test_decode_columns_raises():
+    first = serialize(1, 0, uuid4(), {'count': c_int32(1)})
+    second = serialize(1, 0, uuid4(), {'count': c_char_p(b'1')})
+    message = 'The tag count has to have the same type in all events, not INTEGER and STRING'
+    with pytest.raises(ValueError, match=message):
+        decode_columns(first + second)
+
+    with pytest.raises(ValueError, match=f'The event at the offset {len(DATA)} is incomplete'):
+        decode_columns(DATA + DATA[:30])
+
+    with pytest.raises(ValueError, match="The path '' has to be a dotted string or a tuple of keys"):
+        decode_columns(DATA, [''])
+
+    with pytest.raises(TypeError, match='The data has to be bytes, memoryview or mmap'):
+        decode_columns([DATA])  # type: ignore  # type hints error for testing
+
+
+def test_encode_columns():
+    for sample in (sample_data.from_balconlib, sample_data.vectors, sample_data.from_github):
+        data = sample['bytes'] * 3
+        decoded = decode_columns(data)
+        columns = {path[0]: column for path, column in decoded.columns.items()}
+        out, offsets = encode_columns(decoded.timestamps, decoded.uuids, columns, sample['scheme'])
+        assert out == data
+        assert offsets == array('q', range(0, len(data) + 1, len(sample['bytes'])))
+
+
+def test_encode_columns_sequences():
+    scheme = {
+        Key('count'): Integer, Key('name'): String, Key('flag'): Flag, Key('id'): Guid, Key('sizes'): VectorShort
+    }
+    uuids = [uuid4() for _ in range(3)]
+    columns = {
+        'count': array('i', [1, 2, 3]),
+        'name': [b'a', None, 'c'],
+        'flag': [True, False, True],
+        'id': uuids[::-1],
+        'sizes': [[1, 2], [], None],
+    }
+    payloads = [
+        {'count': c_int32(1), 'name': c_char_p(b'a'), 'flag': c_bool(True), 'id': uuids[2],
+         'sizes': Vector([c_int16(1), c_int16(2)], c_int16)},
+        {'count': c_int32(2), 'flag': c_bool(False), 'id': uuids[1], 'sizes': Vector([], c_int16)},
+        {'count': c_int32(3), 'name': c_char_p(b'c'), 'flag': c_bool(True), 'id': uuids[0]},
+    ]
+    timestamps = [10, 20, 30]
+    out, offsets = encode_columns(timestamps, b''.join(uuid_.bytes for uuid_ in uuids), columns, scheme,
+                                  count_prefix=True)
+    events = [serialize(1, *event) for event in zip(timestamps, uuids, payloads)]
+    assert out == BATCH_COUNT.pack(3) + b''.join(events)
+    assert offsets[0] == 4 and offsets[-1] == len(out)
+
+
+def test_encode_columns_raises():
+    scheme = {Key('count'): Integer}
+    with pytest.raises(ValueError, match="The key 'size' is not in the scheme"):
+        encode_columns([0], [uuid4()], {'size': [1]}, scheme)
+    with pytest.raises(ValueError, match="The column 'count' has to have the same length as the timestamps"):
+        encode_columns([0], [uuid4()], {'count': [1, 2]}, scheme)
+    with pytest.raises(ValueError, match='The uuids have to have 16 bytes per timestamp'):
+        encode_columns([0], bytes(15), {'count': [1]}, scheme)
+    with pytest.raises(ValueError, match='The timestamp has to be a positive number'):
+        encode_columns([-1], [uuid4()], {'count': [1]}, scheme)
+    with pytest.raises(ValueError, match='The column \'count\' has to have the type INTEGER'):
+        strings = decode_columns(serialize(1, 0, uuid4(), {'count': c_char_p(b'1')}))
+        encode_columns([0], [uuid4()], {'count': strings['count']}, scheme)
+
+    out = bytearray(b'head')
+    with pytest.raises(ValueError, match='The columns do not match the scheme'):
+        encode_columns([0, 0], [uuid4(), uuid4()], {'count': [1, 2 ** 40]}, scheme, out=out)
+    assert out == b'head'
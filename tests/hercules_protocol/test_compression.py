@@ -0,0 +1,102 @@
+import io
+import pytest
+from ctypes import c_int32
+from hercules_protocol import BlockWriter, BlockReader, compile_scheme, simplify
+from hercules_protocol.compression import BLOCK_HEAD, Compression, register_compression, compressions
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+EVENTS = [sample['tuple'] for sample in SAMPLES] * 20
+
+
+@pytest.mark.parametrize('compression', ['none', 'zlib', 'lz4', 'zstd'])
+def test_blocks(compression):
+    if compression not in compressions():
+        pytest.importorskip({'lz4': 'lz4.block', 'zstd': 'zstandard'}[compression])
+
+    file = io.BytesIO()
+    with BlockWriter(file, compression, block_size=5000) as writer:
+        for event in EVENTS:
+            writer.write(*event)
+    stats = writer.stats()
+    data = file.getvalue()
+    assert stats['events'] == len(EVENTS)
+    assert stats['blocks'] > 1
+    assert stats['raw_bytes'] == sum(len(sample['bytes']) for sample in SAMPLES) * 20
+    assert stats['compressed_bytes'] == len(data)
+    assert stats['ratio'] == stats['raw_bytes'] / len(data)
+    if compression != 'none':
+        assert stats['ratio'] > 2
+
+    for source in (data, memoryview(data), io.BytesIO(data)):
+        reader = BlockReader(source)
+        assert [simplify(event) for event in reader] == [simplify(event) for event in EVENTS]
+        assert {**reader.stats(), 'seconds': 0, 'throughput': 0} == {**stats, 'seconds': 0, 'throughput': 0}
+
+
+def test_blocks_scheme():
+    sample = sample_data.from_balconlib
+    codec = compile_scheme(sample['scheme'], native=True)
+    file = io.BytesIO()
+    writer = BlockWriter(file, 'none', scheme=compile_scheme(sample['scheme']))
+    writer.write(*sample['tuple'])
+    writer.write(*sample['tuple'])
+    writer.close()
+    assert file.getvalue()[BLOCK_HEAD.size:] == sample['bytes'] * 2
+    assert list(BlockReader(file.getvalue(), codec, native=True)) == [codec.deserialize(sample['bytes'])] * 2
+
+
+def test_blocks_failed_write():
+    sample = sample_data.from_github
+    file = io.BytesIO()
+    with BlockWriter(file) as writer:
+        with pytest.raises(ValueError, match='Incorrect data type *'):
+            writer.write(1, 0, sample['tuple'][2], {'a': c_int32(1), 'b': {'c': 0}})  # type: ignore
+        writer.write(*sample['tuple'])
+    assert [simplify(event) for event in BlockReader(file.getvalue())] == [simplify(sample['tuple'])]
+
+
+def test_register_compression():
+    reverse = Compression(
+        200, 'reverse', lambda data, level: bytes(data)[::-1], lambda data, length: bytes(data)[::-1]
+    )
+    register_compression(reverse)
+    register_compression(reverse)
+    assert compressions()['reverse'] == 200
+
+    with pytest.raises(ValueError, match="The compression 'zlib' is registered already"):
+        register_compression(Compression(201, 'zlib', reverse.compress, reverse.decompress))
+
+    file = io.BytesIO()
+    with BlockWriter(file, 200) as writer:
+        writer.write(*EVENTS[0])
+    assert simplify(next(iter(BlockReader(file.getvalue())))) == simplify(EVENTS[0])
+
+
+def test_blocks_raises():
+    file = io.BytesIO()
+    with BlockWriter(file) as writer:
+        writer.write(*EVENTS[0])
+    data = file.getvalue()
+
+    with pytest.raises(ValueError, match="The compression 'brotli' is not available"):
+        BlockWriter(file, 'brotli')
+
+    with pytest.raises(ValueError, match=f'The block at the offset {len(data)} is incomplete'):
+        list(BlockReader(data + data[:-1]))
+
+    with pytest.raises(ValueError, match=f'The block at the offset {len(data)} is incomplete'):
+        list(BlockReader(io.BytesIO(data + data[:10])))
+
+    with pytest.raises(ValueError, match="The block at the offset 0 has to start with b'HEVB'"):
+        list(BlockReader(b'X' + data[1:]))
+
+    with pytest.raises(TypeError, match='The source has to be bytes, memoryview or a binary file object'):
+        BlockReader([data])  # type: ignore  # type hints error for testing
@@ -1,7 +1,12 @@
+import struct
 import pytest
-from ctypes import c_uint8, c_int16, c_int64, c_char_p
-from uuid import uuid4
-from hercules_protocol import serialize, deserialize, Vector, simplify
+from array import array
+from ctypes import c_uint8, c_int16, c_int32, c_int64, c_bool, c_float, c_double, c_char_p
+from uuid import UUID, uuid4
+from hercules_protocol import (
+    serialize, deserialize, serialized_size, Vector, ArrayVector, simplify, make_scheme,
+    key_cache_info, key_cache_clear
+)
 from hercules_protocol.serialization import _verify
 from hercules_protocol.datatypes import LENGTH_OF_TAG_KEY, MAX_VERSION
 from hercules_protocol.scheme import Key, Short, Long, String
@@ -40,6 +45,30 @@ def test_serialize_with_scheme():
     )
 
 
+def test_serialize_nested():
+    uuid_ = sample_data.from_github['tuple'][2]
+    head = serialize(1, 12345, uuid_, {})[:-2]
+
+    depth = 100
+    payload: dict = {}
+    for _ in range(depth):
+        payload = {'c': payload}
+    data = serialize(1, 12345, uuid_, payload)
+    assert data == head + b'\x00\x01' + b'\x01c\x01\x00\x01' * (depth - 1) + b'\x01c\x01\x00\x00'
+    assert deserialize(data)[3] == payload
+
+    payload = {'v': Vector([Vector([c_int16(1), c_int16(2)], c_int16), Vector([c_int16(3)], c_int16)], Vector)}
+    assert serialize(1, 12345, uuid_, payload) == (
+        head + b'\x00\x01' + b'\x01v\x80\x80\x00\x00\x00\x02' +
+        b'\x03\x00\x00\x00\x02\x00\x01\x00\x02' + b'\x03\x00\x00\x00\x01\x00\x03'
+    )
+
+    class Int(c_int32):
+        pass
+
+    assert serialize(1, 12345, uuid_, {'i': Int(7)}) == head + b'\x00\x01' + b'\x01i\x04\x00\x00\x00\x07'
+
+
 def test_serialize_raises():
     with pytest.raises(ValueError, match='The payload has to be a dict'):
         serialize(1, 12345, uuid4(), '')  # type: ignore  # type hints error for testing
@@ -175,3 +204,155 @@ def test___verify():
             payload={'time': c_int64(16648761657993749)},
             scheme={Key('time'): Short}
         )
+
+
+def test_deserialize_views():
+    data = sample_data.from_balconlib['bytes']
+    payload = deserialize(data, view_threshold=32)[3]
+    expected = simplify(sample_data.from_balconlib['tuple'])[3]
+    assert isinstance(payload['uri'], memoryview)
+    assert payload['uri'].obj is data
+    assert bytes(payload['uri']) == expected['uri']
+    assert (
+        simplify(deserialize(memoryview(data), view_threshold=10**6)) ==
+        simplify(sample_data.from_balconlib['tuple'])
+    )
+
+    payload = deserialize(sample_data.vectors['bytes'], view_threshold=2)[3]
+    assert isinstance(payload['vector-of_c_uint8'], memoryview)
+    assert bytes(payload['vector-of_c_uint8']) == b'\x01\x02'
+
+    with pytest.raises(ValueError, match="The views mustn't be used with a scheme"):
+        deserialize(data, scheme=sample_data.from_balconlib['scheme'], view_threshold=32)
+
+    payload = {
+        's': c_char_p(b'x' * 50), 'v': Vector([c_uint8(1)] * 50, c_uint8), 'i': Vector([c_int32(1)] * 9, c_int32)
+    }
+    data = serialize(1, 0, uuid4(), payload)
+    for stop in (70, 120):
+        with pytest.raises(struct.error, match='unpack_from requires a buffer of at least'):
+            deserialize(data[:stop], view_threshold=10)
+    with pytest.raises(struct.error, match='unpack_from requires a buffer of at least'):
+        deserialize(data[:-8], arrays=True)
+
+
+def test_deserialize_native():
+    for sample in (
+        sample_data.from_github, sample_data.container, sample_data.vectors, sample_data.from_balconlib
+    ):
+        assert deserialize(sample['bytes'], native=True) == simplify(sample['tuple'])
+
+    with pytest.raises(ValueError, match="The native values mustn't be used with a scheme*"):
+        deserialize(sample_data.from_github['bytes'], scheme=sample_data.from_github['scheme'], native=True)
+
+
+def test_serialized_size():
+    for sample in (sample_data.from_github, sample_data.container, sample_data.vectors, sample_data.from_balconlib):
+        assert serialized_size(*sample['tuple']) == len(sample['bytes'])
+
+    payload = {
+        'array': ArrayVector([1, 2, 3], c_int64),
+        'strings': Vector([c_char_p(b'ab'), c_char_p(None)], c_char_p),
+        'nested': Vector([Vector([c_int16(1)], c_int16), Vector([c_int32(1), c_int32(2)], c_int32)], Vector),
+        'containers': Vector([{'a': c_bool(True)}, {'b': {'c': None}}], dict),
+        'uuids': Vector([uuid4()], UUID),
+    }
+    assert serialized_size(1, 0, uuid4(), payload) == len(serialize(1, 0, uuid4(), payload))
+
+    with pytest.raises(ValueError, match='Incorrect data type *'):
+        serialized_size(1, 0, uuid4(), {'h': 0})  # type: ignore  # type hints error for testing
+    with pytest.raises(ValueError, match='The payload has to be a dict'):
+        serialized_size(1, 0, uuid4(), [])  # type: ignore  # type hints error for testing
+
+
+def test_deserialize_fields():
+    sample = sample_data.container
+    dotted = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.-'
+    version, timestamp, uuid_, payload = deserialize(
+        sample['bytes'], native=True,
+        fields={'c_int32', 'container-in-container.host.os', (dotted,), 'empty-container.absent', 'absent'}
+    )
+    assert (version, timestamp, uuid_) == sample['tuple'][:3]
+    assert payload == {
+        'c_int32': 2147483647,
+        'container-in-container': {'host': {'os': b'centos'}},
+        'empty-container': {},
+        dotted: b'',
+    }
+
+    payload = deserialize(sample['bytes'], fields=['container-in-container', 'container-in-container.host.os'])[3]
+    assert list(payload) == ['container-in-container']
+    assert payload['container-in-container']['host']['hostname'].value == b'fdev2'
+    assert deserialize(sample['bytes'], fields=['c_int32.nested'])[3] == {}
+    assert deserialize(sample['bytes'], fields=[])[3] == {}
+
+    with pytest.raises(ValueError, match="The fields mustn't be used with a scheme"):
+        deserialize(sample['bytes'], scheme=sample['scheme'], fields=['c_int32'])
+    with pytest.raises(ValueError, match="The path 'a..b' has to be a dotted string or a tuple of keys"):
+        deserialize(sample['bytes'], fields=['a..b'])
+    with pytest.raises(TypeError, match='The fields have to be a collection of paths, not a string'):
+        deserialize(sample['bytes'], fields='c_int32')
+
+
+def test_key_cache():
+    key_cache_clear()
+    data = sample_data.from_github['bytes']
+    first, second = deserialize(data)[3], deserialize(bytearray(data))[3]
+    assert all(a is b for a, b in zip(first, second))
+    info = key_cache_info()['decode']
+    assert (info.hits, info.misses, info.currsize) == (2, 2, 2)
+
+    serialize(*sample_data.from_github['tuple'])
+    serialize(*sample_data.from_github['tuple'])
+    info = key_cache_info()['encode']
+    assert (info.hits, info.misses, info.currsize) == (2, 2, 2)
+
+    with pytest.raises(ValueError, match='Permitted characters of the key: *'):
+        deserialize(data.replace(b'host', b'ho+t'))
+    with pytest.raises(ValueError, match='Permitted characters of the key: *'):
+        serialize(1, 12345, uuid4(), {'+': c_uint8(0)})
+
+    key_cache_clear()
+    assert key_cache_info()['decode'].currsize == 0
+
+
+def test_array_vector():
+    sample = sample_data.vectors
+    payload = dict(sample['tuple'][3])
+    payload.update({
+        'vector-of_c_uint8': ArrayVector(array('B', [1, 2]), c_uint8),
+        'vector-of_c_int16': ArrayVector([1, 2, 3], c_int16),
+        'vector-of_c_int32': ArrayVector(memoryview(array('i', [1, 2])), c_int32),
+        'vector-of_c_int64': ArrayVector([1, 2, 3], c_int64),
+        'vector-of_c_bool': ArrayVector([True, False, False, True], c_bool),
+        'vector-of_c_float': ArrayVector(array('f', [0.1, 0.2]), c_float),
+        'vector-of_c_double': ArrayVector([0.1], c_double),
+    })
+    tuple_ = sample['tuple'][:3] + (payload,)
+    assert serialize(*tuple_) == sample['bytes']
+    assert serialize(*tuple_, scheme=sample['scheme']) == sample['bytes']
+    assert simplify(tuple_) == simplify(sample['tuple'])
+    assert make_scheme(payload)[1] == sample['scheme']
+
+    event = deserialize(sample['bytes'], arrays=True)
+    assert event[3]['vector-of_c_int16'] == ArrayVector([1, 2, 3], c_int16)
+    assert isinstance(event[3]['vector-of_c_double'].array, array)
+    assert event[3]['vector-of_c_bool'].tolist() == [True, False, False, True]
+    assert isinstance(event[3]['vector-of_UUID'], Vector)
+    assert simplify(event) == simplify(sample['tuple'])
+    assert simplify(deserialize(sample['bytes'], scheme=sample['scheme'], arrays=True)) == simplify(sample['tuple'])
+
+
+def test_array_vector_raises():
+    with pytest.raises(ValueError, match='Incorrect data type *'):
+        ArrayVector([1], c_char_p)
+
+    with pytest.raises(ValueError, match='The buffer has to be one-dimensional with items of 4 bytes'):
+        ArrayVector(array('q', [1]), c_int32)
+
+    with pytest.raises(TypeError, match="The buffer items of the format 'f' have to be numbers of c_int"):
+        ArrayVector(array('f', [1.5, 2.0]), c_int32)
+    with pytest.raises(TypeError, match="The buffer items of the format 'd' have to be numbers of c_long"):
+        ArrayVector(array('d', [1.5]), c_int64)
+    with pytest.raises(TypeError, match="The buffer items of the format 'q' have to be numbers of c_double"):
+        ArrayVector(array('q', [1]), c_double)
@@ -0,0 +1,43 @@
+from hercules_protocol import index_event, read_tag, simplify
+from hercules_protocol.serialization import HTypes
+from . import sample_data
+
+
+def test_index_event():
+    data = sample_data.from_github['bytes']
+    index = index_event(data)
+    assert index == {
+        ('host',): (HTypes.STRING, 33, 13),
+        ('timestamp',): (HTypes.LONG, 57, 8),
+    }
+    assert data[33:33 + 13] == b'\x00\x00\x00\x09localhost'
+    assert read_tag(data, index[('host',)]).value == b'localhost'
+
+
+def test_index_event_nested():
+    data = sample_data.from_balconlib['bytes']
+    index = index_event(data)
+    expected = simplify(sample_data.from_balconlib['tuple'])[3]
+
+    paths = [path for path in index if len(path) == 1]
+    assert paths == [(key,) for key in expected]
+    for key, value in expected.items():
+        assert simplify((read_tag(data, index[(key,)]),))[0] == value
+
+    for path, (h_type, start, length) in index.items():
+        if len(path) == 2:
+            assert index[path[:1]][0] == HTypes.CONTAINER
+            assert simplify((read_tag(data, index[path]),))[0] == expected[path[0]][path[1]]
+
+    h_type, start, length = index[('uri',)]
+    assert h_type == HTypes.STRING
+    assert data[start + 4:start + length] == expected['uri']
+
+
+def test_index_event_vectors():
+    data = sample_data.vectors['bytes']
+    index = index_event(data)
+    assert len(index) == len(sample_data.vectors['tuple'][3])
+    assert all(h_type == HTypes.VECTOR for h_type, _, _ in index.values())
+    start, length = index[('vector-of_c_int16',)][1:]
+    assert data[start:start + length] == b'\x03\x00\x00\x00\x03\x00\x01\x00\x02\x00\x03'
@@ -0,0 +1,70 @@
+import io
+import pytest
+from ctypes import c_char_p
+from hercules_protocol import infer_schemes, scan_schemes, make_scheme, serialize, deserialize, Vector
+from hercules_protocol.scheme import Key, String, ContainerDummy, VectorDummy
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+
+def test_scan_schemes():
+    for sample in SAMPLES:
+        inference = scan_schemes(sample['bytes'] * 3)
+        assert inference.events == 3
+        assert inference.schemes() == [(sample['scheme'], 3)]
+        assert inference.schemes() == [(make_scheme(deserialize(sample['bytes'])[3])[1], 3)]
+
+    data = b''.join(sample['bytes'] for sample in SAMPLES)
+    assert scan_schemes(io.BytesIO(data), chunk_size=7).schemes() == [(sample['scheme'], 1) for sample in SAMPLES]
+    assert scan_schemes(memoryview(data)).events == 4
+
+
+def test_infer_schemes(tmp_path):
+    github, container = sample_data.from_github['bytes'], sample_data.container['bytes']
+    first, second, empty = tmp_path / 'first.bin', tmp_path / 'second.bin', tmp_path / 'empty.bin'
+    first.write_bytes(github * 3 + container)
+    second.write_bytes(github)
+    empty.write_bytes(b'')
+
+    for processes in (1, 2):
+        inference = infer_schemes([first, str(second), empty, github], processes=processes)
+        assert inference.events == 6
+        assert inference.schemes() == [
+            (sample_data.from_github['scheme'], 5),
+            (sample_data.container['scheme'], 1),
+        ]
+
+    tags = inference.tags()
+    assert tags[('host',)] == {'count': 5, 'types': {'String': 5}, 'optional': True}
+    assert tags[('container-in-container', 'host', 'os')] == {'count': 1, 'types': {'String': 1}, 'optional': True}
+    assert ('timestamp',) in inference.optional_tags()
+    assert scan_schemes(github).optional_tags() == []
+
+
+def test_infer_schemes_of_vectors():
+    uuid_ = sample_data.from_github['tuple'][2]
+    data = (
+        serialize(1, 12345, uuid_, {'v': Vector([{'s': c_char_p(b'a')}, {}], dict)}) * 2 +
+        serialize(1, 12345, uuid_, {'v': Vector([], dict)})
+    )
+    inference = scan_schemes(data)
+    assert inference.schemes() == [
+        ({Key('v'): [{Key('s'): String}, ContainerDummy]}, 2),
+        ({Key('v'): VectorDummy}, 1),
+    ]
+    assert inference.tags() == {('v',): {'count': 3, 'types': {'Vector': 3}, 'optional': False}}
+
+
+def test_scan_schemes_raises():
+    with pytest.raises(ValueError, match='The event at the offset 0 is incomplete'):
+        scan_schemes(sample_data.from_github['bytes'][:-1])
+
+    with pytest.raises(TypeError, match='The source has to be *'):
+        scan_schemes(1)  # type: ignore  # type hints error for testing
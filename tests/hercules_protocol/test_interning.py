@@ -0,0 +1,70 @@
+import pytest
+from hercules_protocol import deserialize, iter_events, compile_scheme, simplify, StringInterner
+from . import sample_data
+
+
+def copy(value: bytes) -> bytes:
+    return bytes(bytearray(value))
+
+
+def test_string_interner():
+    interner = StringInterner(maxsize=2, policy='lru')
+    a, b, c = b'a' * 3, b'b' * 3, b'c' * 3
+    assert interner.intern(a) is a
+    assert interner.intern(copy(a)) is a
+    interner.intern(b)
+    interner.intern(copy(a))
+    interner.intern(c)  # evicts b, the least recently used
+    assert interner.intern(copy(a)) is a
+    assert interner.intern(copy(b)) is not b
+    assert interner.info() == {'hits': 3, 'misses': 4, 'evictions': 2, 'size': 2, 'maxsize': 2}
+
+    interner = StringInterner(maxsize=2, policy='fifo')
+    for value in (a, b, copy(a), c):
+        interner.intern(value)
+    assert interner.intern(copy(a)) is not a  # a was evicted as the oldest one
+
+    interner = StringInterner(maxsize=2, policy='freeze')
+    for value in (a, b, c):
+        interner.intern(value)
+    assert interner.intern(copy(a)) is a
+    assert interner.intern(copy(c)) is not c
+    assert interner.info()['evictions'] == 0
+
+    interner.clear()
+    assert len(interner) == 0 and interner.info()['hits'] == 0
+
+
+def test_string_interner_raises():
+    with pytest.raises(ValueError, match='The maxsize has to be a positive number'):
+        StringInterner(maxsize=-1)
+
+    with pytest.raises(ValueError, match='The policy has to be one of *'):
+        StringInterner(policy='random')
+
+
+def test_deserialize_interned():
+    data = sample_data.from_balconlib['bytes']
+    scheme = sample_data.from_balconlib['scheme']
+    interner = StringInterner(max_length=32)
+
+    first, second = deserialize(data, interner=interner), deserialize(data, interner=interner)
+    assert simplify(first) == simplify(sample_data.from_balconlib['tuple'])
+    assert first[3]['host']._objects is second[3]['host']._objects
+    assert first[3]['uri']._objects is not second[3]['uri']._objects  # longer than max_length
+
+    native = deserialize(data, native=True, interner=interner)
+    assert native[3]['host'] is first[3]['host']._objects
+
+    with_scheme = deserialize(data, scheme, interner=interner)
+    assert with_scheme[3]['host']._objects is first[3]['host']._objects
+
+    codec = compile_scheme(scheme, native=True, interner=interner)
+    assert codec.deserialize(data)[3]['host'] is native[3]['host']
+    assert simplify(codec.deserialize(data)) == simplify(native)
+
+    events = list(iter_events(data * 2, codec, native=True, interner=interner))
+    assert events[0][3]['host'] is events[1][3]['host'] is native[3]['host']
+
+    with pytest.raises(ValueError, match="The interner mustn't be used with a compiled scheme, *"):
+        iter_events(data, compile_scheme(scheme), interner=interner)
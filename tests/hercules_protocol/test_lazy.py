@@ -0,0 +1,63 @@
+import pytest
+from ctypes import c_char_p, c_int64
+from uuid import UUID
+from hercules_protocol import deserialize_lazy, simplify, LazyEvent
+from hercules_protocol.lazy import LazyContainer, LazyVector
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_deserialize_lazy(sample):
+    event = deserialize_lazy(sample['bytes'])
+    assert isinstance(event, LazyEvent)
+    assert (event.version, event.timestamp, event.uuid) == sample['tuple'][:3]
+    assert len(event) == len(sample['tuple'][3])
+    assert list(event) == list(sample['tuple'][3])
+    assert simplify(event.materialize()) == simplify(sample['tuple'])
+
+
+def test_lazy_access():
+    event = deserialize_lazy(sample_data.from_github['bytes'])
+    assert event._offsets is None
+    assert isinstance(event['host'], c_char_p)
+    assert event['host'].value == b'localhost'
+    assert event['host'] is event['host']
+    assert isinstance(event['timestamp'], c_int64)
+    assert 'host' in event
+    assert 'time' not in event
+    with pytest.raises(KeyError):
+        event['time']
+
+
+def test_lazy_nested():
+    event = deserialize_lazy(sample_data.vectors['bytes'])
+    vector = event['vector-of_c_int16']
+    assert isinstance(vector, LazyVector)
+    assert len(vector) == 3
+    assert [e.value for e in vector] == [1, 2, 3]
+    assert vector[-1].value == 3
+    assert [e.value for e in vector[1:]] == [2, 3]
+    with pytest.raises(IndexError):
+        vector[3]
+
+    vectors = event['vector-of-vectors']
+    assert [e.value for e in vectors[2]] == [4, 5, 6]
+    assert isinstance(event['vector-of-container'][0], LazyContainer)
+    assert event['vector-of_UUID'][0] == UUID('d9d0e8ea-7c01-4e72-8704-7f340da4e26a')
+
+    event = deserialize_lazy(sample_data.from_balconlib['bytes'])
+    expected = simplify(sample_data.from_balconlib['tuple'])[3]
+    assert event['uri'].value == expected['uri']
+
+
+def test_deserialize_lazy_raises():
+    with pytest.raises(ValueError, match='The version has to be less or equal than *'):
+        deserialize_lazy(b'\x02' + sample_data.from_github['bytes'][1:])
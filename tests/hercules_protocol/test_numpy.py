@@ -0,0 +1,58 @@
+import pytest
+from ctypes import c_int32, c_int64
+from hercules_protocol import (
+    serialize, serialized_size, deserialize, simplify, make_scheme, compile_scheme, iter_events, ArrayVector
+)
+from . import sample_data
+
+np = pytest.importorskip('numpy')
+
+
+def numpy_payload():
+    payload = dict(sample_data.vectors['tuple'][3])
+    payload.update({
+        'vector-of_c_uint8': np.array([1, 2], dtype=np.uint8),
+        'vector-of_c_int16': np.array([1, 2, 3], dtype=np.int16),
+        'vector-of_c_int32': np.array([1, 2], dtype='>i4'),
+        'vector-of_c_int64': np.array([0, 1, 0, 2, 0, 3], dtype=np.int64)[1::2],
+        'vector-of_c_bool': np.array([True, False, False, True]),
+        'vector-of_c_float': np.array([0.1, 0.2], dtype=np.float32),
+        'vector-of_c_double': np.array([0.1]),
+    })
+    return sample_data.vectors['tuple'][:3] + (payload,)
+
+
+def test_serialize_numpy():
+    tuple_ = numpy_payload()
+    assert serialize(*tuple_) == sample_data.vectors['bytes']
+    assert serialized_size(*tuple_) == len(sample_data.vectors['bytes'])
+    assert serialize(*tuple_, scheme=sample_data.vectors['scheme']) == sample_data.vectors['bytes']
+    assert compile_scheme(sample_data.vectors['scheme']).serialize(*tuple_) == sample_data.vectors['bytes']
+    assert make_scheme(tuple_[3])[1] == sample_data.vectors['scheme']
+    assert simplify(tuple_) == simplify(sample_data.vectors['tuple'])
+
+
+def test_deserialize_numpy():
+    data = sample_data.vectors['bytes']
+    event = deserialize(data, numpy=True)
+    vector = event[3]['vector-of_c_int16']
+    assert isinstance(vector, np.ndarray)
+    assert vector.dtype == np.dtype('>i2')
+    assert vector.base is data
+    assert event[3]['vector-of_c_bool'].tolist() == [True, False, False, True]
+    assert simplify(event) == simplify(sample_data.vectors['tuple'])
+
+    events = list(iter_events(data * 2, numpy=True))
+    assert [simplify(e) for e in events] == [simplify(sample_data.vectors['tuple'])] * 2
+
+
+def test_serialize_numpy_raises():
+    with pytest.raises(ValueError, match='Incorrect data type uint16 of 1-dimensional array'):
+        serialize(1, 12345, sample_data.vectors['tuple'][2], {'h': np.array([1], dtype=np.uint16)})
+
+    with pytest.raises(ValueError, match='Incorrect data type int32 of 2-dimensional array'):
+        serialize(1, 12345, sample_data.vectors['tuple'][2], {'h': np.zeros((2, 2), dtype=np.int32)})
+
+    with pytest.raises(TypeError, match="The buffer items of the format '<?d' have to be numbers of c_long"):
+        ArrayVector(np.array([1.5]), c_int64)
+    assert ArrayVector(np.array([1, 2], dtype='>i4'), c_int32).to_bytes() == b'\x00\x00\x00\x01\x00\x00\x00\x02'
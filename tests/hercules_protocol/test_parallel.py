@@ -0,0 +1,57 @@
+import pytest
+from hercules_protocol import deserialize, deserialize_parallel, compile_scheme
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+DATA = b''.join(sample['bytes'] for sample in SAMPLES) * 3
+EVENTS = [deserialize(sample['bytes'], native=True) for sample in SAMPLES] * 3
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_deserialize_parallel(tmp_path, workers):
+    path = tmp_path / 'events.bin'
+    path.write_bytes(DATA)
+    assert list(deserialize_parallel(DATA, workers=workers, chunk_size=100)) == EVENTS
+    assert list(deserialize_parallel(memoryview(bytearray(DATA)), workers=workers, chunk_size=1000)) == EVENTS
+    assert list(deserialize_parallel(path, workers=workers, chunk_size=100)) == EVENTS
+    assert list(deserialize_parallel(str(path), workers=workers)) == EVENTS
+
+    empty = tmp_path / 'empty.bin'
+    empty.write_bytes(b'')
+    assert list(deserialize_parallel(empty, workers=workers)) == []
+    assert list(deserialize_parallel(b'', workers=workers)) == []
+
+    sample = sample_data.from_balconlib
+    codec = compile_scheme(sample['scheme'])
+    events = deserialize_parallel(sample['bytes'] * 5, workers=workers, scheme=codec, chunk_size=1)
+    assert list(events) == [deserialize(sample['bytes'], native=True)] * 5
+
+    with pytest.raises(ValueError, match=f'The event at the offset {len(DATA)} is incomplete'):
+        list(deserialize_parallel(DATA + DATA[:30], workers=workers, chunk_size=100))
+
+
+def test_deserialize_parallel_columns():
+    versions, timestamps, uuids, tags = deserialize_parallel(DATA, workers=2, chunk_size=100, columns=True)
+    assert list(versions) == [event[0] for event in EVENTS]
+    assert list(timestamps) == [event[1] for event in EVENTS]
+    assert uuids == [event[2] for event in EVENTS]
+    assert set(tags) == {key for event in EVENTS for key in event[3]}
+    for key, column in tags.items():
+        assert column == [event[3].get(key) for event in EVENTS]
+
+    assert deserialize_parallel(DATA, workers=1, columns=True) == (versions, timestamps, uuids, tags)
+
+
+def test_deserialize_parallel_raises():
+    with pytest.raises(ValueError, match='The workers has to be a positive number'):
+        deserialize_parallel(DATA, workers=0)
+
+    with pytest.raises(TypeError, match='The source has to be bytes, memoryview, mmap or a file path'):
+        deserialize_parallel([DATA])  # type: ignore  # type hints error for testing
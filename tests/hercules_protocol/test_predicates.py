@@ -0,0 +1,74 @@
+import io
+import pytest
+from uuid import UUID
+from hercules_protocol import iter_events, simplify, tag, Predicate
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+DATA = b''.join(sample['bytes'] for sample in SAMPLES)
+
+
+def matches(predicate):
+    return [predicate(sample['bytes']) for sample in SAMPLES]
+
+
+def test_comparisons():
+    assert matches(tag('host') == 'localhost') == [True, False, False, False]
+    assert matches(tag('host') == b'extern-api.testkontur.ru') == [False, False, False, True]
+    assert matches(tag('host') != 'localhost') == [False, False, False, True]
+    assert matches(tag('host') >= b'f') == [True, False, False, False]
+    assert matches(tag('status') == 200) == [False, False, False, True]
+    assert matches(tag('counters.req_len') > 500) == [False, False, False, True]
+    assert matches(tag(('counters', 'full_time')) < 93) == [False, False, False, False]
+    assert matches(100 < tag('c_int16')) == [False, True, False, False]
+    assert matches(tag('c_double') <= 3.03) == [False, True, False, False]
+    assert matches(tag('c_bool') == True) == [False, True, False, False]  # noqa: E712
+    assert matches(tag('UUID') == UUID('11203800-63fd-11e8-83e2-3a587d902000')) == [False, True, False, False]
+    assert matches(tag('None') == None) == [False, True, False, False]  # noqa: E711
+    assert matches(tag('container-in-container.host.os') == 'centos') == [False, True, False, False]
+    assert matches(tag('host') == 200) == [False, False, False, False]
+    assert matches(tag('host').exists()) == [True, False, False, True]
+
+
+def test_combinations():
+    assert matches((tag('host') == 'localhost') | (tag('status') == 200)) == [True, False, False, True]
+    assert matches((tag('host').exists()) & (tag('status') != 200)) == [False, False, False, False]
+    assert matches(~(tag('host') == 'localhost')) == [False, True, True, True]
+
+    with pytest.raises(TypeError, match='The predicates have to be combined by &, | and ~'):
+        (tag('host') == 'localhost') and (tag('status') == 200)
+
+
+def test_iter_events_where():
+    expected = [simplify(sample['tuple']) for sample in (sample_data.from_github, sample_data.from_balconlib)]
+    where = tag('host').exists()
+    assert [simplify(event) for event in iter_events(DATA, where=where)] == expected
+    assert [simplify(event) for event in iter_events(memoryview(DATA), where=where)] == expected
+    assert [simplify(event) for event in iter_events(io.BytesIO(DATA), chunk_size=50, where=where)] == expected
+    assert list(iter_events(DATA, where=tag('absent').exists())) == []
+
+    with pytest.raises(ValueError, match=f'The event at the offset {len(DATA)} is incomplete'):
+        list(iter_events(DATA + DATA[:30], where=tag('status') == 200))
+
+
+def test_predicates_raise():
+    with pytest.raises(ValueError, match='The None has to be compared by == or !=, not <'):
+        tag('host') < None
+    with pytest.raises(TypeError, match=r'The \[1\] is not a number, a string, UUID or None'):
+        tag('host') == [1]
+    with pytest.raises(ValueError, match='Permitted characters of the key'):
+        tag('bad key')
+    with pytest.raises(TypeError, match='The where has to be a predicate'):
+        iter_events(DATA, where=1)  # type: ignore  # type hints error for testing
+
+    class Incomplete(Predicate):
+        pass
+
+    with pytest.raises(TypeError, match="Can't instantiate abstract class Incomplete"):
+        Incomplete()  # type: ignore  # abstract class for testing
@@ -0,0 +1,137 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from hercules_protocol import GateSender, iter_events, simplify
+from hercules_protocol.batch import BATCH_COUNT
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+
+
+class GateStub(ThreadingHTTPServer):
+    """ The stand-in of Hercules Gate, which records the batches and fails the first requests
+    """
+
+    def __init__(self, failures=0, status=503):
+        super().__init__(('127.0.0.1', 0), GateHandler)
+        self.failures = failures
+        self.status = status
+        self.batches = []
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, args=(0.01,), daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}/stream/send?stream=test'
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class GateHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        with server.lock:
+            server.clients.add(self.client_address)
+            failed = server.failures > 0
+            if failed:
+                server.failures -= 1
+            else:
+                server.batches.append((self.path, self.headers['apiKey'], body))
+        self.send_response(server.status if failed else 200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def decode_batches(batches):
+    events = []
+    for _, _, body in batches:
+        count, = BATCH_COUNT.unpack_from(body)
+        batch = list(iter_events(body[BATCH_COUNT.size:]))
+        assert count == len(batch)
+        events.extend(batch)
+    return events
+
+
+def test_gate_sender():
+    server = GateStub()
+    try:
+        with GateSender(server.url, api_key='key', connections=2, batch_size=2000, flush_interval=0.05) as sender:
+            for sample in SAMPLES * 10:
+                assert sender.send(*sample['tuple'])
+            sender.flush()
+            metrics = sender.metrics()
+        assert metrics['sent_events'] == 40
+        assert metrics['queue_depth'] == 0
+        assert metrics['failed_events'] == 0
+        assert metrics['sent_batches'] == len(server.batches) > 1
+        assert metrics['requests'] == len(server.batches)
+        assert metrics['latency_max'] >= metrics['latency_avg'] > 0
+        # the connections are kept alive
+        assert len(server.clients) <= 2 < len(server.batches)
+        assert {(path, api_key) for path, api_key, _ in server.batches} == {('/stream/send?stream=test', 'key')}
+        events = sorted((repr(simplify(event)) for event in decode_batches(server.batches)))
+        assert events == sorted(repr(simplify(sample['tuple'])) for sample in SAMPLES * 10)
+    finally:
+        server.stop()
+
+
+def test_gate_sender_retries():
+    server = GateStub(failures=2)
+    try:
+        sender = GateSender(server.url, connections=1, max_batch_events=3, backoff=0.001, flush_interval=0.01)
+        for sample in SAMPLES:
+            sender.send(*sample['tuple'])
+        sender.close()
+        metrics = sender.metrics()
+        assert metrics['retries'] == 2
+        assert metrics['sent_events'] == 4
+        assert metrics['sent_batches'] == 2
+        assert [len(decode_batches([batch])) for batch in server.batches] == [3, 1]
+    finally:
+        server.stop()
+
+    server = GateStub(failures=100, status=400)
+    try:
+        with GateSender(server.url, connections=1, backoff=0.001) as sender:
+            sender.send(*SAMPLES[0]['tuple'])
+        metrics = sender.metrics()
+        assert metrics['retries'] == 0
+        assert metrics['failed_events'] == 1
+        assert metrics['last_error'] == 'HTTP 400 Bad Request'
+    finally:
+        server.stop()
+
+    with pytest.raises(ValueError, match='The sender is closed'):
+        sender.send(*SAMPLES[0]['tuple'])
+
+
+def test_gate_sender_backpressure():
+    server = GateStub()
+    try:
+        sender = GateSender(server.url, connections=1, max_queue_size=1, flush_interval=0.01)
+        results = [sender.send(*SAMPLES[0]['tuple'], block=False) for _ in range(1000)]
+        sender.close()
+        metrics = sender.metrics()
+        assert metrics['dropped_events'] == results.count(False) > 0
+        assert metrics['sent_events'] == results.count(True)
+    finally:
+        server.stop()
+
+    with pytest.raises(ValueError, match='The url has to be an http or https URL'):
+        GateSender('ftp://localhost/')
@@ -0,0 +1,146 @@
+import io
+import mmap
+import socket
+import threading
+import pytest
+from ctypes import c_char_p, c_int32
+from uuid import uuid4
+from hercules_protocol import iter_events, simplify, compile_scheme, serialize, Vector, stream
+from hercules_protocol.serialization import _skip_event
+from . import sample_data
+
+
+SAMPLES = [
+    sample_data.from_github,
+    sample_data.container,
+    sample_data.vectors,
+    sample_data.from_balconlib,
+]
+DATA = b''.join(sample['bytes'] for sample in SAMPLES)
+EXPECTED = [simplify(sample['tuple']) for sample in SAMPLES]
+
+
+class PartialReader(io.RawIOBase):
+    """ Return at most 7 bytes per read, like a socket
+    """
+    def __init__(self, data: bytes) -> None:
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self.data.read(min(size, 7))
+
+
+def test_iter_events_buffer():
+    assert [simplify(e) for e in iter_events(DATA)] == EXPECTED
+    assert [simplify(e) for e in iter_events(bytearray(DATA))] == EXPECTED
+    assert [simplify(e) for e in iter_events(memoryview(DATA))] == EXPECTED
+    assert list(iter_events(b'')) == []
+
+
+def test_iter_events_mmap(tmp_path):
+    path = tmp_path / 'events.bin'
+    path.write_bytes(DATA)
+    with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        assert [simplify(e) for e in iter_events(mm)] == EXPECTED
+
+
+def test_iter_events_file(tmp_path):
+    path = tmp_path / 'events.bin'
+    path.write_bytes(DATA)
+    with open(path, 'rb') as fh:
+        assert [simplify(e) for e in iter_events(fh, chunk_size=100)] == EXPECTED
+
+    assert [simplify(e) for e in iter_events(PartialReader(DATA))] == EXPECTED
+
+
+def test_iter_events_socket():
+    reader, writer = socket.socketpair()
+
+    def send():
+        for i in range(0, len(DATA), 50):
+            writer.sendall(DATA[i:i + 50])
+        writer.close()
+
+    thread = threading.Thread(target=send)
+    thread.start()
+    with reader, reader.makefile('rb') as fh:
+        assert [simplify(e) for e in iter_events(fh)] == EXPECTED
+    thread.join()
+
+
+def test_iter_events_live_socket():
+    reader, writer = socket.socketpair()
+    reader.settimeout(5)
+    with reader, writer, reader.makefile('rb') as fh:
+        events = iter_events(fh)
+        for sample, expected in zip(SAMPLES, EXPECTED):
+            writer.sendall(sample['bytes'])
+            # the event is decoded while the connection is open, before a whole chunk has come
+            assert simplify(next(events)) == expected
+        writer.shutdown(socket.SHUT_WR)
+        assert list(events) == []
+
+
+def test_iter_events_with_scheme():
+    sample = sample_data.from_balconlib
+    for scheme in (sample['scheme'], compile_scheme(sample['scheme'])):
+        events = iter_events(sample['bytes'] * 3, scheme=scheme)
+        assert [simplify(e) for e in events] == [simplify(sample['tuple'])] * 3
+        events = iter_events(PartialReader(sample['bytes'] * 3), scheme=scheme)
+        assert [simplify(e) for e in events] == [simplify(sample['tuple'])] * 3
+
+
+def test_iter_events_raises():
+    with pytest.raises(ValueError, match=f'The event at the offset {len(DATA)} is incomplete'):
+        list(iter_events(DATA + sample_data.from_github['bytes'][:-1]))
+
+    with pytest.raises(ValueError, match=f'The event at the offset {len(DATA)} is incomplete'):
+        list(iter_events(PartialReader(DATA + sample_data.from_github['bytes'][:30])))
+
+    with pytest.raises(TypeError, match='The source has to be *'):
+        iter_events(1)  # type: ignore  # type hints error for testing
+
+
+def test_iter_events_views():
+    sample = sample_data.from_balconlib
+    for source in (sample['bytes'] * 2, PartialReader(sample['bytes'] * 2)):
+        events = list(iter_events(source, view_threshold=32))
+        assert len(events) == 2
+        for event in events:
+            assert isinstance(event[3]['uri'], memoryview)
+            assert bytes(event[3]['uri']) == simplify(sample['tuple'])[3]['uri']
+
+
+def test_iter_events_fields():
+    fields = ['host', 'counters.req_len', ('c_int32',)]
+    expected = [
+        simplify((*sample['tuple'][:3], {
+            key: {'req_len': value['req_len']} if key == 'counters' else value
+            for key, value in sample['tuple'][3].items() if key in ('host', 'counters', 'c_int32')
+        }))
+        for sample in SAMPLES
+    ]
+    for source in (DATA, PartialReader(DATA)):
+        assert list(iter_events(source, native=True, fields=fields)) == expected
+
+    with pytest.raises(ValueError, match="The fields mustn't be used with a scheme"):
+        iter_events(DATA, scheme=compile_scheme(sample_data.from_balconlib['scheme']), fields=fields)
+
+
+def test_iter_events_file_rescans(monkeypatch):
+    event = (1, 0, uuid4(), {'text': c_char_p(b'x' * 100000), 'tags': Vector([c_int32(1)] * 5000, c_int32)})
+    data = serialize(*event) * 2
+    calls = []
+
+    def skip_event(data, start):
+        calls.append(start)
+        return _skip_event(data, start)
+
+    monkeypatch.setattr(stream, '_skip_event', skip_event)
+    events = list(iter_events(io.BytesIO(data), chunk_size=100))
+    assert [simplify(e) for e in events] == [simplify(event)] * 2
+    # an incomplete event is scanned again after its length has been read, not after every chunk
+    assert len(calls) < 50